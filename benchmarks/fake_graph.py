@@ -0,0 +1,737 @@
+"""
+Local fake of the Microsoft Graph endpoints used by hermes_msgraph.
+
+Serves the token endpoint, messages with paging, message move, copy, update
+and delete, messages/delta of a folder, mailFolders/delta, users and
+users/delta, Planner plans, buckets,
+tasks and task details, sendMail, drafts with attachments, upload sessions
+and send, attachments (with Range requests), subscriptions and
+$batch, from data generated with a fixed seed. Latency, the largest page size
+and the share of throttled (429) responses are configurable, so benchmarks
+can run without a tenant:
+
+    with FakeGraphServer(mailboxes=4, messages_per_mailbox=500, latency=0.01) as server:
+        graph = HermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority)
+
+Only the behaviour the library depends on is implemented: $top, $select and
+Prefer: odata.maxpagesize are honoured. Messages accept the $filter clauses
+Graph supports (eq, startswith(subject), receivedDateTime ranges) and KQL
+$search on subject and received, and reject what Graph rejects: contains or
+endswith on subject, $orderby not leading $filter (InefficientFilter) and
+$search combined with $filter. Other collections ignore $filter.
+"""
+import base64
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from urllib.request import Request, urlopen
+
+TOKEN = "fake-graph-token"
+DEFAULT_PAGE_SIZE = 10
+
+
+def _query(query_string):
+    return {name: values[-1] for name, values in parse_qs(query_string, keep_blank_values=True).items()}
+
+
+_FILTER_CLAUSE = re.compile(
+    r"^(?:(?P<property>[\w/]+) (?P<operator>eq|gt|lt|ge|le) (?P<value>'(?:[^']|'')*'|\S+)"
+    r"|startswith\(subject, '(?P<prefix>(?:[^']|'')*)'\))$"
+)
+_SEARCH_TERM = re.compile(r"^(?:subject:(?P<word>\w+)(?P<star>\*?)|received(?P<operator>>=|<=)(?P<date>[\d-]+))$")
+
+
+def _message_property(message, path):
+    value = message
+    for name in path.split("/"):
+        value = (value or {}).get(name)
+    return value
+
+
+def _filter_predicate(clause):
+    match = _FILTER_CLAUSE.match(clause.strip())
+    if match is None:
+        return None
+    if match.group("prefix") is not None:
+        prefix = match.group("prefix").replace("''", "'").lower()
+        return lambda message: (message.get("subject") or "").lower().startswith(prefix)
+
+    path, operator, value = match.group("property", "operator", "value")
+    if value.startswith("'"):
+        value = value[1:-1].replace("''", "'").lower()
+        return lambda message: str(_message_property(message, path) or "").lower() == value
+    if value in ("true", "false"):
+        return lambda message: _message_property(message, path) is (value == "true")
+    compare = {"gt": "__gt__", "lt": "__lt__", "ge": "__ge__", "le": "__le__", "eq": "__eq__"}[operator]
+    # Dates compare as instants whatever their offset; date-only values are the start of the day in UTC.
+    bound = _datetime(value)
+    return lambda message: bool(_message_property(message, path)) and getattr(
+        _datetime(_message_property(message, path)), compare
+    )(bound)
+
+
+def _datetime(value):
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _search_predicate(term):
+    match = _SEARCH_TERM.match(term)
+    if match is None:
+        return None
+    if match.group("word"):
+        word, prefix = match.group("word").lower(), bool(match.group("star"))
+        return lambda message: any(
+            token.startswith(word) if prefix else token == word
+            for token in re.findall(r"\w+", (message.get("subject") or "").lower())
+        )
+    date = match.group("date")
+    if match.group("operator") == ">=":
+        return lambda message: message["receivedDateTime"][:10] >= date
+    return lambda message: message["receivedDateTime"][:10] <= date
+
+
+def _query_messages(messages, query):
+    """Applies $filter or $search to messages; returns (messages, error) like Graph."""
+    if "$search" in query:
+        if "$filter" in query or "$orderby" in query:
+            return None, ("BadRequest", "$search cannot be combined with $filter or $orderby.")
+        predicates = [_search_predicate(term) for term in query["$search"].strip('"').split(" AND ")]
+        if None in predicates:
+            return None, ("BadRequest", f"Unsupported $search {query['$search']}")
+        return [message for message in messages if all(predicate(message) for predicate in predicates)], None
+
+    clauses = query["$filter"].split(" and ") if query.get("$filter") else []
+    if any(clause.strip().startswith(("contains(", "endswith(")) for clause in clauses):
+        return None, ("ErrorInvalidUrlQueryFilter", "contains and endswith are not supported on subject.")
+    orderby = query.get("$orderby")
+    if orderby:
+        properties = [part.split()[0] for part in orderby.split(",")]
+        leading = [clause.split()[0] for clause in clauses[: len(properties)]]
+        if any(not prefix.startswith(name) for name, prefix in zip(properties, leading)) or len(leading) < len(properties):
+            return None, ("InefficientFilter", "The restriction or sort order is too complex for this operation.")
+    predicates = [_filter_predicate(clause) for clause in clauses]
+    if None in predicates:
+        return None, ("BadRequest", f"Unsupported $filter {query['$filter']}")
+    return [message for message in messages if all(predicate(message) for predicate in predicates)], None
+
+
+def _select(item, query):
+    fields = query.get("$select")
+    if not fields:
+        return item
+    selected = {name: item[name] for name in fields.split(",") if name in item}
+    selected["id"] = item["id"]
+    if "@removed" in item:
+        selected["@removed"] = item["@removed"]
+    return selected
+
+
+class FakeGraphData:
+    """Deterministic tenant contents: mailboxes with messages and folders, users and plans."""
+
+    def __init__(
+        self,
+        mailboxes=4,
+        messages_per_mailbox=200,
+        folders_per_mailbox=20,
+        users=500,
+        plans=4,
+        tasks_per_plan=50,
+        attachment_every=5,
+        attachment_size=256 * 1024,
+        body_size=2048,
+        seed=0,
+    ):
+        generator = random.Random(seed)
+        started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        words = ["invoice", "report", "meeting", "update", "contract", "order", "review", "budget", "release", "ticket"]
+
+        self.mailboxes = [f"mailbox{index}@contoso.test" for index in range(mailboxes)]
+        self.messages = {}
+        self.folders = {}
+        self.attachments = {}
+        self.attachment_content = generator.randbytes(attachment_size)
+        for mailbox in self.mailboxes:
+            folders = [
+                {"id": f"folder-{mailbox}-{index:04d}", "displayName": name, "parentFolderId": "root"}
+                for index, name in enumerate(["Inbox", "Sent Items", "Drafts", "Archive"])
+            ]
+            for index in range(len(folders), folders_per_mailbox):
+                folders.append({
+                    "id": f"folder-{mailbox}-{index:04d}",
+                    "displayName": f"Project {index}",
+                    "parentFolderId": folders[0]["id"],
+                })
+            self.folders[mailbox] = folders
+
+            messages = []
+            for index in range(messages_per_mailbox):
+                message_id = f"AAMk-{mailbox.split('@')[0]}-{index:08d}"
+                subject = f"{generator.choice(words).title()} {generator.choice(words)} #{index}"
+                sender = f"sender{generator.randrange(50)}@fabrikam.test"
+                body = (" ".join(generator.choice(words) for _ in range(body_size // 7)))[:body_size]
+                has_attachments = attachment_every and index % attachment_every == 0
+                messages.append({
+                    "id": message_id,
+                    "subject": subject,
+                    "bodyPreview": body[:255],
+                    "body": {"contentType": "text", "content": body},
+                    "receivedDateTime": (started + timedelta(minutes=messages_per_mailbox - index)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "createdDateTime": (started + timedelta(minutes=messages_per_mailbox - index)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "sentDateTime": (started + timedelta(minutes=messages_per_mailbox - index - 1)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "hasAttachments": bool(has_attachments),
+                    "internetMessageId": f"<{message_id}@contoso.test>",
+                    "conversationId": f"conv-{index // 3:08d}",
+                    "parentFolderId": folders[0]["id"],
+                    "isRead": index % 2 == 0,
+                    "importance": "normal",
+                    "categories": [],
+                    "from": {"emailAddress": {"name": sender.split("@")[0], "address": sender}},
+                    "sender": {"emailAddress": {"name": sender.split("@")[0], "address": sender}},
+                    "toRecipients": [{"emailAddress": {"name": mailbox.split("@")[0], "address": mailbox}}],
+                    "ccRecipients": [],
+                })
+                if has_attachments:
+                    self.attachments[message_id] = [{
+                        "@odata.type": "#microsoft.graph.fileAttachment",
+                        "id": f"ATT-{message_id}",
+                        "name": f"attachment-{index}.bin",
+                        "contentType": "application/octet-stream",
+                        "size": attachment_size,
+                    }]
+            self.messages[mailbox] = messages
+
+        self.users = [
+            {
+                "id": f"user-{index:06d}",
+                "displayName": f"User {index}",
+                "userPrincipalName": f"user{index}@contoso.test",
+                "mail": f"user{index}@contoso.test",
+                "jobTitle": generator.choice(["Engineer", "Manager", "Analyst", None]),
+                "officeLocation": generator.choice(["Lisbon", "Recife", "Remote"]),
+                "userType": "Member",
+                "accountEnabled": True,
+            }
+            for index in range(users)
+        ]
+        self.users_by_key = {user["id"]: user for user in self.users}
+        self.users_by_key.update({user["userPrincipalName"]: user for user in self.users})
+        self.users_by_key.update({mailbox: {"id": f"mailbox-{mailbox}", "mail": mailbox} for mailbox in self.mailboxes})
+
+        self.group_id = "group-0000"
+        self.plans = {}
+        self.buckets = {}
+        self.tasks = {}
+        for plan_index in range(plans):
+            plan_id = f"plan-{plan_index:04d}"
+            self.plans[plan_id] = {"id": plan_id, "title": f"Plan {plan_index}", "owner": self.group_id}
+            self.buckets[plan_id] = [
+                {"id": f"bucket-{plan_index:04d}-{index}", "name": name, "planId": plan_id}
+                for index, name in enumerate(["To do", "Doing", "Done"])
+            ]
+            self.tasks[plan_id] = [
+                {
+                    "id": f"task-{plan_index:04d}-{index:05d}",
+                    "planId": plan_id,
+                    "bucketId": self.buckets[plan_id][index % 3]["id"],
+                    "title": f"Task {index}",
+                    "percentComplete": (index % 3) * 50,
+                    "createdDateTime": started.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                }
+                for index in range(tasks_per_plan)
+            ]
+        self.task_ids = {task["id"] for tasks in self.tasks.values() for task in tasks}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.__handle("GET")
+
+    def do_POST(self):
+        self.__handle("POST")
+
+    def do_PATCH(self):
+        self.__handle("PATCH")
+
+    def do_PUT(self):
+        self.__handle("PUT")
+
+    def do_DELETE(self):
+        self.__handle("DELETE")
+
+    def __handle(self, method):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if server.latency:
+            time.sleep(server.latency)
+
+        parts = urlsplit(self.path)
+        if parts.path.endswith("/oauth2/v2.0/token"):
+            self.__send(200, {"access_token": TOKEN, "token_type": "Bearer", "expires_in": 3599})
+            server.record(throttled=False)
+            return
+        # Upload session URLs are pre-authenticated, like Graph's.
+        if "/uploadSessions/" not in parts.path and self.headers.get("Authorization") != f"Bearer {TOKEN}":
+            self.__send(401, {"error": {"code": "InvalidAuthenticationToken"}})
+            return
+        if server.should_throttle():
+            server.record(throttled=True)
+            self.__send(429, {"error": {"code": "TooManyRequests"}}, {"Retry-After": server.retry_after})
+            return
+        server.record(throttled=False)
+
+        status, payload, headers = server.router.route(method, parts.path, parts.query, body, self.headers)
+        self.__send(status, payload, headers)
+
+    def __send(self, status, payload, headers=None):
+        if isinstance(payload, bytes):
+            content = payload
+        elif payload is None:
+            content = b""
+        else:
+            content = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        if not isinstance(payload, bytes) and payload is not None:
+            self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Router:
+    """Maps Graph requests to responses from FakeGraphData."""
+
+    def __init__(self, data, base_url_getter, max_page_size, should_throttle):
+        self.data = data
+        self.base_url = base_url_getter
+        self.max_page_size = max_page_size
+        self.should_throttle = should_throttle
+        self.sent_mail = 0
+        self.copies = 0
+        self.drafts_created = 0
+        # Drafts sent with /send, with the attachments they had.
+        self.sent_drafts = []
+        self.upload_sessions = {}
+        # Items of a delta query (folder contents, folders, users) at each deltaLink, by $deltatoken.
+        self.delta_snapshots = {}
+        self.subscriptions = {}
+        self.__lock = threading.Lock()
+        self.routes = [
+            ("POST", r"/\$batch", self.batch),
+            ("GET", r"/users/(?P<mailbox>[^/]+)/(?:mailFolders/(?P<folder>[^/]+)/)?messages", self.list_messages),
+            ("POST", r"/users/(?P<mailbox>[^/]+)/messages", self.create_draft),
+            ("GET", r"/users/(?P<mailbox>[^/]+)/messages/(?P<message>[^/]+)", self.get_message),
+            ("PATCH", r"/users/(?P<mailbox>[^/]+)/messages/(?P<message>[^/]+)", self.update_message),
+            ("DELETE", r"/users/(?P<mailbox>[^/]+)/messages/(?P<message>[^/]+)", self.delete_message),
+            ("POST", r"/users/(?P<mailbox>[^/]+)/messages/(?P<message>[^/]+)/(?P<operation>move|copy)", self.move_message),
+            ("POST", r"/users/(?P<mailbox>[^/]+)/messages/(?P<message>[^/]+)/send", self.send_draft),
+            ("GET", r"/users/(?P<mailbox>[^/]+)/messages/(?P<message>[^/]+)/attachments", self.list_attachments),
+            ("POST", r"/users/(?P<mailbox>[^/]+)/messages/(?P<message>[^/]+)/attachments", self.add_attachment),
+            ("POST", r"/users/(?P<mailbox>[^/]+)/messages/(?P<message>[^/]+)/attachments/createUploadSession", self.create_upload_session),
+            ("PUT", r"/uploadSessions/(?P<session>[^/]+)", self.upload_chunk),
+            ("GET", r"/users/(?P<mailbox>[^/]+)/messages/(?P<message>[^/]+)/attachments/(?P<attachment>[^/]+)/\$value", self.attachment_content),
+            ("GET", r"/users/(?P<mailbox>[^/]+)/mailFolders/(?P<folder>[^/]+)/messages/delta", self.messages_delta),
+            ("GET", r"/users/(?P<mailbox>[^/]+)/mail[fF]olders/delta", self.folders_delta),
+            ("POST", r"/users/(?P<mailbox>[^/]+)/sendMail", self.send_mail),
+            ("GET", r"/users", self.list_users),
+            ("GET", r"/users/delta", self.users_delta),
+            ("GET", r"/users/(?P<user>[^/]+)", self.get_user),
+            ("GET", r"/groups/(?P<group>[^/]+)/planner/plans", self.list_plans),
+            ("GET", r"/planner/plans/(?P<plan>[^/]+)", self.get_plan),
+            ("GET", r"/planner/plans/(?P<plan>[^/]+)/tasks", self.list_tasks),
+            ("GET", r"/planner/plans/(?P<plan>[^/]+)/buckets", self.list_buckets),
+            ("GET", r"/planner/tasks/(?P<task>[^/]+)/details", self.get_task_details),
+            ("GET", r"/subscriptions", self.list_subscriptions),
+            ("POST", r"/subscriptions", self.create_subscription),
+            ("PATCH", r"/subscriptions/(?P<subscription>[^/]+)", self.update_subscription),
+            ("DELETE", r"/subscriptions/(?P<subscription>[^/]+)", self.delete_subscription),
+        ]
+        self.routes = [(method, re.compile(f"^{pattern}$"), handler) for method, pattern, handler in self.routes]
+
+    def route(self, method, path, query_string, body, headers):
+        path = unquote(path)
+        version, _, path = path.lstrip("/").partition("/")
+        path = "/" + path
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                request = {
+                    "path": path,
+                    "version": version,
+                    "query": _query(query_string),
+                    "body": body,
+                    "headers": headers,
+                    **{name: value for name, value in match.groupdict().items() if value is not None},
+                }
+                return handler(request)
+        return 404, {"error": {"code": "ResourceNotFound", "message": f"{method} {path}"}}, None
+
+    def __page(self, request, items, page_size=None, delta=False, delta_token="latest"):
+        """Pages items with $skiptoken; the last page of a delta query carries a deltaLink."""
+        query = request["query"]
+        prefer = (request["headers"] or {}).get("Prefer") or ""
+        preferred = re.search(r"odata.maxpagesize=(\d+)", prefer)
+        size = int(query.get("$top") or (preferred.group(1) if preferred else page_size or DEFAULT_PAGE_SIZE))
+        size = max(1, min(size, self.max_page_size))
+        offset = int(query.get("$skiptoken") or 0)
+        page = {"value": [_select(item, query) for item in items[offset:offset + size]]}
+
+        link_query = {name: value for name, value in query.items() if name not in ("$skiptoken", "$deltatoken")}
+        base = f"{self.base_url()}{request['path']}"
+        if offset + size < len(items):
+            link_query["$skiptoken"] = offset + size
+            page["@odata.nextLink"] = f"{base}?{'&'.join(f'{name}={quote(str(value))}' for name, value in link_query.items())}"
+        elif delta:
+            link_query["$deltatoken"] = delta_token
+            page["@odata.deltaLink"] = f"{base}?{'&'.join(f'{name}={quote(str(value))}' for name, value in link_query.items())}"
+        return page
+
+    def list_messages(self, request):
+        messages = self.data.messages.get(request["mailbox"])
+        if messages is None:
+            return 404, {"error": {"code": "ErrorInvalidUser"}}, None
+        if "folder" in request:
+            messages = [message for message in messages if message["parentFolderId"] == request["folder"]]
+        messages, error = _query_messages(messages, request["query"])
+        if error:
+            code, message = error
+            return 400, {"error": {"code": code, "message": message}}, None
+        # get_emails asks for $top=n; n_of_messages="all" asks for the largest page.
+        return 200, self.__page(request, messages), None
+
+    def get_message(self, request):
+        for message in self.data.messages.get(request["mailbox"], []):
+            if message["id"] == request["message"]:
+                return 200, _select(message, request["query"]), None
+        return 404, {"error": {"code": "ErrorItemNotFound"}}, None
+
+    def __find_message(self, request):
+        for index, message in enumerate(self.data.messages.get(request["mailbox"], [])):
+            if message["id"] == request["message"]:
+                return index, message
+        return None, None
+
+    def update_message(self, request):
+        changes = json.loads(request["body"] or b"{}")
+        with self.__lock:
+            _, message = self.__find_message(request)
+            if message is None:
+                return 404, {"error": {"code": "ErrorItemNotFound"}}, None
+            message.update({name: value for name, value in changes.items() if name in ("isRead", "categories", "importance")})
+            return 200, dict(message), None
+
+    def delete_message(self, request):
+        with self.__lock:
+            index, _ = self.__find_message(request)
+            if index is None:
+                return 404, {"error": {"code": "ErrorItemNotFound"}}, None
+            del self.data.messages[request["mailbox"]][index]
+        return 204, None, None
+
+    def move_message(self, request):
+        destination_id = json.loads(request["body"] or b"{}").get("destinationId")
+        if destination_id not in {folder["id"] for folder in self.data.folders.get(request["mailbox"], [])}:
+            return 400, {"error": {"code": "ErrorInvalidIdMalformed", "message": "Invalid destinationId."}}, None
+        with self.__lock:
+            index, message = self.__find_message(request)
+            if message is None:
+                return 404, {"error": {"code": "ErrorItemNotFound"}}, None
+            self.copies += 1
+            target = dict(message, id=f"{message['id']}-{request['operation']}-{self.copies}", parentFolderId=destination_id)
+            messages = self.data.messages[request["mailbox"]]
+            if request["operation"] == "move":
+                messages[index] = target
+            else:
+                messages.insert(index + 1, target)
+        return 201, target, None
+
+    def list_attachments(self, request):
+        return 200, self.__page(request, self.data.attachments.get(request["message"], [])), None
+
+    def attachment_content(self, request):
+        if request["message"] not in self.data.attachments:
+            return 404, {"error": {"code": "ErrorItemNotFound"}}, None
+        content = self.data.attachment_content
+        match = re.match(r"bytes=(\d+)-", (request["headers"] or {}).get("Range") or "")
+        if match:
+            start = int(match.group(1))
+            if start >= len(content):
+                return 416, None, {"Content-Range": f"bytes */{len(content)}"}
+            return 206, content[start:], {"Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}"}
+        return 200, content, None
+
+    def messages_delta(self, request):
+        messages = self.data.messages.get(request["mailbox"])
+        if messages is None:
+            return 404, {"error": {"code": "ErrorInvalidUser"}}, None
+        with self.__lock:
+            return self.__delta(request, [message for message in messages if message["parentFolderId"] == request["folder"]])
+
+    def folders_delta(self, request):
+        if request["mailbox"] not in self.data.folders:
+            return 404, {"error": {"code": "ErrorInvalidUser"}}, None
+        with self.__lock:
+            return self.__delta(request, self.data.folders[request["mailbox"]])
+
+    def __delta(self, request, items, page_size=None):
+        """Every item, then what changed since the snapshot named by $deltatoken."""
+        current = {item["id"]: json.dumps(item, sort_keys=True) for item in items}
+        token = request["query"].get("$deltatoken")
+        if token:
+            previous = self.delta_snapshots.get(token)
+            if previous is None:
+                return 410, {"error": {"code": "SyncStateNotFound", "message": "syncStateNotFound"}}, None
+            changed = [item for item in items if previous.get(item["id"]) != current[item["id"]]]
+            items = changed + [{"id": item_id, "@removed": {"reason": "deleted"}} for item_id in previous if item_id not in current]
+        next_token = str(len(self.delta_snapshots) + 1)
+        page = self.__page(request, items, page_size=page_size, delta=True, delta_token=next_token)
+        if "@odata.deltaLink" in page:
+            self.delta_snapshots[next_token] = current
+        return 200, page, None
+
+    def send_mail(self, request):
+        message = json.loads(request["body"] or b"{}").get("message")
+        if not message:
+            return 400, {"error": {"code": "ErrorInvalidRequest"}}, None
+        with self.__lock:
+            self.sent_mail += 1
+        return 202, None, None
+
+    def create_draft(self, request):
+        message = json.loads(request["body"] or b"{}")
+        mailbox = request["mailbox"]
+        if mailbox not in self.data.messages:
+            return 404, {"error": {"code": "ErrorInvalidUser"}}, None
+        drafts_id = next(folder["id"] for folder in self.data.folders[mailbox] if folder["displayName"] == "Drafts")
+        with self.__lock:
+            self.drafts_created += 1
+            draft = dict(message, id=f"draft-{self.drafts_created}", parentFolderId=drafts_id, isDraft=True, hasAttachments=False)
+            self.data.messages[mailbox].append(draft)
+        return 201, draft, None
+
+    def add_attachment(self, request):
+        attachment = json.loads(request["body"] or b"{}")
+        with self.__lock:
+            _, message = self.__find_message(request)
+            if message is None:
+                return 404, {"error": {"code": "ErrorItemNotFound"}}, None
+            size = len(base64.b64decode(attachment.get("contentBytes") or ""))
+            attachments = self.data.attachments.setdefault(message["id"], [])
+            attachments.append({"id": f"ATT-{message['id']}-{len(attachments)}", "name": attachment.get("name"), "size": size})
+            message["hasAttachments"] = True
+        return 201, attachments[-1], None
+
+    def create_upload_session(self, request):
+        item = json.loads(request["body"] or b"{}").get("AttachmentItem") or {}
+        with self.__lock:
+            _, message = self.__find_message(request)
+            if message is None:
+                return 404, {"error": {"code": "ErrorItemNotFound"}}, None
+            session_id = str(len(self.upload_sessions) + 1)
+            self.upload_sessions[session_id] = {
+                "mailbox": request["mailbox"],
+                "message": message["id"],
+                "name": item.get("name"),
+                "size": int(item.get("size") or 0),
+                "received": 0,
+            }
+        upload_url = f"{self.base_url()}/uploadSessions/{session_id}"
+        return 201, {"uploadUrl": upload_url, "nextExpectedRanges": ["0-"]}, None
+
+    def upload_chunk(self, request):
+        """Accepts the next chunk of an upload session; the last one attaches the file to its draft."""
+        match = re.match(r"bytes (\d+)-(\d+)/(\d+)", (request["headers"] or {}).get("Content-Range") or "")
+        with self.__lock:
+            session = self.upload_sessions.get(request["session"])
+            if session is None:
+                return 404, {"error": {"code": "ErrorItemNotFound"}}, None
+            if not match or int(match.group(1)) != session["received"] or int(match.group(3)) != session["size"]:
+                return 416, {"error": {"code": "InvalidRange"}}, None
+            session["received"] += len(request["body"])
+            if session["received"] < session["size"]:
+                return 202, {"nextExpectedRanges": [f"{session['received']}-"]}, None
+            attachments = self.data.attachments.setdefault(session["message"], [])
+            attachments.append({"id": f"ATT-{session['message']}-{len(attachments)}", "name": session["name"], "size": session["size"]})
+        return 201, None, None
+
+    def send_draft(self, request):
+        with self.__lock:
+            index, message = self.__find_message(request)
+            if message is None:
+                return 404, {"error": {"code": "ErrorItemNotFound"}}, None
+            del self.data.messages[request["mailbox"]][index]
+            self.sent_drafts.append(dict(message, attachments=self.data.attachments.pop(message["id"], [])))
+            self.sent_mail += 1
+        return 202, None, None
+
+    def list_users(self, request):
+        return 200, self.__page(request, self.data.users, page_size=100), None
+
+    def users_delta(self, request):
+        with self.__lock:
+            return self.__delta(request, self.data.users, page_size=100)
+
+    def get_user(self, request):
+        user = self.data.users_by_key.get(request["user"])
+        if user is None:
+            return 404, {"error": {"code": "Request_ResourceNotFound"}}, None
+        return 200, _select(user, request["query"]), None
+
+    def list_plans(self, request):
+        if request["group"] != self.data.group_id:
+            return 404, {"error": {"code": "NotFound"}}, None
+        return 200, {"value": list(self.data.plans.values())}, None
+
+    def get_plan(self, request):
+        plan = self.data.plans.get(request["plan"])
+        return (200, plan, None) if plan else (404, {"error": {"code": "NotFound"}}, None)
+
+    def list_tasks(self, request):
+        if request["plan"] not in self.data.tasks:
+            return 404, {"error": {"code": "NotFound"}}, None
+        return 200, self.__page(request, self.data.tasks[request["plan"]], page_size=100), None
+
+    def list_buckets(self, request):
+        if request["plan"] not in self.data.buckets:
+            return 404, {"error": {"code": "NotFound"}}, None
+        return 200, {"value": self.data.buckets[request["plan"]]}, None
+
+    def get_task_details(self, request):
+        if request["task"] not in self.data.task_ids:
+            return 404, {"error": {"code": "NotFound"}}, None
+        return 200, {"id": request["task"], "description": f"Details of {request['task']}", "checklist": {}}, None
+
+    def list_subscriptions(self, request):
+        with self.__lock:
+            return 200, self.__page(request, list(self.subscriptions.values())), None
+
+    def create_subscription(self, request):
+        """Validates the notificationUrl like Graph: the token must come back as plain text."""
+        subscription = json.loads(request["body"] or b"{}")
+        url = subscription.get("notificationUrl") or ""
+        token = f"validation-{len(self.subscriptions) + 1}"
+        try:
+            with urlopen(Request(f"{url}?validationToken={quote(token)}", data=b"", method="POST"), timeout=10) as response:
+                validated = response.status == 200 and response.read().decode("utf-8") == token
+        except OSError:
+            validated = False
+        if not validated:
+            return 400, {"error": {"code": "ValidationError", "message": f"Subscription validation request failed for {url}"}}, None
+        with self.__lock:
+            subscription["id"] = f"subscription-{len(self.subscriptions) + 1}"
+            self.subscriptions[subscription["id"]] = subscription
+        return 201, subscription, None
+
+    def update_subscription(self, request):
+        with self.__lock:
+            subscription = self.subscriptions.get(request["subscription"])
+            if subscription is None:
+                return 404, {"error": {"code": "ResourceNotFound"}}, None
+            subscription.update(json.loads(request["body"] or b"{}"))
+        return 200, subscription, None
+
+    def delete_subscription(self, request):
+        with self.__lock:
+            if self.subscriptions.pop(request["subscription"], None) is None:
+                return 404, {"error": {"code": "ResourceNotFound"}}, None
+        return 204, None, None
+
+    def batch(self, request):
+        payload = json.loads(request["body"] or b"{}")
+        responses = []
+        for sub_request in payload.get("requests", [])[:20]:
+            # Graph throttles the requests of a batch one by one.
+            if self.should_throttle():
+                responses.append({
+                    "id": sub_request["id"],
+                    "status": 429,
+                    "headers": {"Retry-After": "0"},
+                    "body": {"error": {"code": "TooManyRequests"}},
+                })
+                continue
+            parts = urlsplit(sub_request["url"])
+            body = json.dumps(sub_request["body"]).encode("utf-8") if "body" in sub_request else b""
+            status, sub_payload, headers = self.route(
+                sub_request["method"], f"/{request['version']}{parts.path}", parts.query, body, sub_request.get("headers")
+            )
+            if isinstance(sub_payload, bytes):
+                sub_payload = None
+            responses.append({"id": sub_request["id"], "status": status, "headers": headers or {}, "body": sub_payload})
+        return 200, {"responses": responses}, None
+
+
+class FakeGraphServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering like Graph, see the module docstring.
+
+    :param latency: Seconds added to every request.
+    :param max_page_size: Largest page returned whatever $top asks for.
+    :param throttle_rate: Share of requests answered with 429 and Retry-After.
+    :param data_options: Arguments of FakeGraphData.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, max_page_size=1000, throttle_rate=0.0, retry_after=0, seed=0, host="127.0.0.1", port=0, **data_options):
+        super().__init__((host, port), _Handler)
+        self.data = FakeGraphData(seed=seed, **data_options)
+        self.router = _Router(self.data, lambda: self.base_url, max_page_size, self.should_throttle)
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.__thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/v1.0"
+
+    @property
+    def authority(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def should_throttle(self):
+        if not self.throttle_rate:
+            return False
+        with self.__lock:
+            return self.__random.random() < self.throttle_rate
+
+    def record(self, throttled):
+        with self.__lock:
+            self.requests += 1
+            self.throttled += int(throttled)
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.serve_forever, name="fake-graph", daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
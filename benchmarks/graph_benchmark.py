@@ -0,0 +1,273 @@
+"""
+Throughput benchmarks of hermes_msgraph against a local fake Graph server.
+
+Each scenario runs a library call repeatedly against benchmarks/fake_graph.py
+and reports operations and items per second, latency percentiles and the peak
+Python memory of one extra traced run. Results are written as JSON so runs of
+different releases can be compared; with --baseline the run fails when a
+scenario got slower than --max-regression allows.
+
+    python benchmarks/graph_benchmark.py [--iterations 20] [--latency-ms 5] [--throttle-rate 0.02]
+        [--scenarios get_emails,send_email] [--output results.json] [--baseline previous.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph, MetricsCollector, RetryPolicy
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _version():
+    try:
+        from importlib.metadata import version
+
+        return version("hermes_msgraph")
+    except Exception:
+        return "unknown"
+
+
+class Scenarios:
+    """Benchmarked operations; each returns the number of items and bytes it handled."""
+
+    def __init__(self, graph, server, workdir):
+        self.graph = graph
+        self.data = server.data
+        self.mailbox = server.data.mailboxes[0]
+        self.workdir = workdir
+        self.attachments = [
+            (self.mailbox, message_id, attachments[0]["id"])
+            for message_id, attachments in server.data.attachments.items()
+            if message_id in {message["id"] for message in server.data.messages[self.mailbox]}
+        ]
+        self.__next_attachment = 0
+
+    def get_emails(self):
+        emails = self.graph.get_emails(self.mailbox, n_of_messages="all", data="preview")
+        return len(emails), 0
+
+    def get_emails_full(self):
+        emails = self.graph.get_emails(self.mailbox, n_of_messages="all", data="full")
+        return len(emails), 0
+
+    def get_emails_pattern(self):
+        # A subject pattern Graph cannot filter on: planned as a $search plus a local check.
+        emails = self.graph.get_emails(self.mailbox, subject="*Report #1*", n_of_messages="all", data="headers")
+        return len(emails), 0
+
+    def list_mailbox_folders(self):
+        self.graph.invalidate_folder_cache(self.mailbox)
+        return len(self.graph.list_mailbox_folders(self.mailbox)), 0
+
+    def get_all_users(self):
+        return len(self.graph.get_all_users(data="all")), 0
+
+    def send_email(self, count=10):
+        for index in range(count):
+            self.graph.send_email(self.mailbox, f"Benchmark {index}", "Body of the benchmark email.", "to@contoso.test")
+        return count, 0
+
+    def download_attachment(self):
+        mailbox, message_id, attachment_id = self.attachments[self.__next_attachment % len(self.attachments)]
+        self.__next_attachment += 1
+        path = os.path.join(self.workdir, f"{attachment_id}.bin")
+        self.graph.email_service.download_attachment_stream(mailbox, message_id, attachment_id, path, resume=False)
+        size = os.path.getsize(path)
+        os.remove(path)
+        return 1, size
+
+    def bulk_update(self, count=100):
+        messages = self.data.messages[self.mailbox][:count]
+        result = self.graph.mark_emails_read(self.mailbox, [message["id"] for message in messages])
+        if result["stats"]["failed"]:
+            raise RuntimeError(f"Bulk update failed: {result['results'][:3]}")
+        return len(messages), 0
+
+    def planner_snapshot(self):
+        snapshot = self.graph.get_planner_snapshot(group_ids=[self.data.group_id])
+        if snapshot["errors"]:
+            raise RuntimeError(f"Planner snapshot failed: {snapshot['errors']}")
+        return len(snapshot["tasks"]), 0
+
+
+SCENARIOS = [
+    "get_emails",
+    "get_emails_full",
+    "get_emails_pattern",
+    "list_mailbox_folders",
+    "get_all_users",
+    "send_email",
+    "download_attachment",
+    "bulk_update",
+    "planner_snapshot",
+]
+
+
+def run_scenario(operation, iterations, warmup=1):
+    for _ in range(warmup):
+        operation()
+
+    latencies = []
+    items = 0
+    transferred = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        operation_started = time.perf_counter()
+        count, size = operation()
+        latencies.append(time.perf_counter() - operation_started)
+        items += count
+        transferred += size
+    elapsed = time.perf_counter() - started
+
+    # Memory is measured on a separate run, tracing slows the timed ones down.
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "seconds": elapsed,
+        "operations_per_second": iterations / elapsed if elapsed else 0.0,
+        "items_per_second": items / elapsed if elapsed else 0.0,
+        "bytes_per_second": transferred / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "p50": _percentile(latencies, 0.50) * 1000,
+            "p95": _percentile(latencies, 0.95) * 1000,
+            "p99": _percentile(latencies, 0.99) * 1000,
+            "max": latencies[-1] * 1000 if latencies else 0.0,
+        },
+        "peak_memory_bytes": peak,
+    }
+
+
+def run(args):
+    scenario_names = args.scenarios.split(",") if args.scenarios else SCENARIOS
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}. Choose from {', '.join(SCENARIOS)}.")
+
+    server_options = {
+        "latency": args.latency_ms / 1000,
+        "max_page_size": args.max_page_size,
+        "throttle_rate": args.throttle_rate,
+        "mailboxes": 1,
+        "messages_per_mailbox": args.messages,
+        "folders_per_mailbox": args.folders,
+        "users": args.users,
+        "tasks_per_plan": args.tasks,
+        "attachment_size": args.attachment_kb * 1024,
+    }
+    results = {}
+    with FakeGraphServer(**server_options) as server, tempfile.TemporaryDirectory() as workdir:
+        for name in scenario_names:
+            metrics = MetricsCollector()
+            # Throttled requests are retried at once, so throttling shows up as extra round trips.
+            retry_policy = RetryPolicy(backoff_factor=0.01, max_backoff=0.05)
+            graph = HermesMSGraph(
+                "client",
+                "secret",
+                "tenant",
+                base_url=server.base_url,
+                authority=server.authority,
+                retry_policy=retry_policy,
+                metrics=metrics,
+            )
+            try:
+                scenarios = Scenarios(graph, server, workdir)
+                requests_before = server.requests
+                result = run_scenario(getattr(scenarios, name), args.iterations)
+                result["server_requests"] = server.requests - requests_before
+                result["retries"] = graph.get_retry_stats()["retries"]
+                result["throttled"] = sum(
+                    endpoint["throttled"] for endpoint in graph.get_metrics()["endpoints"].values()
+                )
+            finally:
+                graph.http_client.close()
+            results[name] = result
+
+    return {
+        "meta": {
+            "version": _version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "config": {"iterations": args.iterations, **server_options},
+        },
+        "scenarios": results,
+    }
+
+
+def compare(results, baseline, max_regression):
+    """Prints the change of every scenario against baseline; returns the regressions beyond max_regression."""
+    regressions = []
+    for name, result in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous or not previous["operations_per_second"]:
+            continue
+        change = result["operations_per_second"] / previous["operations_per_second"] - 1
+        print(f"  {name:<22} {change:+.1%} operations/s vs baseline")
+        if max_regression is not None and change < -max_regression:
+            regressions.append(f"{name} is {-change:.1%} slower than the baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--scenarios", help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added by the fake server to each request.")
+    parser.add_argument("--max-page-size", type=int, default=1000)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429.")
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--folders", type=int, default=50)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--attachment-kb", type=int, default=1024)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare with.")
+    parser.add_argument("--max-regression", type=float, help="Fail when a scenario is this much slower, e.g. 0.2.")
+    args = parser.parse_args()
+
+    results = run(args)
+    for name, result in results["scenarios"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:<22} {result['operations_per_second']:9.1f} ops/s {result['items_per_second']:11.1f} items/s "
+            f"p50 {latency['p50']:8.2f} ms  p95 {latency['p95']:8.2f} ms  "
+            f"peak {result['peak_memory_bytes'] / 1024 / 1024:7.2f} MiB  {result['server_requests']} requests "
+            f"({result['throttled']} throttled)"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            failures = compare(results, json.load(file), args.max_regression)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Concurrency stress test for HttpClient against a local HTTP/1.1 server.
+
+Many threads share one HttpClient and send GET requests to a local keep-alive
+server that answers with gzip-compressed JSON. The run fails when a response
+is lost or mixed up between threads, a request carries the wrong token, more
+connections are opened than the pool allows, or urllib3 discards connections
+because its pool is full.
+
+    python benchmarks/http_client_stress.py [--threads 64] [--requests 50] [--pool-maxsize 16]
+"""
+import argparse
+import gzip
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hermes_msgraph.http_client import HttpClient
+from hermes_msgraph.token_provider import TokenProvider
+
+TOKEN = "stress-token"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.record(self.client_address)
+        body = gzip.compress(json.dumps({
+            "path": self.path,
+            "authorization": self.headers.get("Authorization"),
+        }).encode("utf-8"))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.connections = set()
+        self.requests = 0
+        self.__lock = threading.Lock()
+
+    def record(self, client_address):
+        with self.__lock:
+            self.connections.add(client_address)
+            self.requests += 1
+
+
+class _PoolWarnings(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def run(threads, requests_per_thread, pool_maxsize):
+    server = _Server()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    pool_warnings = _PoolWarnings()
+    logging.getLogger("urllib3.connectionpool").addHandler(pool_warnings)
+
+    # A valid token is seeded so no request reaches the real login endpoint;
+    # a thread that tried to refresh it would fail the run.
+    token_provider = TokenProvider("client", "secret", "tenant")
+    token_provider.access_token = TOKEN
+    token_provider.expires_at = time.time() + 3600
+
+    errors = []
+    with HttpClient("client", "secret", "tenant", token_provider=token_provider, pool_maxsize=pool_maxsize) as client:
+
+        def worker(thread_index):
+            for request_index in range(requests_per_thread):
+                path = f"/items/{thread_index}/{request_index}"
+                try:
+                    response = client.get(f"{base_url}{path}")
+                    body = response.json()
+                except Exception as e:
+                    errors.append(f"{path}: {e}")
+                    continue
+                if response.status_code != 200 or body["path"] != path:
+                    errors.append(f"{path}: got {response.status_code} {body.get('path')}")
+                elif body["authorization"] != f"Bearer {TOKEN}":
+                    errors.append(f"{path}: wrong Authorization header {body['authorization']}")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(worker, range(threads)))
+        elapsed = time.perf_counter() - started
+
+    server.shutdown()
+    return {
+        "requests": threads * requests_per_thread,
+        "served": server.requests,
+        "connections": len(server.connections),
+        "elapsed_seconds": elapsed,
+        "errors": errors,
+        "pool_warnings": pool_warnings.messages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--pool-maxsize", type=int, default=16)
+    args = parser.parse_args()
+
+    result = run(args.threads, args.requests, args.pool_maxsize)
+    print(
+        f"{result['requests']} requests from {args.threads} threads in {result['elapsed_seconds']:.2f} s "
+        f"({result['requests'] / result['elapsed_seconds']:.0f} req/s) over {result['connections']} connections"
+    )
+
+    failures = list(result["errors"][:10])
+    if result["served"] != result["requests"]:
+        failures.append(f"server saw {result['served']} requests, expected {result['requests']}")
+    if result["connections"] > args.pool_maxsize:
+        failures.append(f"{result['connections']} connections opened with pool_maxsize={args.pool_maxsize}")
+    failures.extend(result["pool_warnings"][:10])
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
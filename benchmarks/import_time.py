@@ -0,0 +1,83 @@
+"""
+Import-time benchmark for the hermes_msgraph package.
+
+Imports the package in fresh interpreters and fails when the median import time
+goes over the budget, when a heavy dependency is loaded at import time, or when
+a submodule other than the facade and the HTTP client it builds is loaded.
+
+    python benchmarks/import_time.py [--runs 10] [--budget-ms 300]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Dependencies that must only be imported when a feature needs them.
+LAZY_MODULES = ("pandas", "tqdm", "jwt", "pyarrow", "httpx", "sqlite3", "asyncio")
+
+# Submodules "import hermes_msgraph" may load: the HermesMSGraph facade and what
+# its constructor needs. Services, stores and the async client load on first use.
+EAGER_SUBMODULES = (
+    "hermes_msgraph",
+    "hermes_msgraph.hermes_msgraph",
+    "hermes_msgraph.http_client",
+    "hermes_msgraph.token_provider",
+    "hermes_msgraph.retry_policy",
+    "hermes_msgraph.exceptions",
+    "hermes_msgraph.models",
+)
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import hermes_msgraph
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "loaded": [m for m in %r if m in sys.modules],
+    "submodules": [m for m in sys.modules if m.startswith("hermes_msgraph.") and m not in %r],
+}))
+""" % (LAZY_MODULES, EAGER_SUBMODULES)
+
+
+def measure(runs):
+    timings = []
+    loaded = set()
+    submodules = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE], check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output)
+        timings.append(result["seconds"] * 1000)
+        loaded.update(result["loaded"])
+        submodules.update(result["submodules"])
+    return timings, sorted(loaded), sorted(submodules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    timings, loaded, submodules = measure(args.runs)
+    median = statistics.median(timings)
+    print(f"import hermes_msgraph: median {median:.1f} ms, min {min(timings):.1f} ms, max {max(timings):.1f} ms")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: heavy dependencies imported eagerly: {', '.join(loaded)}")
+        failed = True
+    if submodules:
+        print(f"FAIL: submodules imported eagerly: {', '.join(submodules)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: median import time over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Decode time and memory of Graph responses as dicts versus hermes_msgraph.models objects.
+
+Pages of messages (and users) generated by benchmarks/fake_graph.py are
+encoded once, then decoded by each mode: json.loads into dicts (the default
+path), orjson into dicts when installed, and both followed by the conversion
+to Message/User objects. Every mode reports the best decode time, the bytes
+still allocated while the decoded objects are held, and the RSS growth of a
+fresh process decoding them.
+
+    python benchmarks/model_decode.py [--messages 100000] [--page-size 1000] [--profile preview] [--repeat 3]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from fake_graph import FakeGraphData
+
+from hermes_msgraph.email_service import EMAIL_PROFILES
+from hermes_msgraph.models import Message, User, orjson
+
+MODES = ["json-dict", "orjson-dict", "json-model", "orjson-model"]
+MODELS = {"messages": Message, "users": User}
+
+
+def _pages(kind, count, page_size, profile):
+    data = FakeGraphData(
+        mailboxes=1,
+        messages_per_mailbox=count if kind == "messages" else 0,
+        users=count if kind == "users" else 0,
+        folders_per_mailbox=4,
+        plans=0,
+        attachment_size=0,
+    )
+    if kind == "messages":
+        items = data.messages[data.mailboxes[0]]
+        select = EMAIL_PROFILES[profile].get("select")
+        if select:
+            items = [{key: value for key, value in item.items() if key in select} for item in items]
+    else:
+        items = data.users
+    return [
+        json.dumps({"value": items[start:start + page_size]}).encode("utf-8")
+        for start in range(0, len(items), page_size)
+    ]
+
+
+def _decoder(mode, model):
+    if mode.startswith("orjson") and orjson is None:
+        return None
+    loads = orjson.loads if mode.startswith("orjson") else json.loads
+    if mode.endswith("dict"):
+        return lambda page: loads(page)["value"]
+    from_graph = model.from_graph
+    return lambda page: [from_graph(item) for item in loads(page)["value"]]
+
+
+def _decode_all(decode, pages):
+    items = []
+    for page in pages:
+        items.extend(decode(page))
+    return items
+
+
+def _rss_bytes():
+    """Resident set size of this process; the peak RSS where /proc is not available."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def measure(mode, kind, pages, repeat):
+    decode = _decoder(mode, MODELS[kind])
+    if decode is None:
+        return None
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        items = _decode_all(decode, pages)
+        seconds.append(time.perf_counter() - started)
+        del items
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        items = _decode_all(decode, pages)
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"items": len(items), "seconds": min(seconds), "retained_bytes": retained}
+
+
+def measure_rss(mode, kind, args):
+    """RSS growth of decoding in a fresh process, so the modes do not share an allocator."""
+    command = [
+        sys.executable, os.path.abspath(__file__), "--rss-worker", mode, "--kind", kind,
+        "--messages", str(args.messages), "--page-size", str(args.page_size), "--profile", args.profile,
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)["rss_bytes"]
+
+
+def rss_worker(args):
+    decode = _decoder(args.rss_worker, MODELS[args.kind])
+    pages = _pages(args.kind, args.messages, args.page_size, args.profile)
+    gc.collect()
+    before = _rss_bytes()
+    items = _decode_all(decode, pages)
+    gc.collect()
+    print(json.dumps({"items": len(items), "rss_bytes": _rss_bytes() - before}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100000, help="Messages, or users, to decode.")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--profile", default="preview", choices=list(EMAIL_PROFILES))
+    parser.add_argument("--kinds", default="messages,users")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--rss-worker", help=argparse.SUPPRESS)
+    parser.add_argument("--kind", default="messages", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.rss_worker:
+        rss_worker(args)
+        return 0
+
+    results = {}
+    for kind in args.kinds.split(","):
+        pages = _pages(kind, args.messages, args.page_size, args.profile)
+        size = sum(len(page) for page in pages)
+        print(f"{kind}: {args.messages} items in {len(pages)} pages, {size / 1024 / 1024:.1f} MiB of JSON")
+        results[kind] = {}
+        for mode in MODES:
+            result = measure(mode, kind, pages, args.repeat)
+            if result is None:
+                print(f"  {mode:<13} skipped, orjson is not installed")
+                continue
+            result["rss_bytes"] = measure_rss(mode, kind, args)
+            results[kind][mode] = result
+            baseline = results[kind]["json-dict"]
+            print(
+                f"  {mode:<13} {result['seconds'] * 1000:9.1f} ms ({baseline['seconds'] / result['seconds']:4.2f}x)  "
+                f"retained {result['retained_bytes'] / 1024 / 1024:8.1f} MiB "
+                f"({result['retained_bytes'] / baseline['retained_bytes']:4.2f}x)  "
+                f"RSS +{result['rss_bytes'] / 1024 / 1024:8.1f} MiB"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Local stand-in for Graph posting change notifications to a NotificationReceiver.
+
+The sender validates the endpoint like Graph does when a subscription is
+created, then many threads post notification batches, some with a wrong
+clientState. The run fails when the validation token is not echoed, a post is
+not acknowledged with 202 within Graph's 3 second limit, a notification is
+lost or delivered twice, or a forged one reaches the callback.
+
+    python benchmarks/notification_receiver.py [--senders 16] [--posts 50] [--batch 10]
+"""
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from hermes_msgraph.notification_receiver import NotificationReceiver
+
+CLIENT_STATE = "local-secret"
+ACK_LIMIT_SECONDS = 3
+
+
+def _notification(index, client_state):
+    return {
+        "subscriptionId": "local-subscription",
+        "clientState": client_state,
+        "changeType": "created",
+        "resource": f"Users/mailbox/Messages/{index}",
+        "resourceData": {"id": str(index), "@odata.type": "#Microsoft.Graph.Message"},
+        "sentAt": time.time(),
+    }
+
+
+def run(senders, posts_per_sender, batch_size):
+    delivered = {}
+    delivered_lock = threading.Lock()
+    latencies = []
+
+    def callback(notification):
+        with delivered_lock:
+            delivered[notification["resource"]] = delivered.get(notification["resource"], 0) + 1
+            latencies.append(time.time() - notification["sentAt"])
+
+    errors = []
+    ack_times = []
+    with NotificationReceiver(port=0, client_state=CLIENT_STATE, callback=callback) as receiver:
+        token = uuid.uuid4().hex
+        response = requests.post(f"{receiver.url}?validationToken={token}", timeout=10)
+        if response.status_code != 200 or response.text != token:
+            errors.append(f"validation answered {response.status_code} {response.text!r}")
+
+        def sender(sender_index):
+            expected = []
+            with requests.Session() as session:
+                for post_index in range(posts_per_sender):
+                    batch = []
+                    for item in range(batch_size):
+                        index = (sender_index * posts_per_sender + post_index) * batch_size + item
+                        forged = item == 0
+                        notification = _notification(index, "forged" if forged else CLIENT_STATE)
+                        batch.append(notification)
+                        if not forged:
+                            expected.append(notification["resource"])
+                    started = time.perf_counter()
+                    response = session.post(receiver.url, data=json.dumps({"value": batch}), timeout=10)
+                    ack_times.append(time.perf_counter() - started)
+                    if response.status_code != 202:
+                        errors.append(f"post answered {response.status_code}")
+            return expected
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=senders) as executor:
+            expected = [resource for resources in executor.map(sender, range(senders)) for resource in resources]
+        receiver.stop()
+        elapsed = time.perf_counter() - started
+        stats = receiver.stats()
+
+    missing = [resource for resource in expected if resource not in delivered]
+    duplicated = [resource for resource, count in delivered.items() if count > 1]
+    expected_set = set(expected)
+    forged = [resource for resource in delivered if resource not in expected_set]
+    errors.extend(f"lost {resource}" for resource in missing[:5])
+    errors.extend(f"delivered twice {resource}" for resource in duplicated[:5])
+    errors.extend(f"forged notification delivered {resource}" for resource in forged[:5])
+    if ack_times and max(ack_times) > ACK_LIMIT_SECONDS:
+        errors.append(f"slowest acknowledgement took {max(ack_times):.2f} s")
+
+    ack_times.sort()
+    latencies.sort()
+    return {
+        "posts": senders * posts_per_sender,
+        "notifications": len(expected),
+        "elapsed_seconds": elapsed,
+        "ack_p50_ms": ack_times[len(ack_times) // 2] * 1000 if ack_times else 0,
+        "ack_max_ms": ack_times[-1] * 1000 if ack_times else 0,
+        "delivery_p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        "stats": stats,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--senders", type=int, default=16)
+    parser.add_argument("--posts", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=10)
+    args = parser.parse_args()
+    # The forged notifications are expected; their warnings would drown the summary.
+    logging.getLogger("hermes_msgraph.notification_receiver").setLevel(logging.ERROR)
+
+    result = run(args.senders, args.posts, max(args.batch, 2))
+    print(
+        f"{result['notifications']} notifications in {result['posts']} posts in {result['elapsed_seconds']:.2f} s; "
+        f"ack p50 {result['ack_p50_ms']:.1f} ms, max {result['ack_max_ms']:.1f} ms; "
+        f"delivery p50 {result['delivery_p50_ms']:.1f} ms; {result['stats']}"
+    )
+    for error in result["errors"][:10]:
+        print(f"FAIL: {error}")
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
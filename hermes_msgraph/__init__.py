@@ -1 +1,45 @@
-from .hermes_msgraph import HermesMSGraph
\ No newline at end of file
+import importlib
+
+from .hermes_msgraph import HermesMSGraph
+
+# The other public names are imported on first access, so "import hermes_msgraph"
+# does not load the async client, the stores and their sqlite3/asyncio imports.
+_LAZY_EXPORTS = {
+    "AsyncHermesMSGraph": ".async_hermes_msgraph",
+    "RetryPolicy": ".retry_policy",
+    "FileStateStore": ".state_store",
+    "MemoryStateStore": ".state_store",
+    "SQLiteStateStore": ".state_store",
+    "StateStore": ".state_store",
+    "MemoryResponseCache": ".response_cache",
+    "ResponseCache": ".response_cache",
+    "SQLiteResponseCache": ".response_cache",
+    "MetricsCollector": ".instrumentation",
+    "RequestHooks": ".instrumentation",
+    "SQLiteUserStore": ".user_store",
+    "SQLiteMailIndex": ".mail_index",
+    "NotificationReceiver": ".notification_receiver",
+    "SubscriptionRenewer": ".subscriptions",
+    "SubscriptionService": ".subscriptions",
+    "Attachment": ".models",
+    "MailFolder": ".models",
+    "Message": ".models",
+    "PlannerTask": ".models",
+    "Recipient": ".models",
+    "User": ".models",
+}
+
+__all__ = ["HermesMSGraph", *_LAZY_EXPORTS]
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
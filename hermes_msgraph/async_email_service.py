@@ -0,0 +1,458 @@
+import asyncio
+import base64
+import logging
+import os
+from .async_http_client import AsyncHttpClient
+from .async_mailbox_folder_service import AsyncMailboxFolderService
+from .exceptions import HermesMSGraphError
+from .email_service import (
+    ATTACHMENT_CHUNK_SIZE,
+    INLINE_ATTACHMENTS_MAX_SIZE,
+    _append_query,
+    _attachments_size,
+    _build_send_email_payload,
+    _email_projection,
+    _emails_by_mailbox_dataframe,
+    _is_dataframe_format,
+    _save_messages_json,
+    _send_error,
+    _validate_email_parameters,
+)
+from .message_query import plan_message_query
+from .models import Message
+
+logger = logging.getLogger(__name__)
+
+
+async def _write_chunks(response, file, chunk_size):
+    written = 0
+    async for chunk in response.aiter_bytes(chunk_size):
+        file.write(chunk)
+        written += len(chunk)
+    return written
+
+
+class AsyncEmailService:
+    """asyncio counterpart of EmailService."""
+
+    def __init__(self, http_client: AsyncHttpClient, folder_service=None):
+        self.http = http_client
+        self.HermesMSGraphError = HermesMSGraphError
+        self.MailboxFolderService = folder_service or AsyncMailboxFolderService(http_client)
+
+    async def send_email(self, sender_mail, subject, body, to_address, cc_address=None, attachments=None, delay=0, body_type="Text", max_upload_workers=4):
+        """
+        Sends an email with optional attachments.
+
+        Attachments adding up to less than 3 MB are sent inline with sendMail. Larger
+        ones are attached to a draft, files of 3 MB or more through upload sessions
+        streamed from disk, and the draft is sent once every upload finished.
+
+        Args:
+            sender_mail (str): The email address of the sender.
+            subject (str): The subject of the email.
+            body (str): The body content of the email.
+            to_address (str): The recipient's email address.
+            cc_address (str or list, optional): The CC recipient's email address. Defaults to None.
+            attachments (str or list, optional): List of file paths to be attached. Defaults to None.
+            max_upload_workers (int, optional): Attachments uploaded at once for large emails. Defaults to 4.
+        """
+        if attachments and isinstance(attachments, str):
+            attachments = [attachments]
+
+        if attachments and _attachments_size(attachments) >= INLINE_ATTACHMENTS_MAX_SIZE:
+            return await self.__send_email_with_uploads(
+                sender_mail, subject, body, to_address, cc_address, attachments, delay, body_type, max_upload_workers
+            )
+
+        url = f"https://graph.microsoft.com/v1.0/users/{sender_mail}/sendMail"
+        payload = _build_send_email_payload(
+            subject, body, to_address, cc_address=cc_address, attachments=attachments, delay=delay, body_type=body_type
+        )
+
+        response = await self.http.post(url, payload=payload)
+
+        if response.status_code == 200 or response.status_code == 202:
+            return response
+        else:
+            raise _send_error("Error sending email", response)
+
+    async def __send_email_with_uploads(
+        self, sender_mail, subject, body, to_address, cc_address, attachments, delay, body_type, max_upload_workers
+    ):
+        messages_url = f"https://graph.microsoft.com/v1.0/users/{sender_mail}/messages"
+        payload = _build_send_email_payload(
+            subject, body, to_address, cc_address=cc_address, delay=delay, body_type=body_type
+        )
+
+        response = await self.http.post(messages_url, payload=payload["message"])
+        if response.status_code != 201:
+            raise _send_error("Error creating draft", response)
+        draft_url = f"{messages_url}/{response.json()['id']}"
+
+        try:
+            uploads = asyncio.Semaphore(max_upload_workers)
+
+            async def add_attachment(file_path):
+                async with uploads:
+                    await self.__add_draft_attachment(draft_url, file_path)
+
+            await asyncio.gather(*(add_attachment(path) for path in attachments))
+
+            response = await self.http.post(f"{draft_url}/send", payload=None)
+            if response.status_code not in (200, 202):
+                raise _send_error("Error sending email", response)
+        except Exception:
+            # A failed cleanup must not hide why the email was not sent.
+            try:
+                await self.http.delete(draft_url)
+            except Exception as cleanup_error:
+                logger.warning(f"Could not delete draft {draft_url}: {cleanup_error}")
+            raise
+
+        return response
+
+    async def __add_draft_attachment(self, draft_url, file_path):
+        file_name = os.path.basename(file_path)
+        size = os.path.getsize(file_path)
+
+        if size < INLINE_ATTACHMENTS_MAX_SIZE:
+            with open(file_path, "rb") as file:
+                content_bytes = base64.b64encode(file.read()).decode("utf-8")
+            response = await self.http.post(f"{draft_url}/attachments", payload={
+                "@odata.type": "#microsoft.graph.fileAttachment",
+                "name": file_name,
+                "contentBytes": content_bytes,
+            })
+            if response.status_code != 201:
+                raise self.HermesMSGraphError(
+                    f"Error attaching {file_path}: {response.status_code} - {response.text}",
+                    error_code=response.status_code,
+                )
+            return
+
+        response = await self.http.post(f"{draft_url}/attachments/createUploadSession", payload={
+            "AttachmentItem": {"attachmentType": "file", "name": file_name, "size": size}
+        })
+        if response.status_code != 201:
+            raise self.HermesMSGraphError(
+                f"Error creating upload session for {file_path}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+        await self.http.upload_file(response.json()["uploadUrl"], file_path)
+
+    async def list_email_attachments(self, mailbox_address, email_id):
+        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}/attachments"
+        return await self.http.get_json_response_by_url(url, get_value=True)
+
+    async def get_emails(
+            self,
+            mailbox_address,
+            subject=None,
+            folder=None,
+            sender=None,
+            n_of_messages=10,
+            has_attachments= "",
+            messages_json_path=None,
+            greater_than_date=None,
+            less_than_date=None,
+            internet_message_id=None,
+            format=list,
+            data="all", # profile name (headers, preview, text, full) or list of fields
+            expand_attachments=False,
+        ):
+
+            # format=Message returns compact Message objects instead of dicts.
+            as_models = format is Message
+            as_dataframe = not as_models and _is_dataframe_format(format)
+            url, plan = await self.__build_messages_url(
+                mailbox_address=mailbox_address,
+                subject=subject,
+                folder=folder,
+                sender=sender,
+                n_of_messages=n_of_messages,
+                has_attachments=has_attachments,
+                greater_than_date=greater_than_date,
+                less_than_date=less_than_date,
+                internet_message_id=internet_message_id,
+                messages_json_path=messages_json_path,
+            )
+            query, headers = _email_projection(data, expand_attachments, plan.local_fields)
+            emails = self.http.iter_items(_append_query(url, query), headers=headers, max_items=plan.server_max_items)
+            if plan.local_predicates:
+                emails = plan.apply_async(emails)
+            json_emails = [Message.from_graph(email) if as_models else email async for email in emails]
+
+            if messages_json_path:
+                _save_messages_json(
+                    [email.to_graph() for email in json_emails] if as_models else json_emails, messages_json_path
+                )
+
+            if as_dataframe:
+                import pandas as pd
+
+                return pd.json_normalize(json_emails)
+            return json_emails
+
+    async def iter_emails(
+        self,
+        mailbox_address,
+        subject=None,
+        folder=None,
+        sender=None,
+        n_of_messages="all",
+        has_attachments="",
+        greater_than_date=None,
+        less_than_date=None,
+        internet_message_id=None,
+        prefetch=True,
+        data="all",
+        expand_attachments=False,
+    ):
+        """
+        Yields the emails matching the filters, page by page, in constant memory.
+
+        Accepts the same filters and projection (data, expand_attachments) as
+        get_emails. The next page is fetched in a background task while the
+        current one is consumed unless prefetch is False.
+        """
+        url, plan = await self.__build_messages_url(
+            mailbox_address=mailbox_address,
+            subject=subject,
+            folder=folder,
+            sender=sender,
+            n_of_messages=n_of_messages,
+            has_attachments=has_attachments,
+            greater_than_date=greater_than_date,
+            less_than_date=less_than_date,
+            internet_message_id=internet_message_id,
+        )
+        query, headers = _email_projection(data, expand_attachments, plan.local_fields)
+        emails = self.http.iter_items(
+            _append_query(url, query), headers=headers, max_items=plan.server_max_items, prefetch=prefetch
+        )
+        if plan.local_predicates:
+            emails = plan.apply_async(emails)
+        async for email in emails:
+            yield email
+
+    async def __build_messages_url(
+        self,
+        mailbox_address,
+        subject,
+        folder,
+        sender,
+        n_of_messages,
+        has_attachments,
+        greater_than_date,
+        less_than_date,
+        internet_message_id,
+        messages_json_path=None,
+    ):
+        _validate_email_parameters(
+            mailbox_address=mailbox_address,
+            subject=subject,
+            folder=folder,
+            sender=sender,
+            n_of_messages=n_of_messages,
+            has_attachments=has_attachments,
+            messages_json_path=messages_json_path,
+            greater_than_date=greater_than_date,
+            less_than_date=less_than_date,
+            internet_message_id=internet_message_id
+        )
+
+        if folder:
+            folder_id = await self.MailboxFolderService.get_folder_id(mailbox_address, folder)
+            folder_path = f"/mailFolders/{folder_id}"
+        else:
+            folder_path = ""
+
+        plan = plan_message_query(
+            subject, sender, n_of_messages, has_attachments, greater_than_date, less_than_date, internet_message_id
+        )
+        return f"https://graph.microsoft.com/v1.0/users/{mailbox_address}{folder_path}/messages?{plan.query()}", plan
+
+    async def iter_emails_many(self, mailboxes, **filters):
+        """
+        Runs the same get_emails query on several mailboxes concurrently.
+
+        Concurrency is bounded by the client's max_concurrency. Results are yielded
+        as each mailbox completes; a failing mailbox yields its exception instead.
+        format may be list (the default) or Message.
+
+        Yields:
+            tuple: (mailbox_address, emails, error), with emails None when error is set.
+        """
+        if filters.get("format", list) not in (list, Message):
+            raise self.HermesMSGraphError(
+                f"Unsupported format {filters['format']!r}: use list or Message, or get_emails_many for a DataFrame."
+            )
+        if filters.get("messages_json_path"):
+            raise self.HermesMSGraphError("messages_json_path is not supported when reading several mailboxes.")
+
+        async def read_mailbox(mailbox_address):
+            try:
+                return mailbox_address, await self.get_emails(mailbox_address, **filters), None
+            except Exception as e:
+                return mailbox_address, None, e
+
+        tasks = [asyncio.ensure_future(read_mailbox(mailbox_address)) for mailbox_address in mailboxes]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_emails_many(self, mailboxes, format=list, **filters):
+        """
+        Reads the same get_emails query from several mailboxes concurrently.
+
+        Returns:
+            dict: ``messages`` (dict of lists by mailbox, or a DataFrame with a "mailbox"
+                column when format is pd.DataFrame) and ``errors`` (dict of exceptions by mailbox).
+                format=Message returns lists of Message objects.
+        """
+        as_dataframe = format is not Message and _is_dataframe_format(format)
+        if format is Message:
+            filters["format"] = Message
+
+        messages = {}
+        errors = {}
+        async for mailbox_address, emails, error in self.iter_emails_many(mailboxes, **filters):
+            if error is not None:
+                errors[mailbox_address] = error
+            else:
+                messages[mailbox_address] = emails
+
+        if as_dataframe:
+            messages = _emails_by_mailbox_dataframe(messages)
+
+        return {"messages": messages, "errors": errors}
+
+    async def get_emails_by_ids(self, email_ids, mailbox_address, data="all", expand_attachments=False, format=list):
+        """
+        Retrieves several emails by their IDs using batched requests.
+
+        Args:
+            email_ids (list): The IDs of the emails to retrieve.
+            mailbox_address (str): The email address of the mailbox.
+            data (str or list, optional): Projection profile or list of fields. Defaults to "all".
+            expand_attachments (bool, optional): Include the attachments metadata. Defaults to False.
+            format (type, optional): list for dicts, or Message for Message objects. Defaults to list.
+
+        Returns:
+            list: The emails in the same order as email_ids, None for emails not found.
+        """
+        query, headers = _email_projection(data, expand_attachments)
+        urls = [
+            _append_query(f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}", query)
+            for email_id in email_ids
+        ]
+        emails = await self.http.batch_get(urls, headers=headers)
+        if format is Message:
+            return [Message.from_graph(email) if email is not None else None for email in emails]
+        return emails
+
+    async def get_email_by_id(self, email_id, mailbox_address, data="all", expand_attachments=False):
+        query, headers = _email_projection(data, expand_attachments)
+        url = _append_query(f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}", query)
+        return await self.http.get_json_response_by_url(url, get_value=False, headers=headers)
+
+    async def list_sharepoint_sites(self):
+        url = "https://graph.microsoft.com/v1.0/sites?$select=siteCollection,webUrl&$filter=siteCollection/root%20ne%20null"
+        return await self.http.get_json_response_by_url(url, get_value=True)
+
+    async def download_attachment(
+        self, mailbox_address, email_id, attachment_id, file_name
+    ):
+        """Downloads an attachment to file_name, streaming it from the $value endpoint."""
+        await self.download_attachment_stream(mailbox_address, email_id, attachment_id, file_name)
+
+    async def download_attachment_stream(
+        self,
+        mailbox_address,
+        email_id,
+        attachment_id,
+        destination,
+        chunk_size=ATTACHMENT_CHUNK_SIZE,
+        resume=True,
+    ):
+        """
+        Streams the raw content of an attachment to disk or to a binary file object.
+
+        Works as EmailService.download_attachment_stream: chunks of chunk_size
+        bytes from /attachments/{id}/$value, written to "<destination>.part" and
+        renamed once complete, with resume=True continuing a partial download.
+
+        Returns:
+            int: The number of bytes written by this call.
+        """
+        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}/attachments/{attachment_id}/$value"
+
+        if hasattr(destination, "write"):
+            response = await self.http.get(url, stream=True)
+            try:
+                await self.__raise_for_download_status(response, url)
+                return await _write_chunks(response, destination, chunk_size)
+            finally:
+                await response.aclose()
+
+        directory = os.path.dirname(destination)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        part_path = f"{destination}.part"
+        offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+        response = await self.http.get(url, headers=headers, stream=True)
+        try:
+            if offset and response.status_code == 416:
+                # The partial file already holds the whole attachment.
+                os.replace(part_path, destination)
+                return 0
+            await self.__raise_for_download_status(response, url)
+            mode = "ab" if offset and response.status_code == 206 else "wb"
+            with open(part_path, mode) as file:
+                written = await _write_chunks(response, file, chunk_size)
+        finally:
+            await response.aclose()
+
+        os.replace(part_path, destination)
+        return written
+
+    async def __raise_for_download_status(self, response, url):
+        if response.status_code not in (200, 206):
+            await response.aread()
+            raise self.HermesMSGraphError(
+                f"Error downloading attachment from {url}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+
+    async def foward_email_by_id(self, email_id, mailbox_address, to_address, comment=None):
+        """
+        Forwards an email by its ID to a specified recipient.
+
+        Args:
+            email_id (str): The ID of the email to forward.
+            mailbox_address (str): The email address of the mailbox.
+            to_address (str): The recipient's email address.
+            comment (str, optional): A comment to include with the forwarded email. Defaults to None.
+        """
+        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}/forward"
+
+        payload = {
+            "toRecipients": [
+                {
+                    "emailAddress": {
+                        "address": to_address
+                    }
+                }
+            ]
+        }
+
+        if comment:
+            payload["comment"] = comment
+
+        await self.http.post(url, payload=payload)
@@ -0,0 +1,140 @@
+from .async_http_client import AsyncHttpClient, DEFAULT_MAX_CONCURRENCY
+from .http_client import DEFAULT_TIMEOUT, GRAPH_BASE_URL
+from .token_provider import DEFAULT_AUTHORITY
+from .async_email_service import AsyncEmailService
+from .async_mailbox_folder_service import AsyncMailboxFolderService
+from .async_planner_service import AsyncPlannerService
+from .async_users_service import AsyncUsersService
+from typing import Literal
+
+class AsyncHermesMSGraph:
+    """
+    asyncio counterpart of HermesMSGraph.
+
+    All methods are coroutines. Use it as an async context manager, or call
+    ``aclose`` when done, to release the underlying connections:
+
+        async with AsyncHermesMSGraph(client_id, client_secret, tenant_id, max_concurrency=100) as graph:
+            results = await asyncio.gather(*(graph.get_emails(mailbox) for mailbox in mailboxes))
+    """
+
+    def __init__(self, client_id, client_secret, tenant_id, max_concurrency=DEFAULT_MAX_CONCURRENCY, token_cache_path=None, retry_policy=None, folder_cache=None, base_url=GRAPH_BASE_URL, authority=DEFAULT_AUTHORITY, timeout=DEFAULT_TIMEOUT):
+        self.http_client = AsyncHttpClient(
+            client_id,
+            client_secret,
+            tenant_id,
+            max_concurrency=max_concurrency,
+            token_cache_path=token_cache_path,
+            retry_policy=retry_policy,
+            base_url=base_url,
+            authority=authority,
+            timeout=timeout,
+        )
+        self.folder_service = AsyncMailboxFolderService(self.http_client, folder_cache=folder_cache)
+        self.email_service = AsyncEmailService(self.http_client, folder_service=self.folder_service)
+        self.planner_service = AsyncPlannerService(self.http_client)
+        self.users_service = AsyncUsersService(self.http_client)
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.tenant_id = tenant_id
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.http_client.aclose()
+
+    # AsyncEmailService methods
+    async def send_email(self, sender_mail, subject, body, to_address, cc_address=None, attachments=None, delay=0, body_type: Literal["Text", "html"]="Text"):
+        return await self.email_service.send_email(sender_mail, subject, body, to_address, cc_address, attachments=attachments, delay=delay, body_type=body_type)
+
+    async def get_emails(self, mailbox_address, **kwargs):
+        return await self.email_service.get_emails(mailbox_address, **kwargs)
+
+    def iter_emails(self, mailbox_address, **kwargs):
+        return self.email_service.iter_emails(mailbox_address, **kwargs)
+
+    async def get_emails_many(self, mailboxes, **kwargs):
+        return await self.email_service.get_emails_many(mailboxes, **kwargs)
+
+    def iter_emails_many(self, mailboxes, **kwargs):
+        return self.email_service.iter_emails_many(mailboxes, **kwargs)
+
+    async def forward_email_by_id(self, email_id, mailbox_address, to_address, comment=None):
+        return await self.email_service.foward_email_by_id(email_id, mailbox_address, to_address, comment)
+
+    async def list_email_attachments(self, email_id, mailbox_address):
+        return await self.email_service.list_email_attachments(email_id, mailbox_address)
+
+    async def download_attachment(self, mailbox_address, email_id, attachment_id, file_name):
+        return await self.email_service.download_attachment(mailbox_address, email_id, attachment_id, file_name)
+
+    async def get_emails_by_ids(self, email_ids, mailbox_address, data="all", expand_attachments=False, format=list):
+        return await self.email_service.get_emails_by_ids(
+            email_ids, mailbox_address, data=data, expand_attachments=expand_attachments, format=format
+        )
+
+    async def get_email_by_id(self, email_id, mailbox_address, data="all", expand_attachments=False):
+        return await self.email_service.get_email_by_id(
+            email_id, mailbox_address, data=data, expand_attachments=expand_attachments
+        )
+
+    # AsyncMailboxFolderService methods
+    async def list_mailbox_folders(self, mailbox_address):
+        return await self.folder_service.list_mailbox_folders(mailbox_address)
+
+    async def get_mailbox_folders(self, mailbox_address):
+        return await self.folder_service.get_mailbox_folders(mailbox_address)
+
+    async def validate_folder_id(self, mailbox_address, folder_id):
+        return await self.folder_service.validate_folder_id(mailbox_address, folder_id)
+
+    async def get_folder_id(self, mailbox_address, folder_name):
+        return await self.folder_service.get_folder_id(mailbox_address, folder_name)
+
+    def invalidate_folder_cache(self, mailbox_address=None):
+        return self.folder_service.invalidate_folder_cache(mailbox_address)
+
+    # AsyncPlannerService methods
+    async def list_plans_by_group_id(self, group_id, data="all"):
+        return await self.planner_service.list_plans_by_group_id(group_id, data)
+
+    async def list_visible_plans_by_user_id(self, user_id):
+        return await self.planner_service.list_visible_plans_by_user_id(user_id)
+
+    async def list_tasks_by_user_id(self, user_id):
+        return await self.planner_service.list_tasks_by_user_id(user_id)
+
+    async def get_plans_by_ids(self, plan_ids):
+        return await self.planner_service.get_plans_by_ids(plan_ids)
+
+    async def get_task_details_by_ids(self, task_ids):
+        return await self.planner_service.get_task_details_by_ids(task_ids)
+
+    # AsyncUsersService methods
+    async def get_user_id_by_email(self, email_address):
+        return await self.users_service.get_user_id_by_email(email_address)
+
+    async def get_users_by_ids(self, user_ids, select=None):
+        return await self.users_service.get_users_by_ids(user_ids, select)
+
+    async def get_all_users(self, data='all'):
+        return await self.users_service.get_all_users(data)
+
+    async def search_from_mailboxes(self, query):
+        return await self.users_service.search_from_mailboxes(query)
+
+    async def get_tenant_licenses(self):
+        return await self.users_service.get_tenant_licenses()
+
+    async def list_sharepoint_sites(self):
+        return await self.email_service.list_sharepoint_sites()
+
+    def get_retry_stats(self):
+        return self.http_client.retry_stats.snapshot()
+
+    async def batch(self, requests_list, max_retries=3):
+        return await self.http_client.batch(requests_list, max_retries=max_retries)
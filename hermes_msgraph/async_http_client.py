@@ -0,0 +1,354 @@
+import asyncio
+import json
+import os
+
+from .exceptions import HermesMSGraphError
+from .models import json_loads
+from .http_client import (
+    DEFAULT_TIMEOUT,
+    GRAPH_BASE_URL,
+    UPLOAD_CHUNK_SIZE,
+    _batch_bodies,
+    _batch_get_requests,
+    _build_batch_requests,
+    _next_expected_offset,
+    _parse_batch_responses,
+    _plan_batch_retry,
+    _rebase_url,
+    _split_batch_chunks,
+)
+from .retry_policy import RetryPolicy, RetryStats, parse_retry_after
+from .token_provider import DEFAULT_AUTHORITY, TokenProvider
+
+DEFAULT_MAX_CONCURRENCY = 50
+
+
+def _import_httpx():
+    try:
+        import httpx
+    except ImportError as e:
+        raise HermesMSGraphError(
+            "AsyncHttpClient requires httpx. Install it with: pip install hermes_msgraph[async]"
+        ) from e
+    return httpx
+
+
+def _httpx_timeout(httpx, timeout):
+    """httpx.Timeout of a timeout given like HttpClient's: seconds or (connect, read) seconds."""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class AsyncHttpClient:
+    """
+    asyncio counterpart of HttpClient built on httpx.AsyncClient.
+
+    At most max_concurrency requests are in flight at the same time; extra
+    requests wait for a free slot instead of opening more connections.
+    base_url, authority and timeout work as in HttpClient.
+    """
+
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        tenant_id,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        token_provider=None,
+        token_cache_path=None,
+        retry_policy=None,
+        base_url=GRAPH_BASE_URL,
+        authority=DEFAULT_AUTHORITY,
+        timeout=DEFAULT_TIMEOUT,
+    ):
+        httpx = _import_httpx()
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.tenant_id = tenant_id
+        self.max_concurrency = max_concurrency
+        self.base_url = base_url.rstrip("/")
+        self.session = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            timeout=_httpx_timeout(httpx, timeout),
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.token_provider = token_provider or TokenProvider(
+            client_id, client_secret, tenant_id, cache_path=token_cache_path, authority=authority
+        )
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats = RetryStats()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.session.aclose()
+
+    async def __get_access_token(self):
+        access_token = self.token_provider.peek_token()
+        if access_token:
+            return access_token
+        # Token requests are rare; run the blocking refresh off the event loop.
+        return await asyncio.to_thread(self.token_provider.get_token)
+
+    async def __headers(self, headers=None):
+        access_token = await self.__get_access_token()
+        headers_raw = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+        }
+        if headers:
+            headers_raw.update(headers)
+        return headers_raw
+
+    async def __request(self, method, url, headers=None, data=None, retry_policy=None, stream=False):
+        """
+        Sends a request, refreshing the token once on 401 and retrying
+        throttled or transient failures according to the retry policy.
+        The concurrency slot is released while backing off. With stream=True
+        the body is not read; the caller reads it with aiter_bytes and closes
+        the response with aclose.
+        """
+        httpx = _import_httpx()
+        policy = retry_policy or self.retry_policy
+        attempt = 0
+        backoff_spent = 0.0
+        token_refreshed = False
+
+        while True:
+            async with self.semaphore:
+                request_headers = await self.__headers(headers)
+                try:
+                    request = self.session.build_request(method, url, headers=request_headers, content=data)
+                    response = await self.session.send(request, stream=stream)
+                except httpx.TransportError as e:
+                    response = None
+                    error = e
+
+            if response is None:
+                delay = policy.backoff(attempt + 1)
+                if not policy.should_retry_error(method) or not policy.allows(attempt + 1, backoff_spent, delay):
+                    self.retry_stats.record_exhausted()
+                    raise HermesMSGraphError(f"Error sending {method} request to {url}: {error}") from error
+                reason = type(error).__name__
+            else:
+                if response.status_code == 401 and not token_refreshed:
+                    token_refreshed = True
+                    expired_token = request_headers["Authorization"][len("Bearer "):]
+                    await asyncio.to_thread(self.token_provider.invalidate, expired_token)
+                    await response.aclose()
+                    continue
+
+                if not policy.should_retry_status(method, response.status_code):
+                    return response
+
+                delay = policy.backoff(attempt + 1, parse_retry_after(response.headers.get("Retry-After")))
+                if not policy.allows(attempt + 1, backoff_spent, delay):
+                    self.retry_stats.record_exhausted()
+                    return response
+                reason = response.status_code
+                await response.aclose()
+
+            attempt += 1
+            backoff_spent += delay
+            self.retry_stats.record_retry(reason, delay)
+            await asyncio.sleep(delay)
+
+    async def request(self, method, url, payload=None, headers=None, retry_policy=None, stream=False):
+        data = json.dumps(payload) if payload is not None else None
+        url = _rebase_url(url, self.base_url)
+        return await self.__request(
+            method.upper(), url, headers=headers, data=data, retry_policy=retry_policy, stream=stream
+        )
+
+    async def get(self, url, headers=None, retry_policy=None, stream=False):
+        return await self.request("GET", url, headers=headers, retry_policy=retry_policy, stream=stream)
+
+    async def post(self, url, payload, headers=None, retry_policy=None):
+        return await self.request("POST", url, payload=payload, headers=headers, retry_policy=retry_policy)
+
+    async def patch(self, url, payload, headers=None, retry_policy=None):
+        return await self.request("PATCH", url, payload=payload, headers=headers, retry_policy=retry_policy)
+
+    async def delete(self, url, headers=None, retry_policy=None):
+        return await self.request("DELETE", url, headers=headers, retry_policy=retry_policy)
+
+    async def upload_file(self, upload_url, file_path, chunk_size=UPLOAD_CHUNK_SIZE, retry_policy=None):
+        """
+        Uploads a file to an upload session in ranged chunks, like HttpClient.upload_file.
+
+        A failed chunk is retried from the next range the session expects. The
+        upload URL is pre-authenticated, no Authorization header is sent.
+
+        Returns:
+            httpx.Response: The response to the last chunk.
+        """
+        httpx = _import_httpx()
+        policy = retry_policy or self.retry_policy
+        size = os.path.getsize(file_path)
+        offset = 0
+        attempt = 0
+        backoff_spent = 0.0
+
+        with open(file_path, "rb") as file:
+            while True:
+                file.seek(offset)
+                chunk = file.read(chunk_size)
+                headers = {
+                    "Content-Length": str(len(chunk)),
+                    "Content-Range": f"bytes {offset}-{offset + len(chunk) - 1}/{size}",
+                }
+                try:
+                    async with self.semaphore:
+                        response = await self.session.put(upload_url, headers=headers, content=chunk)
+                except httpx.TransportError as e:
+                    retry_after = None
+                    reason = type(e).__name__
+                    error = f"{reason}: {e}"
+                else:
+                    if response.status_code in (200, 201):
+                        return response
+                    if response.status_code == 202:
+                        offset = _next_expected_offset(response.json(), offset + len(chunk))
+                        attempt = 0
+                        continue
+                    error = f"{response.status_code} - {response.text}"
+                    if not policy.should_retry_status("PUT", response.status_code):
+                        raise HermesMSGraphError(
+                            f"Error uploading {file_path}: {error}", error_code=response.status_code
+                        )
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    reason = response.status_code
+
+                delay = policy.backoff(attempt + 1, retry_after)
+                if not policy.allows(attempt + 1, backoff_spent, delay):
+                    self.retry_stats.record_exhausted()
+                    raise HermesMSGraphError(f"Error uploading {file_path}: {error}")
+                attempt += 1
+                backoff_spent += delay
+                self.retry_stats.record_retry(reason, delay)
+                await asyncio.sleep(delay)
+                offset = await self.__upload_session_offset(upload_url, offset)
+
+    async def __upload_session_offset(self, upload_url, offset):
+        """Next byte the upload session expects, or offset when the session cannot be queried."""
+        httpx = _import_httpx()
+        try:
+            async with self.semaphore:
+                response = await self.session.get(upload_url)
+        except httpx.TransportError:
+            return offset
+        if response.status_code != 200:
+            return offset
+        return _next_expected_offset(response.json(), offset)
+
+    async def get_json_response_by_url(self, url, get_value=True, headers=None):
+        """
+        Fetches a URL and returns its JSON.
+
+        With get_value=True, returns the items of every page, following
+        @odata.nextLink; otherwise returns the JSON of the single response.
+        """
+        if get_value:
+            return [item async for item in self.iter_items(url, headers=headers)]
+        return await self.__fetch_page(url, headers)
+
+    async def iter_pages(self, url, headers=None, prefetch=False):
+        """
+        Yields the JSON of each page of a collection, following @odata.nextLink.
+
+        With prefetch=True the next page is requested in a background task
+        while the caller processes the current one.
+        """
+        if not prefetch:
+            while url:
+                page = await self.__fetch_page(url, headers)
+                yield page
+                url = page.get("@odata.nextLink")
+            return
+
+        task = asyncio.ensure_future(self.__fetch_page(url, headers))
+        try:
+            while task is not None:
+                page = await task
+                next_url = page.get("@odata.nextLink")
+                task = asyncio.ensure_future(self.__fetch_page(next_url, headers)) if next_url else None
+                yield page
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def iter_items(self, url, headers=None, max_items=None, prefetch=False):
+        """Yields the items of a collection page by page, stopping after max_items."""
+        if max_items is not None and max_items <= 0:
+            return
+        count = 0
+        pages = self.iter_pages(url, headers=headers, prefetch=prefetch)
+        try:
+            async for page in pages:
+                for item in page.get("value", []):
+                    yield item
+                    count += 1
+                    if max_items is not None and count >= max_items:
+                        return
+        finally:
+            await pages.aclose()
+
+    async def __fetch_page(self, url, headers=None):
+        response = await self.get(url, headers=headers)
+
+        if response.status_code != 200:
+            raise HermesMSGraphError(
+                f"Error fetching data from {url}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+        try:
+            return json_loads(response.content)
+        except ValueError as e:
+            raise HermesMSGraphError(f"Invalid JSON response from {url}") from e
+
+    async def batch(self, requests_list, max_retries=3):
+        """
+        Sends several Graph requests through the JSON $batch endpoint.
+
+        Same contract as HttpClient.batch, but the batches of 20 sub-requests
+        are sent concurrently.
+        """
+        sub_requests = _build_batch_requests(requests_list, self.base_url)
+        responses = {}
+
+        async def send_chunk(chunk):
+            pending = chunk
+            attempt = 0
+            while pending:
+                response = await self.post(f"{self.base_url}/$batch", payload={"requests": pending})
+                chunk_responses = _parse_batch_responses(response, pending)
+                responses.update(chunk_responses)
+
+                if attempt >= max_retries:
+                    break
+                attempt += 1
+                delay, pending = _plan_batch_retry(chunk, pending, chunk_responses, attempt)
+                if pending:
+                    self.retry_stats.record_retry("batch", delay)
+                    await asyncio.sleep(delay)
+
+        await asyncio.gather(*(send_chunk(chunk) for chunk in _split_batch_chunks(sub_requests)))
+        return [responses[request["id"]] for request in sub_requests]
+
+    async def batch_get(self, urls, headers=None):
+        """
+        Fetches several resources with GET requests packed through $batch.
+
+        Returns the JSON body of each resource in input order, or None when not found.
+        """
+        responses = await self.batch(_batch_get_requests(urls, headers))
+        return _batch_bodies(urls, responses)
@@ -0,0 +1,113 @@
+import time
+from typing import List, Dict
+from .async_http_client import AsyncHttpClient
+from .exceptions import HermesMSGraphError
+from .folder_cache import FolderCache, FolderIndex
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class AsyncMailboxFolderService:
+    """asyncio counterpart of MailboxFolderService."""
+
+    def __init__(self, http_client: AsyncHttpClient, folder_cache: Optional[FolderCache] = None):
+        self.http = http_client
+        self.folder_cache = folder_cache or FolderCache()
+
+    async def get_mailbox_folders(self, mailbox_address: str) -> "pd.DataFrame":
+        """
+        Retrieve all mailbox folders for a given mailbox address and return as a DataFrame.
+        :param mailbox_address: The email address of the mailbox.
+        :return: DataFrame containing mailbox folders.
+        """
+        import pandas as pd
+
+        mail_folders = await self.list_mailbox_folders(mailbox_address)
+        df_mail_folders = pd.DataFrame(mail_folders)
+        return df_mail_folders if not df_mail_folders.empty else pd.DataFrame()
+
+    async def list_mailbox_folders(self, mailbox_address: str) -> List[Dict]:
+        """
+        List all mailbox folders for a given mailbox address.
+        :param mailbox_address: The email address of the mailbox.
+        :return: List of mailbox folders.
+        """
+        index = await self.get_folder_index(mailbox_address)
+        return index.folders()
+
+    async def validate_folder_id(self, mailbox_address: str, folder_id: str) -> bool:
+        """
+        Validate if a folder ID exists in the mailbox.
+        :param mailbox_address: The email address of the mailbox.
+        :param folder_id: The ID of the folder to validate.
+        :return: True if the folder ID exists, False otherwise.
+        """
+        index = await self.get_folder_index(mailbox_address)
+        return folder_id in index.by_id
+
+    async def get_folder_id(self, mailbox_address: str, folder_name: str) -> Optional[str]:
+        """
+        Retrieve the folder ID for a given folder name.
+        :param mailbox_address: The email address of the mailbox.
+        :param folder_name: The name of the folder, or its path for nested folders (e.g. "Inbox/Clients").
+        :return: The folder ID if found, None otherwise.
+        """
+        if not folder_name:
+            return None
+        index = await self.get_folder_index(mailbox_address)
+        return index.get_id(folder_name)
+
+    async def get_folder_index(self, mailbox_address: str, refresh: bool = False) -> FolderIndex:
+        """
+        Retrieve the cached folder index of a mailbox, see MailboxFolderService.get_folder_index.
+        :param mailbox_address: The email address of the mailbox.
+        :param refresh: Refresh the index even if it is not stale.
+        :return: The folder index of the mailbox.
+        """
+        index = self.folder_cache.get(mailbox_address)
+        if index is None:
+            index = await self.__scan_folders(mailbox_address)
+        elif refresh or self.folder_cache.is_stale(index):
+            index = await self.__refresh_folders(mailbox_address, index)
+        else:
+            return index
+
+        self.folder_cache.put(mailbox_address, index)
+        return index
+
+    def invalidate_folder_cache(self, mailbox_address: Optional[str] = None) -> None:
+        """
+        Drop the cached folders of a mailbox, or of every mailbox.
+        :param mailbox_address: The email address of the mailbox, None for all mailboxes.
+        """
+        self.folder_cache.invalidate(mailbox_address)
+
+    async def __scan_folders(self, mailbox_address: str) -> FolderIndex:
+        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/mailfolders/delta?$select=displayName,parentFolderId"
+        index = FolderIndex()
+        await self.__apply_delta(index, url)
+        return index
+
+    async def __refresh_folders(self, mailbox_address: str, index: FolderIndex) -> FolderIndex:
+        if not index.delta_link:
+            return await self.__scan_folders(mailbox_address)
+        try:
+            await self.__apply_delta(index, index.delta_link)
+        except HermesMSGraphError as e:
+            if e.error_code != 410:
+                raise
+            return await self.__scan_folders(mailbox_address)
+        return index
+
+    async def __apply_delta(self, index: FolderIndex, url: str) -> None:
+        changes = []
+        delta_link = None
+        async for page in self.http.iter_pages(url):
+            changes.extend(page.get("value", []))
+            delta_link = page.get("@odata.deltaLink", delta_link)
+
+        index.apply(changes)
+        index.delta_link = delta_link
+        index.fetched_at = time.monotonic()
@@ -0,0 +1,67 @@
+from typing import List, Dict, Union
+import logging
+from .async_http_client import AsyncHttpClient
+from .planner_service import _process_plans
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPlannerService:
+    """asyncio counterpart of PlannerService."""
+
+    def __init__(self, http_client: AsyncHttpClient):
+        self.http = http_client
+
+    async def _fetch_data(self, url: str) -> List[Dict]:
+        """Helper method to fetch every page of a collection with error handling."""
+        return [item async for item in self.http.iter_items(url)]
+
+    async def list_plans_by_group_id(self, group_id: str, data: str = "all") -> Union[List[Dict], List[Dict[str, str]]]:
+        """
+        List plans by group ID.
+        :param group_id: The ID of the group.
+        :param data: "all" to return raw data, or "processed" to return simplified data.
+        :return: List of plans.
+        """
+        url = f"https://graph.microsoft.com/v1.0/groups/{group_id}/planner/plans"
+        plans = await self._fetch_data(url)
+        return plans if data == "all" else _process_plans(plans)
+
+    async def list_visible_plans_by_user_id(self, user_id: str) -> List[Dict[str, str]]:
+        """
+        List visible plans by user ID.
+        :param user_id: The ID of the user.
+        :return: List of processed plans.
+        """
+        url = f"https://graph.microsoft.com/v1.0/users/{user_id}/planner/plans"
+        plans = await self._fetch_data(url)
+        return _process_plans(plans)
+
+    async def list_tasks_by_user_id(self, user_id: str) -> List[Dict]:
+        """
+        List tasks assigned to a user by their user ID.
+        :param user_id: The ID of the user.
+        :return: List of tasks.
+        """
+        url = f"https://graph.microsoft.com/v1.0/users/{user_id}/planner/tasks"
+        tasks = await self._fetch_data(url)
+        logger.debug(f"Fetched tasks for user {user_id}: {tasks}")
+        return tasks
+
+    async def get_plans_by_ids(self, plan_ids: List[str]) -> List[Dict]:
+        """
+        Retrieve several plans by their IDs using batched requests.
+        :param plan_ids: The IDs of the plans.
+        :return: List of plans in the same order as plan_ids, None for plans not found.
+        """
+        urls = [f"https://graph.microsoft.com/v1.0/planner/plans/{plan_id}" for plan_id in plan_ids]
+        return await self.http.batch_get(urls)
+
+    async def get_task_details_by_ids(self, task_ids: List[str]) -> List[Dict]:
+        """
+        Retrieve the details of several tasks using batched requests.
+        :param task_ids: The IDs of the tasks.
+        :return: List of task details in the same order as task_ids, None for tasks not found.
+        """
+        urls = [f"https://graph.microsoft.com/v1.0/planner/tasks/{task_id}/details" for task_id in task_ids]
+        return await self.http.batch_get(urls)
@@ -0,0 +1,87 @@
+from .exceptions import HermesMSGraphError
+from .users_service import _add_friendly_license_names, _filter_user_data
+
+
+class AsyncUsersService:
+    """asyncio counterpart of UsersService."""
+
+    def __init__(self, http):
+        self.http = http
+
+    async def get_user_id_by_email(self, email_address: str) -> str:
+        """
+        Retrieve the user ID for a given email address.
+        :param email_address: The email address of the user.
+        :return: The user ID if found, None otherwise.
+        :raises HermesMSGraphError: If the request fails or the user is not found.
+        """
+        url = f"https://graph.microsoft.com/v1.0/users/{email_address}"
+
+        response = await self.http.get(url)
+
+        if response.status_code == 200:
+            user_data = response.json()
+            return user_data.get("id")
+        else:
+            error_message = f"Error fetching user ID: {response.status_code} - {response.text}"
+            raise HermesMSGraphError(error_message)
+
+    async def get_users_by_ids(self, user_ids: list, select: str = None) -> list:
+        """
+        Retrieve several users by ID or user principal name using batched requests.
+        :param user_ids: The IDs or user principal names of the users.
+        :param select: Optional comma separated list of properties to return.
+        :return: The users in the same order as user_ids, None for users not found.
+        :raises HermesMSGraphError: If any request fails with a status other than 404.
+        """
+        query = f"?$select={select}" if select else ""
+        urls = [f"https://graph.microsoft.com/v1.0/users/{user_id}{query}" for user_id in user_ids]
+        return await self.http.batch_get(urls)
+
+    async def get_tenant_licenses(self):
+        response = await self.http.get('https://graph.microsoft.com/v1.0/subscribedSkus')
+        if response.status_code == 200:
+            skus = response.json().get("value", [])
+            return _add_friendly_license_names(skus)
+        else:
+            error_message = f"Error fetching SKUs: {response.status_code} - {response.text}"
+            raise HermesMSGraphError(error_message)
+
+    async def get_all_users(self, data='all') -> list:
+        """
+        Retrieve all users' email addresses.
+        :return: A list of email addresses.
+        :raises HermesMSGraphError: If the request fails.
+        """
+        url = "https://graph.microsoft.com/v1.0/users?$top=999&$filter=userType eq 'Member'&$select=id,displayName,mail,officeLocation,userPrincipalName,accountEnabled,assignedLicenses,assignedPlans"
+        users = [user async for user in self.http.iter_items(url)]
+
+        match data:
+            case 'simple':
+                return _filter_user_data(users)
+            case 'all':
+                return users
+            case _:
+                raise ValueError(f"Invalid data type: {data}")
+
+    async def search_from_mailboxes(self, query: str) -> list:
+        """
+        Search for users by email address or display name using $search.
+        Args:
+            query (str): Search term (e.g., part of an email or name).
+        Returns:
+            list: List of matching users.
+        """
+        url = f"https://graph.microsoft.com/v1.0/users?$search=\"displayName:{query}\""
+
+        headers = {
+            "ConsistencyLevel": "eventual"
+        }
+
+        response = await self.http.get(url, headers=headers)
+
+        if response.status_code == 200:
+            return response.json().get("value", [])
+        else:
+            error_message = f"Error searching users by email: {response.status_code} - {response.text}"
+            raise HermesMSGraphError(error_message)
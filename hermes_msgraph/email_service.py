@@ -1,21 +1,360 @@
-import pandas as pd
-from http_client import HttpClient
-from exceptions import HermesMSGraphError
-from mailbox_folder_service import MailboxFolderService
+from .http_client import BATCH_MAX_REQUESTS, HttpClient
+from .exceptions import HermesMSGraphError
+from .mailbox_folder_service import MailboxFolderService
+from .state_store import MemoryStateStore
+from .mail_export import EMAIL_SELECT, ParquetMailWriter
+from .message_query import plan_message_query
+from .models import Message, json_loads
+from .retry_policy import parse_retry_after
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+import itertools
 import os
+import json
 import base64
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENT_CHUNK_SIZE = 1024 * 1024
+# Graph rejects requests over 4 MB; base64 grows attachments by a third.
+INLINE_ATTACHMENTS_MAX_SIZE = 3 * 1024 * 1024
+
+BULK_ACTIONS = ("move", "copy", "mark_read", "mark_unread", "set_categories", "delete")
+# Exchange Online runs at most 4 concurrent requests per mailbox, and counts
+# each $batch sub-request as one request.
+BULK_MAX_CONCURRENCY = 4
+# get_emails filters that narrow the selection; n_of_messages only limits it.
+BULK_SELECTIVE_FILTERS = (
+    "subject", "folder", "sender", "has_attachments", "greater_than_date", "less_than_date", "internet_message_id"
+)
+
+
+def _build_send_email_payload(subject, body, to_address, cc_address=None, attachments=None, delay=0, body_type="Text"):
+    """Builds the sendMail payload, reading and encoding the attachments."""
+    if attachments and isinstance(attachments, str):
+        attachments = [attachments]
+
+    if cc_address and isinstance(cc_address, str):
+        cc_address = [cc_address]
+
+    if isinstance(to_address, str):
+        to_address = to_address.split(";")
+
+    payload = {
+        "message": {
+            "subject": subject,
+            "body": {"contentType": body_type, "content": body},
+            "toRecipients": [{"emailAddress": {"address": email}} for email in to_address],
+        },
+        "saveToSentItems": "true",
+    }
+    # Add CC recipients if provided
+    if cc_address:
+        payload["message"]["ccRecipients"] = [
+            {"emailAddress": {"address": email}} for email in cc_address
+        ]
+
+    # Add attachments if provided
+    if attachments:
+        payload["message"]["attachments"] = []
+        for file_path in attachments:
+            try:
+                # Check if file exists
+                if not os.path.exists(file_path):
+                    raise HermesMSGraphError(f"File to attachment not found: {file_path}")
+
+                # Get file name from path
+                file_name = os.path.basename(file_path)
+
+                # Read and encode file content
+                with open(file_path, 'rb') as file:
+                    content_bytes = base64.b64encode(file.read()).decode('utf-8')
+
+                payload["message"]["attachments"].append({
+                    "@odata.type": "#microsoft.graph.fileAttachment",
+                    "name": file_name,
+                    "contentBytes": content_bytes
+                })
+            except Exception as e:
+                raise HermesMSGraphError(f"Error processing attachment {file_path}: {str(e)}")
+
+
+    if delay > 0:
+        delayed_time = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        payload["message"]["singleValueExtendedProperties"] = [
+            {
+                "id": "SystemTime 0x3FEF",
+                "value": delayed_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+            }
+        ]
+
+    return payload
+
+
+def _send_error(message, response):
+    """The HermesMSGraphError of a refused send, with the Retry-After of a throttled one."""
+    retry_after = None
+    if response.status_code in (429, 503):
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+    return HermesMSGraphError(
+        f"{message}: {response.status_code} - {response.text}",
+        error_code=response.status_code,
+        retry_after=retry_after,
+    )
+
+
+def _attachments_size(attachments):
+    """Total size in bytes of the attachment files."""
+    total = 0
+    for file_path in attachments:
+        if not os.path.exists(file_path):
+            raise HermesMSGraphError(f"File to attachment not found: {file_path}")
+        total += os.path.getsize(file_path)
+    return total
+
+
+# Message properties returned by the "headers" projection profile.
+_HEADER_FIELDS = [
+    "id",
+    "subject",
+    "from",
+    "sender",
+    "toRecipients",
+    "ccRecipients",
+    "sentDateTime",
+    "receivedDateTime",
+    "isRead",
+    "hasAttachments",
+    "importance",
+    "internetMessageId",
+    "conversationId",
+    "parentFolderId",
+]
+
+# Projection profiles accepted by the data argument of get_emails and friends.
+EMAIL_PROFILES = {
+    "headers": {"select": _HEADER_FIELDS},
+    "preview": {"select": _HEADER_FIELDS + ["bodyPreview"]},
+    "text": {"select": _HEADER_FIELDS + ["bodyPreview", "body"], "body_type": "text"},
+    "full": {},
+}
+_EMAIL_PROFILE_ALIASES = {"all": "full", "simple": "preview"}
+
+ATTACHMENT_METADATA_SELECT = "id,name,contentType,size,isInline"
+
+
+def _email_projection(data="all", expand_attachments=False, required_fields=()):
+    """
+    Translates a projection profile into query parameters and request headers.
+
+    Args:
+        data (str or list): A profile name ("headers", "preview", "text", "full",
+            or the legacy "simple" and "all"), or a list of message properties.
+        expand_attachments (bool): Also return the metadata of the attachments.
+        required_fields (list): Properties added to the selected ones, e.g. those
+            a query plan checks locally.
+
+    Returns:
+        tuple: The query string (without leading "?") and the headers dict, or None.
+    """
+    if isinstance(data, (list, tuple)):
+        profile = {"select": list(data)}
+    else:
+        profile = EMAIL_PROFILES.get(_EMAIL_PROFILE_ALIASES.get(data, data))
+        if profile is None:
+            raise HermesMSGraphError(
+                f"Invalid data. Must be a list of fields or one of: {', '.join(EMAIL_PROFILES)}."
+            )
+
+    query_params = []
+    if profile.get("select"):
+        select = profile["select"] + [field for field in required_fields if field not in profile["select"]]
+        query_params.append(f"$select={','.join(select)}")
+    if expand_attachments:
+        query_params.append(f"$expand=attachments($select={ATTACHMENT_METADATA_SELECT})")
+
+    headers = None
+    if profile.get("body_type"):
+        headers = {"Prefer": f'outlook.body-content-type="{profile["body_type"]}"'}
+
+    return "&".join(query_params), headers
+
+
+def _append_query(url, query):
+    """Adds query parameters to a URL that may already have some."""
+    if not query:
+        return url
+    if url.endswith(("?", "&")):
+        return f"{url}{query}"
+    return f"{url}{'&' if '?' in url else '?'}{query}"
+
+
+def _is_dataframe_format(format):
+    """
+    Validates a format argument, True for pd.DataFrame and False for list.
+
+    pandas is only imported when format is not list, so callers asking for
+    lists never pay for the import.
+    """
+    if format is list:
+        return False
+    import pandas as pd
+
+    if format is pd.DataFrame:
+        return True
+    raise HermesMSGraphError("Invalid format. Must be 'dataframe' or 'list'")
+
+
+def _emails_by_mailbox_dataframe(messages):
+    """Single DataFrame with a "mailbox" column from a dict of email lists by mailbox."""
+    import pandas as pd
+
+    frames = []
+    for mailbox_address, emails in messages.items():
+        df_emails = pd.json_normalize(emails)
+        df_emails.insert(0, "mailbox", mailbox_address)
+        frames.append(df_emails)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _validate_email_parameters(
+    mailbox_address,
+    subject=None,
+    folder=None,
+    sender=None,
+    n_of_messages=None,
+    has_attachments= "",
+    messages_json_path=None,
+    greater_than_date=None,
+    less_than_date=None,
+    internet_message_id=None
+):
+    if not isinstance(mailbox_address, str) or not mailbox_address:
+        raise HermesMSGraphError("Invalid mailbox_address. Must be a non-empty string.")
+
+    if subject is not None and not isinstance(subject, str):
+        raise HermesMSGraphError("Invalid subject. Must be a string.")
+
+    if folder is not None and not isinstance(folder, str):
+        raise HermesMSGraphError("Invalid folder. Must be a string.")
+
+    if sender is not None and not isinstance(sender, str):
+        raise HermesMSGraphError("Invalid sender. Must be a string.")
+
+    if n_of_messages != "all" and (not isinstance(n_of_messages, int) or n_of_messages <= 0):
+        raise HermesMSGraphError("Invalid n_of_messages. Must be a positive integer or 'all'.")
+
+    if has_attachments not in ["", True, False]:
+        raise HermesMSGraphError("Invalid has_attachments. Must be True, False, or an empty string.")
+
+    if messages_json_path is not None and not isinstance(messages_json_path, str):
+        raise HermesMSGraphError("Invalid messages_json_path. Must be a string.")
+
+    if greater_than_date is not None and not isinstance(greater_than_date, str):
+        raise HermesMSGraphError("Invalid greater_than_date. Must be a string in ISO format.")
+
+    if less_than_date is not None and not isinstance(less_than_date, str):
+        raise HermesMSGraphError("Invalid less_than_date. Must be a string in ISO format.")
+
+
+def _save_messages_json(data_json, messages_json_path):
+    try:
+        with open(messages_json_path, "w+", encoding="utf-8") as file:
+            json.dump(data_json, file, ensure_ascii=False, indent=4)
+    except Exception as e:
+        raise HermesMSGraphError(
+            "Unable to save messages to messages.json file"
+        ) from e
+
+
+
+def _write_chunks(response, file, chunk_size):
+    written = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if chunk:
+            file.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def _unique_path(directory, name, used_paths):
+    """Path for name in directory that is neither on disk nor already used in this run."""
+    name = os.path.basename(name.replace("\\", "/")) or "attachment"
+    stem, extension = os.path.splitext(name)
+    path = os.path.join(directory, name)
+    counter = 1
+    while path in used_paths or os.path.exists(path):
+        path = os.path.join(directory, f"{stem} ({counter}){extension}")
+        counter += 1
+    used_paths.add(path)
+    return path
+
+
+
+def _server_time(response):
+    """Time of a response from its Date header, or the local UTC time when it has none."""
+    date = response.headers.get("Date")
+    if date:
+        try:
+            return parsedate_to_datetime(date).astimezone(timezone.utc)
+        except (TypeError, ValueError):
+            logger.debug(f"Invalid Date header {date!r}, using the local clock")
+    return datetime.now(timezone.utc)
+
+
+def _is_expired_delta_token(error):
+    """Graph answers 410 Gone (syncStateNotFound/resyncRequired) when a delta token can no longer be used."""
+    message = str(error)
+    return error.error_code == 410 or "syncStateNotFound" in message or "resyncRequired" in message
+
+
+
+def _bulk_request(action, message_url, destination_id=None, categories=None):
+    """$batch sub-request applying a bulk action to one message."""
+    if action in ("move", "copy"):
+        return {"method": "POST", "url": f"{message_url}/{action}", "body": {"destinationId": destination_id}}
+    if action in ("mark_read", "mark_unread"):
+        return {"method": "PATCH", "url": message_url, "body": {"isRead": action == "mark_read"}}
+    if action == "set_categories":
+        return {"method": "PATCH", "url": message_url, "body": {"categories": list(categories)}}
+    if action == "delete":
+        return {"method": "DELETE", "url": message_url}
+    raise HermesMSGraphError(f"Invalid action {action}. Must be one of: {', '.join(BULK_ACTIONS)}.")
+
+
+def _bulk_result(email_id, action, response):
+    result = {"id": email_id, "status": "succeeded", "status_code": response["status"], "new_id": None, "error": None}
+    if 200 <= response["status"] < 300:
+        if action in ("move", "copy"):
+            # Moved and copied messages get a new id.
+            result["new_id"] = (response["body"] or {}).get("id")
+    else:
+        result["status"] = "failed"
+        body = response["body"] if isinstance(response["body"], dict) else {}
+        error = body.get("error") or {}
+        result["error"] = error.get("message") or error.get("code") or f"Status {response['status']}"
+    return result
 
 
 class EmailService:
-    def __init__(self, http_client: HttpClient):
+    def __init__(self, http_client: HttpClient, state_store=None, folder_service=None, mail_index=None):
         self.http = http_client
         self.HermesMSGraphError = HermesMSGraphError
-        self.MailboxFolderService = MailboxFolderService(http_client)
+        self.MailboxFolderService = folder_service or MailboxFolderService(http_client)
+        self.state_store = state_store or MemoryStateStore()
+        self.mail_index = mail_index
 
-    def send_email(self, sender_mail, subject, body, to_address, cc_address=None, attachments=None, delay=0, body_type="Text"):
+    def send_email(self, sender_mail, subject, body, to_address, cc_address=None, attachments=None, delay=0, body_type="Text", max_upload_workers=4, retry_policy=None):
         """
         Sends an email with optional attachments.
-        
+
+        Attachments adding up to less than 3 MB are sent inline with sendMail. Larger
+        ones are attached to a draft, files of 3 MB or more through upload sessions
+        streamed from disk, and the draft is sent once every upload finished.
+
         Args:
             sender_mail (str): The email address of the sender.
             subject (str): The subject of the email.
@@ -23,115 +362,98 @@ class EmailService:
             to_address (str): The recipient's email address.
             cc_address (str or list, optional): The CC recipient's email address. Defaults to None.
             attachments (str or list, optional): List of file paths to be attached. Defaults to None.
-        """
+            max_upload_workers (int, optional): Attachments uploaded in parallel for large emails. Defaults to 4.
+            retry_policy (RetryPolicy, optional): Overrides the client retry policy of the
+                sendMail, draft and send requests; attachment uploads keep the client policy.
 
+        Raises:
+            HermesMSGraphError: When Graph refuses the email; its retry_after is set
+                when the refusal was throttling with a Retry-After.
+        """
         if attachments and isinstance(attachments, str):
             attachments = [attachments]
 
-        if cc_address and isinstance(cc_address, str):
-            cc_address = [cc_address]
-
-        if isinstance(to_address, str):
-            to_address = to_address.split(";")
+        if attachments and _attachments_size(attachments) >= INLINE_ATTACHMENTS_MAX_SIZE:
+            return self.__send_email_with_uploads(
+                sender_mail, subject, body, to_address, cc_address, attachments, delay, body_type, max_upload_workers,
+                retry_policy,
+            )
 
         url = f"https://graph.microsoft.com/v1.0/users/{sender_mail}/sendMail"
+        payload = _build_send_email_payload(
+            subject, body, to_address, cc_address=cc_address, attachments=attachments, delay=delay, body_type=body_type
+        )
 
-        payload = {
-            "message": {
-                "subject": subject,
-                "body": {"contentType": body_type, "content": body},
-                "toRecipients": [{"emailAddress": {"address": email}} for email in to_address],
-            },
-            "saveToSentItems": "true",
-        }
-        # Add CC recipients if provided
-        if cc_address:
-            payload["message"]["ccRecipients"] = [
-                {"emailAddress": {"address": email}} for email in cc_address
-            ]
+        response = self.http.post(url, payload=payload, retry_policy=retry_policy)
 
-        # Add attachments if provided
-        if attachments:
-            payload["message"]["attachments"] = []
-            for file_path in attachments:
-                try:
-                    # Check if file exists
-                    if not os.path.exists(file_path):
-                        raise self.HermesMSGraphError(f"File to attachment not found: {file_path}")
-                    
-                    # Get file name from path
-                    file_name = os.path.basename(file_path)
-                    
-                    # Read and encode file content
-                    with open(file_path, 'rb') as file:
-                        content_bytes = base64.b64encode(file.read()).decode('utf-8')
-                    
-                    payload["message"]["attachments"].append({
-                        "@odata.type": "#microsoft.graph.fileAttachment",
-                        "name": file_name,
-                        "contentBytes": content_bytes
-                    })
-                except Exception as e:
-                    raise self.HermesMSGraphError(f"Error processing attachment {file_path}: {str(e)}")
+        if response.status_code == 200 or response.status_code == 202:
+            logger.info(f"Email sent from {sender_mail}: {subject}")
+            return response
+        else:
+            raise _send_error("Error sending email", response)
 
+    def __send_email_with_uploads(
+        self, sender_mail, subject, body, to_address, cc_address, attachments, delay, body_type, max_upload_workers,
+        retry_policy,
+    ):
+        messages_url = f"https://graph.microsoft.com/v1.0/users/{sender_mail}/messages"
+        payload = _build_send_email_payload(
+            subject, body, to_address, cc_address=cc_address, delay=delay, body_type=body_type
+        )
 
-        if delay > 0:
-            now = pd.Timestamp.now(tz='UTC')
-            delayed_time = now + pd.Timedelta(seconds=delay)
-            payload["message"]["singleValueExtendedProperties"] = [
-                {
-                    "id": "SystemTime 0x3FEF",
-                    "value": delayed_time.strftime("%Y-%m-%dT%H:%M:%SZ")
-                }
-            ]
+        response = self.http.post(messages_url, payload=payload["message"], retry_policy=retry_policy)
+        if response.status_code != 201:
+            raise _send_error("Error creating draft", response)
+        draft_url = f"{messages_url}/{response.json()['id']}"
 
-        response = self.http.post(url, payload=payload)
+        try:
+            with ThreadPoolExecutor(max_workers=max_upload_workers, thread_name_prefix="hermes-upload") as executor:
+                futures = [executor.submit(self.__add_draft_attachment, draft_url, path) for path in attachments]
+                for future in as_completed(futures):
+                    future.result()
 
-        if response.status_code == 200 or response.status_code == 202:
-            print("Email sent successfully!")
-            return response
-        elif response.status_code == 429:
-            return response
-        else:
-            raise self.HermesMSGraphError(f"Error sending email: {response.status_code} - {response.text}")
-        
-    
-    def __url_filter_subject(self, subject):
-        """
-        Builds a filter for the subject in Microsoft Graph API query parameters.
+            response = self.http.post(f"{draft_url}/send", payload=None, retry_policy=retry_policy)
+            if response.status_code not in (200, 202):
+                raise _send_error("Error sending email", response)
+        except Exception:
+            # A failed cleanup must not hide why the email was not sent.
+            try:
+                self.http.delete(draft_url)
+            except Exception as cleanup_error:
+                logger.warning(f"Could not delete draft {draft_url}: {cleanup_error}")
+            raise
 
-        Args:
-            subject (str): The subject string to filter, supports wildcards '*' at the beginning or end.
+        logger.info(f"Email sent from {sender_mail}: {subject}")
+        return response
 
-        Returns:
-            str: The formatted filter string for the subject or an empty string if subject is None or empty.
-        """
-        if subject:
-            # Case: starts and ends with asterisk -> "contains"
-            if subject.startswith("*") and subject.endswith("*"):
-                subject = subject.strip("*")
-                subject_filter_url = f"contains(subject, '{subject}')"
-
-            # Case: starts with asterisk -> "ends with"
-            elif subject.startswith("*"):
-                subject = subject.strip("*")
-                subject_filter_url = f"endswith(subject, '{subject}')"
-
-            # Case: ends with asterisk -> "starts with"
-            elif subject.endswith("*"):
-                raise self.HermesMSGraphError("Microsoft Graph API does not support endswith filter for subject")
-                subject = subject.strip("*")
-                subject_filter_url = f"startswith(subject, '{subject}')"
-
-            # Case: exact match
-            else:
-                subject_filter_url = f"subject eq '{subject}'"
+    def __add_draft_attachment(self, draft_url, file_path):
+        file_name = os.path.basename(file_path)
+        size = os.path.getsize(file_path)
 
-            return subject_filter_url
+        if size < INLINE_ATTACHMENTS_MAX_SIZE:
+            with open(file_path, "rb") as file:
+                content_bytes = base64.b64encode(file.read()).decode("utf-8")
+            response = self.http.post(f"{draft_url}/attachments", payload={
+                "@odata.type": "#microsoft.graph.fileAttachment",
+                "name": file_name,
+                "contentBytes": content_bytes,
+            })
+            if response.status_code != 201:
+                raise self.HermesMSGraphError(
+                    f"Error attaching {file_path}: {response.status_code} - {response.text}",
+                    error_code=response.status_code,
+                )
+            return
 
-        # Default return for invalid or empty subject
-        return ""
-        
+        response = self.http.post(f"{draft_url}/attachments/createUploadSession", payload={
+            "AttachmentItem": {"attachmentType": "file", "name": file_name, "size": size}
+        })
+        if response.status_code != 201:
+            raise self.HermesMSGraphError(
+                f"Error creating upload session for {file_path}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+        self.http.upload_file(response.json()["uploadUrl"], file_path)
 
     def list_email_attachments(self, mailbox_address, email_id):
         url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}/attachments"
@@ -152,13 +474,12 @@ class EmailService:
             less_than_date=None,
             internet_message_id=None,
             format=list,
-            data="all", #simple or all
+            data="all", # profile name (headers, preview, text, full) or list of fields
+            expand_attachments=False,
         ):
-            
-            valid_formats = [list, pd.DataFrame]
-            
-            if format not in valid_formats:
-                raise self.HermesMSGraphError("Invalid format. Must be 'dataframe' or 'list'")
+            # format=Message returns compact Message objects instead of dicts.
+            as_models = format is Message
+            as_dataframe = not as_models and _is_dataframe_format(format)
 
             json_emails = self.__read_emails(
                 mailbox_address=mailbox_address,
@@ -171,18 +492,230 @@ class EmailService:
                 greater_than_date=greater_than_date,
                 less_than_date=less_than_date,
                 internet_message_id=internet_message_id,
+                data=data,
+                expand_attachments=expand_attachments,
+                model=Message if as_models else None,
             )
 
-            return  pd.json_normalize(json_emails) if format == pd.DataFrame else json_emails
+            if as_dataframe:
+                import pandas as pd
+
+                return pd.json_normalize(json_emails)
+            return json_emails
 
-    def get_email_by_id(self, email_id, mailbox_address):
-        email_json = self.__read_email_by_id(email_id, mailbox_address)
-        #print(email_json)
-        email_df = pd.json_normalize(email_json)
+    def iter_emails_many(self, mailboxes, max_workers=8, **filters):
+        """
+        Runs the same get_emails query on several mailboxes through a bounded worker pool.
+
+        Results are yielded as each mailbox completes. A failing mailbox does not
+        stop the others: its exception is yielded instead of its emails.
+
+        Args:
+            mailboxes (list): The email addresses of the mailboxes.
+            max_workers (int, optional): Maximum number of mailboxes queried at once. Defaults to 8.
+            **filters: Filters accepted by get_emails (subject, folder, sender, n_of_messages, ...),
+                with format list (the default) or Message.
+
+        Yields:
+            tuple: (mailbox_address, emails, error), with emails None when error is set.
+        """
+        if filters.get("format", list) not in (list, Message):
+            raise self.HermesMSGraphError(
+                f"Unsupported format {filters['format']!r}: use list or Message, or get_emails_many for a DataFrame."
+            )
+        if filters.get("messages_json_path"):
+            raise self.HermesMSGraphError("messages_json_path is not supported when reading several mailboxes.")
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hermes-mailbox")
+        try:
+            futures = {
+                executor.submit(self.get_emails, mailbox_address, **filters): mailbox_address
+                for mailbox_address in mailboxes
+            }
+            for future in as_completed(futures):
+                mailbox_address = futures[future]
+                try:
+                    yield mailbox_address, future.result(), None
+                except Exception as e:
+                    yield mailbox_address, None, e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_emails_many(self, mailboxes, max_workers=8, format=list, **filters):
+        """
+        Reads the same get_emails query from several mailboxes concurrently.
+
+        Args:
+            mailboxes (list): The email addresses of the mailboxes.
+            max_workers (int, optional): Maximum number of mailboxes queried at once. Defaults to 8.
+            format (type, optional): list for a dict of lists per mailbox, Message for lists of
+                Message objects, or pd.DataFrame for a single DataFrame with a "mailbox" column.
+                Defaults to list.
+            **filters: Filters accepted by get_emails.
+
+        Returns:
+            dict: ``messages`` (dict of lists by mailbox, or a DataFrame) and ``errors``
+                (dict of exceptions by mailbox).
+        """
+        as_dataframe = format is not Message and _is_dataframe_format(format)
+        if format is Message:
+            filters["format"] = Message
+
+        messages = {}
+        errors = {}
+        for mailbox_address, emails, error in self.iter_emails_many(mailboxes, max_workers=max_workers, **filters):
+            if error is not None:
+                errors[mailbox_address] = error
+            else:
+                messages[mailbox_address] = emails
+
+        if as_dataframe:
+            messages = _emails_by_mailbox_dataframe(messages)
+
+        return {"messages": messages, "errors": errors}
+
+    def get_emails_by_ids(self, email_ids, mailbox_address, data="all", expand_attachments=False, format=list):
+        """
+        Retrieves several emails by their IDs using batched requests.
+
+        Args:
+            email_ids (list): The IDs of the emails to retrieve.
+            mailbox_address (str): The email address of the mailbox.
+            data (str or list, optional): Projection profile or list of fields. Defaults to "all".
+            expand_attachments (bool, optional): Include the attachments metadata. Defaults to False.
+            format (type, optional): list for dicts, or Message for Message objects. Defaults to list.
+
+        Returns:
+            list: The emails in the same order as email_ids, None for emails not found.
+        """
+        query, headers = _email_projection(data, expand_attachments)
+        urls = [
+            _append_query(f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}", query)
+            for email_id in email_ids
+        ]
+        emails = self.http.batch_get(urls, headers=headers)
+        if format is Message:
+            return [Message.from_graph(email) if email is not None else None for email in emails]
+        return emails
+
+    def get_email_by_id(self, email_id, mailbox_address, data="all", expand_attachments=False):
+        email_json = self.__read_email_by_id(email_id, mailbox_address, data, expand_attachments)
         return email_json
 
 
-    def __read_emails(
+    def __read_email_by_id(self, email_id, mailbox_address, data="all", expand_attachments=False):
+        query, headers = _email_projection(data, expand_attachments)
+        url = _append_query(f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}", query)
+        return self.http.get_json_response_by_url(url, get_value=False, headers=headers)
+
+    def iter_emails(
+        self,
+        mailbox_address,
+        subject=None,
+        folder=None,
+        sender=None,
+        n_of_messages="all",
+        has_attachments="",
+        greater_than_date=None,
+        less_than_date=None,
+        internet_message_id=None,
+        prefetch=True,
+        data="all",
+        expand_attachments=False,
+        model=None,
+    ):
+        """
+        Yields the emails matching the filters, page by page, in constant memory.
+
+        Accepts the same filters and projection (data, expand_attachments) as
+        get_emails. The next page is fetched in the background while the current
+        one is consumed unless prefetch is False. Subject and sender accept *
+        wildcards anywhere ("?" is not a wildcard); what Graph cannot filter on
+        is checked on each page (see message_query).
+
+        Args:
+            model (type, optional): Message to yield Message objects. Defaults to dicts.
+
+        Returns:
+            generator: The emails as dicts, or model objects.
+        """
+        url, plan = self.__build_messages_url(
+            mailbox_address=mailbox_address,
+            subject=subject,
+            folder=folder,
+            sender=sender,
+            n_of_messages=n_of_messages,
+            has_attachments=has_attachments,
+            greater_than_date=greater_than_date,
+            less_than_date=less_than_date,
+            internet_message_id=internet_message_id,
+        )
+        query, headers = _email_projection(data, expand_attachments, plan.local_fields)
+        emails = self.http.iter_items(
+            _append_query(url, query), headers=headers, max_items=plan.server_max_items, prefetch=prefetch
+        )
+        emails = plan.apply(emails)
+        return map(model.from_graph, emails) if model else emails
+
+    def export_emails(
+        self,
+        mailbox_address,
+        directory,
+        subject=None,
+        folder=None,
+        sender=None,
+        n_of_messages="all",
+        has_attachments="",
+        greater_than_date=None,
+        less_than_date=None,
+        internet_message_id=None,
+        batch_size=10000,
+        rows_per_file=1000000,
+        compression="zstd",
+    ):
+        """
+        Exports the emails matching the filters to Parquet files, in bounded memory.
+
+        Pages are streamed from the API and written as typed Arrow record batches
+        (timestamps for the dates, booleans for isRead) with the columns of
+        get_emails(format=pd.DataFrame). The files are written to directory as
+        part-00000.parquet, part-00001.parquet, ... and can be read back with
+        pd.read_parquet(directory). Requires pyarrow.
+
+        Args:
+            mailbox_address (str): The email address of the mailbox.
+            directory (str): Directory where the Parquet files are written.
+            batch_size (int, optional): Emails per record batch. Defaults to 10000.
+            rows_per_file (int, optional): Emails per Parquet file. Defaults to 1000000.
+            compression (str, optional): Parquet compression codec. Defaults to "zstd".
+            Other arguments are the filters of get_emails.
+
+        Returns:
+            dict: ``rows`` exported and the list of ``files`` written.
+        """
+        url, plan = self.__build_messages_url(
+            mailbox_address=mailbox_address,
+            subject=subject,
+            folder=folder,
+            sender=sender,
+            n_of_messages=n_of_messages,
+            has_attachments=has_attachments,
+            greater_than_date=greater_than_date,
+            less_than_date=less_than_date,
+            internet_message_id=internet_message_id,
+        )
+        select = EMAIL_SELECT.split(",")
+        select += [field for field in plan.local_fields if field not in select]
+        url = _append_query(url, f"$select={','.join(select)}")
+
+        with ParquetMailWriter(directory, batch_size=batch_size, rows_per_file=rows_per_file, compression=compression) as writer:
+            for email in plan.apply(self.http.iter_items(url, max_items=plan.server_max_items, prefetch=True)):
+                writer.write(email)
+
+        logger.info(f"Exported {writer.rows} emails from {mailbox_address} to {directory}")
+        return {"rows": writer.rows, "files": writer.files}
+
+    def __build_messages_url(
         self,
         mailbox_address,
         subject,
@@ -190,13 +723,12 @@ class EmailService:
         sender,
         n_of_messages,
         has_attachments,
-        messages_json_path,
         greater_than_date,
         less_than_date,
-        internet_message_id
+        internet_message_id,
+        messages_json_path=None,
     ):
-        
-        self.__validate_parameters(
+        _validate_email_parameters(
             mailbox_address=mailbox_address,
             subject=subject,
             folder=folder,
@@ -209,85 +741,566 @@ class EmailService:
             internet_message_id=internet_message_id
         )
 
-
         if folder:
             folder_id = self.MailboxFolderService.get_folder_id(mailbox_address, folder)
             folder_path = f"/mailFolders/{folder_id}" 
         else:
             folder_path = ""
 
-
-        filter_suffix = self.__build_email_query_params(
+        plan = plan_message_query(
             subject, sender, n_of_messages, has_attachments, greater_than_date, less_than_date, internet_message_id
         )
-        
-        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}{folder_path}/messages?{filter_suffix}"
+        logger.debug(f"Messages query plan for {mailbox_address}: {plan.describe()}")
 
-        data_json = self.http.get_json_response_by_url(url, get_value=True)
+        return f"https://graph.microsoft.com/v1.0/users/{mailbox_address}{folder_path}/messages?{plan.query()}", plan
+
+    def __read_emails(
+        self,
+        mailbox_address,
+        subject,
+        folder,
+        sender,
+        n_of_messages,
+        has_attachments,
+        messages_json_path,
+        greater_than_date,
+        less_than_date,
+        internet_message_id,
+        data="all",
+        expand_attachments=False,
+        model=None,
+    ):
+        url, plan = self.__build_messages_url(
+            mailbox_address=mailbox_address,
+            subject=subject,
+            folder=folder,
+            sender=sender,
+            n_of_messages=n_of_messages,
+            has_attachments=has_attachments,
+            greater_than_date=greater_than_date,
+            less_than_date=less_than_date,
+            internet_message_id=internet_message_id,
+            messages_json_path=messages_json_path,
+        )
+        query, headers = _email_projection(data, expand_attachments, plan.local_fields)
+
+        items = plan.apply(self.http.iter_items(_append_query(url, query), headers=headers, max_items=plan.server_max_items))
+        # Converted item by item, so only one page of dicts is alive at a time.
+        data_json = list(map(model.from_graph, items) if model else items)
         
         if messages_json_path:
-            try:
-                with open(messages_json_path, "w+", encoding="utf-8") as file:
-                    json.dump(data_json, file, ensure_ascii=False, indent=4)
-            except Exception as e:
-                raise self.HermesMSGraphError(
-                    "Unable to save messages to messages.json file"
-                ) from e
+            _save_messages_json([email.to_graph() for email in data_json] if model else data_json, messages_json_path)
             
         return data_json
     
-    def list_sharepoint_sites(self):
-        url = "https://graph.microsoft.com/v1.0/sites?$select=siteCollection,webUrl&$filter=siteCollection/root%20ne%20null"
-        data_json = self.http.get_json_response_by_url(url, get_value=True)
-        return data_json
+    def sync_messages(self, mailbox_address, folder="Inbox", select=None, state_store=None, max_page_size=None):
+        """
+        Returns the messages added, updated or removed in a folder since the last sync.
+
+        Uses the messages delta query of the folder. The @odata.deltaLink of each
+        run is saved in the state store and used by the next run, so only changes
+        are downloaded. The first run, or a run whose delta token expired, makes a
+        full sync and reports every message as added.
+
+        Args:
+            mailbox_address (str): The email address of the mailbox.
+            folder (str, optional): Folder display name, well-known name or ID. Defaults to "Inbox".
+            select (str or list, optional): Properties to return for each message.
+            state_store (StateStore, optional): Where the delta links are kept. Defaults to
+                the store of the service (in memory unless given to the constructor).
+            max_page_size (int, optional): Preferred number of messages per page.
+
+        Returns:
+            dict: ``added``, ``updated`` and ``removed`` lists of messages, ``full_sync``
+                (bool) and the saved ``delta_link``.
+        """
+        state_store = state_store or self.state_store
+        folder_id = self.MailboxFolderService.get_folder_id(mailbox_address, folder) or folder
+        if isinstance(select, (list, tuple)):
+            select = ",".join(select)
+
+        state_key = f"messages:{mailbox_address.lower()}:{folder_id}:{select or ''}"
+        # createdDateTime tells added from updated messages, so it is always selected.
+        if select and "createdDateTime" not in select.split(","):
+            select = f"{select},createdDateTime"
+        headers = {"Prefer": f"odata.maxpagesize={max_page_size}"} if max_page_size else None
 
-    def __build_email_query_params(
+        state = state_store.get(state_key)
+        if state:
+            try:
+                return self.__consume_messages_delta(state["delta_link"], headers, state, state_store, state_key)
+            except HermesMSGraphError as e:
+                if not _is_expired_delta_token(e):
+                    raise
+                state_store.delete(state_key)
+
+        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/mailFolders/{folder_id}/messages/delta"
+        if select:
+            url = f"{url}?$select={select}"
+        return self.__consume_messages_delta(url, headers, None, state_store, state_key)
+
+    def __consume_messages_delta(self, url, headers, state, state_store, state_key):
+        last_synced_at = state["synced_at"] if state else None
+        changes = {"added": [], "updated": [], "removed": [], "full_sync": state is None, "delta_link": None}
+
+        # The watermark compared with createdDateTime must come from the server
+        # clock: the Date of the first response, when the delta round started.
+        response = self.http.get(url, headers=headers)
+        if response.status_code != 200:
+            raise self.HermesMSGraphError(
+                f"Error fetching data from {url}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+        sync_started_at = _server_time(response).strftime("%Y-%m-%dT%H:%M:%SZ")
+        first_page = json_loads(response.content)
+        next_link = first_page.get("@odata.nextLink")
+        pages = itertools.chain([first_page], self.http.iter_pages(next_link, headers=headers) if next_link else ())
+
+        for page in pages:
+            for message in page.get("value", []):
+                if "@removed" in message:
+                    changes["removed"].append(message)
+                elif last_synced_at is None or message.get("createdDateTime", "") >= last_synced_at:
+                    changes["added"].append(message)
+                else:
+                    changes["updated"].append(message)
+            if "@odata.deltaLink" in page:
+                changes["delta_link"] = page["@odata.deltaLink"]
+
+        # The delta link is saved only once every page was read, so a failed run restarts from the previous one.
+        if changes["delta_link"]:
+            state_store.set(state_key, {"delta_link": changes["delta_link"], "synced_at": sync_started_at})
+        return changes
+
+    def index_messages(self, mailbox_address, folders=("Inbox",), mail_index=None, max_page_size=None):
+        """
+        Syncs folders of a mailbox into the local mail index.
+
+        Each folder is read with sync_messages, whose delta links are kept in the
+        index database, so only the first run downloads every message. Messages
+        are indexed with the properties of the "preview" projection profile.
+
+        Args:
+            mailbox_address (str): The email address of the mailbox.
+            folders (list, optional): Folder names or IDs to index. Defaults to ("Inbox",).
+            mail_index (SQLiteMailIndex, optional): Defaults to the index of the service.
+            max_page_size (int, optional): Preferred number of messages per page.
+
+        Returns:
+            dict: Per folder, the number of messages ``added``, ``updated`` and
+                ``removed`` and whether it was a ``full_sync``.
+        """
+        mail_index = self.__require_mail_index(mail_index)
+        if isinstance(folders, str):
+            folders = [folders]
+
+        result = {}
+        for folder in folders:
+            changes = self.sync_messages(
+                mailbox_address,
+                folder,
+                select=EMAIL_PROFILES["preview"]["select"],
+                state_store=mail_index.state_store,
+                max_page_size=max_page_size,
+            )
+            mail_index.ingest(mailbox_address, changes["added"] + changes["updated"], changes["removed"])
+            result[folder] = {
+                "added": len(changes["added"]),
+                "updated": len(changes["updated"]),
+                "removed": len(changes["removed"]),
+                "full_sync": changes["full_sync"],
+            }
+        return result
+
+    def query_emails(
         self,
+        mailbox_address,
         subject=None,
+        folder=None,
         sender=None,
-        n_of_messages=None,
-        has_attachments=None,
+        n_of_messages=10,
+        has_attachments="",
         greater_than_date=None,
         less_than_date=None,
-        internet_message_id=None
+        internet_message_id=None,
+        format=list,
+        search=None,
+        mail_index=None,
     ):
-        filters = []
-        query_params = []
+        """
+        Answers a get_emails query from the local mail index instead of Graph.
 
-        def add_filter(condition):
-            if condition:
-                filters.append(condition)
+        Accepts the arguments of get_emails. Subject and sender also accept
+        wildcards anywhere, e.g. "Invoice*" or "*@contoso.com", and search finds
+        words in the subject or body preview. Only messages indexed with
+        index_messages are returned, newest first.
 
-        add_filter(f"sender/emailAddress/address eq '{sender}'" if sender else None)
-        add_filter(f"internetMessageId eq \'{str(internet_message_id)}\'" if internet_message_id else None)
-        add_filter(self.__url_filter_subject(subject) if subject else None)
-        add_filter(f"receivedDateTime gt {greater_than_date}" if greater_than_date else None)
-        add_filter(f"receivedDateTime lt {less_than_date}" if less_than_date else None)
-        add_filter(f"hasAttachments eq {str(has_attachments).lower()}" if has_attachments else None)
+        Args:
+            search (str, optional): Words to find; "word*" matches words starting with it.
+            mail_index (SQLiteMailIndex, optional): Defaults to the index of the service.
 
+        Returns:
+            list or pd.DataFrame: The matching messages.
+        """
+        mail_index = self.__require_mail_index(mail_index)
+        _validate_email_parameters(
+            mailbox_address=mailbox_address,
+            subject=subject,
+            folder=folder,
+            sender=sender,
+            n_of_messages=n_of_messages,
+            has_attachments=has_attachments,
+            greater_than_date=greater_than_date,
+            less_than_date=less_than_date,
+        )
+        as_dataframe = _is_dataframe_format(format)
+        folder_id = self.MailboxFolderService.get_folder_id(mailbox_address, folder) if folder else None
+
+        emails = mail_index.query(
+            mailbox_address,
+            subject=subject,
+            folder_id=folder_id,
+            sender=sender,
+            n_of_messages=n_of_messages,
+            has_attachments=has_attachments,
+            greater_than_date=greater_than_date,
+            less_than_date=less_than_date,
+            internet_message_id=internet_message_id,
+            search=search,
+        )
+        if as_dataframe:
+            import pandas as pd
 
-        if filters:
-            query_params.append(f"$filter={' and '.join(filters)}")
+            return pd.json_normalize(emails)
+        return emails
 
-        if n_of_messages:
-            query_params.append(f"$top={n_of_messages}")
+    def __require_mail_index(self, mail_index):
+        mail_index = mail_index or self.mail_index
+        if mail_index is None:
+            raise self.HermesMSGraphError("A mail index is required, e.g. SQLiteMailIndex.")
+        return mail_index
 
-        return "&".join(query_params) if query_params else ""
+    def list_sharepoint_sites(self):
+        url = "https://graph.microsoft.com/v1.0/sites?$select=siteCollection,webUrl&$filter=siteCollection/root%20ne%20null"
+        data_json = self.http.get_json_response_by_url(url, get_value=True)
+        return data_json
 
     def download_attachment(
         self, mailbox_address, email_id, attachment_id, file_name
     ):
-        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}/attachments/{attachment_id}"
-        data_json = self.http.get_json_response_by_url(url, get_value=False)
+        """
+        Downloads an attachment to file_name, streaming it from the $value endpoint.
+
+        Args:
+            mailbox_address (str): The email address of the mailbox.
+            email_id (str): The ID of the email.
+            attachment_id (str): The ID of the attachment.
+            file_name (str): Path of the file to write.
+        """
+        self.download_attachment_stream(mailbox_address, email_id, attachment_id, file_name)
+        logger.info(f"Attachment saved as {file_name}")
+
+    def download_attachment_stream(
+        self,
+        mailbox_address,
+        email_id,
+        attachment_id,
+        destination,
+        chunk_size=ATTACHMENT_CHUNK_SIZE,
+        resume=True,
+    ):
+        """
+        Streams the raw content of an attachment to disk or to a file object.
+
+        The content is read from /attachments/{id}/$value in chunks of chunk_size
+        bytes, so memory use does not depend on the attachment size. When
+        destination is a path, the data goes to "<destination>.part", renamed to
+        destination once complete; with resume=True an existing .part file is
+        continued with a Range request (restarted if the server ignores it).
+
+        Args:
+            mailbox_address (str): The email address of the mailbox.
+            email_id (str): The ID of the email.
+            attachment_id (str): The ID of the attachment.
+            destination (str or file): Path of the file to write, or a binary file object.
+            chunk_size (int, optional): Bytes read per chunk. Defaults to 1 MiB.
+            resume (bool, optional): Continue a partial download. Defaults to True.
 
-        if data_json:
-            directory = os.path.dirname(file_name)
+        Returns:
+            int: The number of bytes written by this call.
+        """
+        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}/attachments/{attachment_id}/$value"
+
+        if hasattr(destination, "write"):
+            response = self.http.get(url, stream=True)
+            try:
+                self.__raise_for_download_status(response, url)
+                return _write_chunks(response, destination, chunk_size)
+            finally:
+                response.close()
+
+        directory = os.path.dirname(destination)
+        if directory:
             os.makedirs(directory, exist_ok=True)
+        part_path = f"{destination}.part"
+        offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+        response = self.http.get(url, headers=headers, stream=True)
+        try:
+            if offset and response.status_code == 416:
+                # The partial file already holds the whole attachment.
+                os.replace(part_path, destination)
+                return 0
+            self.__raise_for_download_status(response, url)
+            mode = "ab" if offset and response.status_code == 206 else "wb"
+            with open(part_path, mode) as file:
+                written = _write_chunks(response, file, chunk_size)
+        finally:
+            response.close()
+
+        os.replace(part_path, destination)
+        return written
+
+    def download_attachments(self, mailbox_address, email_ids, directory, max_workers=4, chunk_size=ATTACHMENT_CHUNK_SIZE):
+        """
+        Downloads every file attachment of one or more emails concurrently.
+
+        The first page of every attachment list is fetched with batched requests
+        and the next pages, if any, one by one; then the files are streamed to
+        directory by at most max_workers threads. A name already used in
+        directory gets a numeric suffix. Non-file attachments (attached items
+        and links) are reported as skipped.
+
+        Args:
+            mailbox_address (str): The email address of the mailbox.
+            email_ids (str or list): The ID or IDs of the emails.
+            directory (str): Directory where the files are written.
+            max_workers (int, optional): Maximum number of parallel downloads. Defaults to 4.
+            chunk_size (int, optional): Bytes read per chunk. Defaults to 1 MiB.
+
+        Returns:
+            list: One dict per attachment with email_id, attachment_id, name, path,
+                size, status ("downloaded", "skipped" or "failed") and error.
+        """
+        if isinstance(email_ids, str):
+            email_ids = [email_ids]
+        os.makedirs(directory, exist_ok=True)
+
+        urls = [
+            f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}/attachments?$select=id,name,size,contentType"
+            for email_id in email_ids
+        ]
+        attachment_lists = self.http.batch_get(urls)
+
+        downloads = []
+        used_paths = set()
+        for email_id, attachment_list in zip(email_ids, attachment_lists):
+            attachment_list = attachment_list or {}
+            attachments = attachment_list.get("value", [])
+            # The batch returns the first page of each list; the next ones are paged through.
+            next_link = attachment_list.get("@odata.nextLink")
+            if next_link:
+                attachments = itertools.chain(attachments, self.http.iter_items(next_link))
+            for attachment in attachments:
+                result = {
+                    "email_id": email_id,
+                    "attachment_id": attachment["id"],
+                    "name": attachment.get("name"),
+                    "path": None,
+                    "size": attachment.get("size"),
+                    "status": "skipped",
+                    "error": None,
+                }
+                if attachment.get("@odata.type", "#microsoft.graph.fileAttachment") != "#microsoft.graph.fileAttachment":
+                    result["error"] = "Not a file attachment."
+                else:
+                    result["path"] = _unique_path(directory, attachment.get("name") or attachment["id"], used_paths)
+                downloads.append(result)
+
+        def download(result):
+            try:
+                self.download_attachment_stream(
+                    mailbox_address, result["email_id"], result["attachment_id"], result["path"], chunk_size=chunk_size
+                )
+                result["status"] = "downloaded"
+            except Exception as e:
+                result["status"] = "failed"
+                result["error"] = str(e)
+            return result
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hermes-download") as executor:
+            list(executor.map(download, [result for result in downloads if result["path"]]))
+        return downloads
+
+    def __raise_for_download_status(self, response, url):
+        if response.status_code not in (200, 206):
+            raise self.HermesMSGraphError(
+                f"Error downloading attachment from {url}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+
+    def move_email_to_folder(self, email_id, mailbox_address, folder_name=None, folder_id=None):
+        """
+        Moves an email to another folder.
+
+        Args:
+            email_id (str): The ID of the email.
+            mailbox_address (str): The email address of the mailbox.
+            folder_name (str, optional): Name or path of the destination folder (e.g. "Inbox/Clients").
+            folder_id (str, optional): ID or well-known name of the destination folder, used instead of folder_name.
+
+        Returns:
+            dict: The moved email, which has a new ID.
+        """
+        destination_id = self.__destination_folder_id(mailbox_address, folder_name, folder_id)
+        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages/{email_id}/move"
+        response = self.http.post(url, payload={"destinationId": destination_id})
+        if response.status_code != 201:
+            raise self.HermesMSGraphError(
+                f"Error moving email {email_id}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+        return response.json()
+
+    def bulk_update_emails(
+        self,
+        mailbox_address,
+        action,
+        email_ids=None,
+        folder_name=None,
+        folder_id=None,
+        categories=None,
+        max_concurrency=BULK_MAX_CONCURRENCY,
+        **filters,
+    ):
+        """
+        Applies an action to many emails through concurrent $batch requests.
 
-            with open(file_name, "wb") as file:
-                file.write(base64.b64decode(data_json["contentBytes"]))
-            print(f"Attachment saved as {file_name}")
+        The emails are given by ID, or selected with the filters of get_emails
+        (every match unless n_of_messages is given); filters set to None or ""
+        are ignored, and at least one other must narrow the selection. The
+        destination folder is resolved once. At most max_concurrency messages
+        are in flight: they are sent in $batch requests of up to 20, as many
+        batches at a time as that allows, and throttled sub-requests are
+        retried by HttpClient.batch. A failure only affects its own message.
 
+        Args:
+            mailbox_address (str): The email address of the mailbox.
+            action (str): "move", "copy", "mark_read", "mark_unread", "set_categories" or "delete".
+            email_ids (list, optional): IDs of the emails. Required unless filters are given.
+            folder_name (str, optional): Destination folder name or path, for move and copy.
+            folder_id (str, optional): Destination folder ID or well-known name, for move and copy.
+            categories (list, optional): Categories replacing those of each email, for set_categories.
+            max_concurrency (int, optional): Sub-requests in flight at once. Defaults to 4,
+                the per-mailbox limit of Exchange Online.
+            **filters: Filters accepted by get_emails (subject, folder, sender, ...), except
+                format and messages_json_path.
+
+        Returns:
+            dict: ``results`` (one dict per email, in order, with id, status "succeeded"/"failed",
+                status_code, new_id for move and copy, and error) and ``stats`` (succeeded,
+                failed, elapsed_seconds).
+        """
+        started_at = time.monotonic()
+        if action not in BULK_ACTIONS:
+            raise self.HermesMSGraphError(f"Invalid action {action}. Must be one of: {', '.join(BULK_ACTIONS)}.")
+        if action == "set_categories" and categories is None:
+            raise self.HermesMSGraphError("set_categories requires categories.")
+        for name in ("format", "messages_json_path"):
+            if name in filters:
+                raise self.HermesMSGraphError(f"{name} is not supported by bulk_update_emails.")
+
+        destination_id = None
+        if action in ("move", "copy"):
+            destination_id = self.__destination_folder_id(mailbox_address, folder_name, folder_id)
+
+        if email_ids is None:
+            # A filter set to None would not narrow anything, and select the whole mailbox.
+            filters = {name: value for name, value in filters.items() if value is not None and value != ""}
+            if not any(name in filters for name in BULK_SELECTIVE_FILTERS):
+                raise self.HermesMSGraphError(
+                    f"bulk_update_emails requires email_ids or at least one of: {', '.join(BULK_SELECTIVE_FILTERS)}."
+                )
+            # Every match is listed before the first change, so moving messages does not shift the pages.
+            filters.setdefault("n_of_messages", "all")
+            email_ids = [email["id"] for email in self.iter_emails(mailbox_address, data=["id"], **filters)]
+        elif isinstance(email_ids, str):
+            email_ids = [email_ids]
+
+        messages_url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/messages"
+        batch_size = max(1, min(BATCH_MAX_REQUESTS, max_concurrency))
+        chunks = [email_ids[start:start + batch_size] for start in range(0, len(email_ids), batch_size)]
+
+        def apply(chunk):
+            requests_list = [
+                _bulk_request(action, f"{messages_url}/{email_id}", destination_id=destination_id, categories=categories)
+                for email_id in chunk
+            ]
+            try:
+                responses = self.http.batch(requests_list)
+            except HermesMSGraphError as e:
+                return [
+                    {"id": email_id, "status": "failed", "status_code": e.error_code, "new_id": None, "error": str(e)}
+                    for email_id in chunk
+                ]
+            return [_bulk_result(email_id, action, response) for email_id, response in zip(chunk, responses)]
+
+        results = []
+        if chunks:
+            max_workers = max(1, max_concurrency // batch_size)
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hermes-bulk") as executor:
+                for chunk_results in executor.map(apply, chunks):
+                    results.extend(chunk_results)
+
+        succeeded = sum(1 for result in results if result["status"] == "succeeded")
+        if succeeded < len(results):
+            logger.warning(f"{action} failed for {len(results) - succeeded} of {len(results)} emails in {mailbox_address}")
+        return {
+            "results": results,
+            "stats": {
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "elapsed_seconds": time.monotonic() - started_at,
+            },
+        }
+
+    def move_emails(self, mailbox_address, email_ids=None, folder_name=None, folder_id=None, **options):
+        """Moves many emails to a folder, see bulk_update_emails."""
+        return self.bulk_update_emails(
+            mailbox_address, "move", email_ids=email_ids, folder_name=folder_name, folder_id=folder_id, **options
+        )
+
+    def copy_emails(self, mailbox_address, email_ids=None, folder_name=None, folder_id=None, **options):
+        """Copies many emails to a folder, see bulk_update_emails."""
+        return self.bulk_update_emails(
+            mailbox_address, "copy", email_ids=email_ids, folder_name=folder_name, folder_id=folder_id, **options
+        )
+
+    def mark_emails_read(self, mailbox_address, email_ids=None, is_read=True, **options):
+        """Marks many emails as read, or unread with is_read=False, see bulk_update_emails."""
+        action = "mark_read" if is_read else "mark_unread"
+        return self.bulk_update_emails(mailbox_address, action, email_ids=email_ids, **options)
+
+    def set_emails_categories(self, mailbox_address, categories, email_ids=None, **options):
+        """Replaces the categories of many emails, see bulk_update_emails."""
+        return self.bulk_update_emails(
+            mailbox_address, "set_categories", email_ids=email_ids, categories=categories, **options
+        )
+
+    def delete_emails(self, mailbox_address, email_ids=None, **options):
+        """Deletes many emails, see bulk_update_emails."""
+        return self.bulk_update_emails(mailbox_address, "delete", email_ids=email_ids, **options)
+
+    def __destination_folder_id(self, mailbox_address, folder_name, folder_id):
+        if folder_id:
+            return folder_id
+        if not folder_name:
+            raise self.HermesMSGraphError("A destination folder_name or folder_id is required.")
+        destination_id = self.MailboxFolderService.get_folder_id(mailbox_address, folder_name)
+        if destination_id is None:
+            raise self.HermesMSGraphError(f"Folder {folder_name} not found in {mailbox_address}.")
+        return destination_id
 
     def foward_email_by_id(self, email_id, mailbox_address, to_address, comment=None):
         """
@@ -316,62 +1329,3 @@ class EmailService:
 
     # Send the POST request
         self.http.post(url, payload=payload)
-
-
-    def __filter_columns_df_emails(self, df_emails):
-        columns = [
-            "subject",
-            "isRead",
-            "sentDateTime",
-            "receivedDateTime",
-            "sender.emailAddress.name",
-            "sender.emailAddress.address",
-            "from.emailAddress.name",
-            "from.emailAddress.address",
-            "bodyPreview",
-            "body.contentType",
-            "body.content",
-            "id",
-        ]
-        df_emails = df_emails[columns]
-        return df_emails
-
-    def __validate_parameters(
-        self,
-        mailbox_address,
-        subject=None,
-        folder=None,
-        sender=None,
-        n_of_messages=None,
-        has_attachments= "",
-        messages_json_path=None,
-        greater_than_date=None,
-        less_than_date=None,
-        internet_message_id=None
-    ):
-        if not isinstance(mailbox_address, str) or not mailbox_address:
-            raise self.HermesMSGraphError("Invalid mailbox_address. Must be a non-empty string.")
-        
-        if subject is not None and not isinstance(subject, str):
-            raise self.HermesMSGraphError("Invalid subject. Must be a string.")
-        
-        if folder is not None and not isinstance(folder, str):
-            raise self.HermesMSGraphError("Invalid folder. Must be a string.")
-        
-        if sender is not None and not isinstance(sender, str):
-            raise self.HermesMSGraphError("Invalid sender. Must be a string.")
-        
-        if n_of_messages != "all" and (not isinstance(n_of_messages, int) or n_of_messages <= 0):
-            raise self.HermesMSGraphError("Invalid n_of_messages. Must be a positive integer or 'all'.")
-        
-        if has_attachments not in ["", True, False]:
-            raise self.HermesMSGraphError("Invalid has_attachments. Must be True, False, or an empty string.")
-        
-        if messages_json_path is not None and not isinstance(messages_json_path, str):
-            raise self.HermesMSGraphError("Invalid messages_json_path. Must be a string.")
-        
-        if greater_than_date is not None and not isinstance(greater_than_date, str):
-            raise self.HermesMSGraphError("Invalid greater_than_date. Must be a string in ISO format.")
-        
-        if less_than_date is not None and not isinstance(less_than_date, str):
-            raise self.HermesMSGraphError("Invalid less_than_date. Must be a string in ISO format.")
\ No newline at end of file
@@ -1,9 +1,11 @@
 
 class HermesMSGraphError(Exception):
     """Custom exception for errors related to HermesGraphAPI."""
-    def __init__(self, message: str, error_code: int = None):
+    def __init__(self, message: str, error_code: int = None, retry_after: float = None):
         super().__init__(message)
         self.error_code = error_code
+        # Seconds the server asked to wait (Retry-After) when the request was throttled.
+        self.retry_after = retry_after
 
     def __str__(self):
         if self.error_code:
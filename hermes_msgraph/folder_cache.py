@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+DEFAULT_FOLDER_CACHE_TTL = 300
+DEFAULT_MAX_CACHED_MAILBOXES = 256
+
+
+class FolderIndex:
+    """
+    In-memory index of the folders of one mailbox.
+
+    Folders are indexed by id, display name and path ("Inbox/Clients/ACME"),
+    so resolving a folder is a dict lookup. The index keeps the delta link of
+    the scan that built it, used to apply only the changes on refresh.
+    """
+
+    def __init__(self, folders: List[Dict] = (), delta_link: Optional[str] = None):
+        self.by_id = {}
+        self.by_name = {}
+        self.by_path = {}
+        self.delta_link = delta_link
+        self.fetched_at = time.monotonic()
+        self.apply(folders)
+
+    def apply(self, folders: List[Dict]) -> None:
+        """Applies folders from a delta response: upserts them, or removes them when marked @removed."""
+        # New dicts are swapped in, so readers in other threads never see a half-applied change.
+        by_id = dict(self.by_id)
+        for folder in folders:
+            if "@removed" in folder:
+                by_id.pop(folder["id"], None)
+            else:
+                by_id[folder["id"]] = {**by_id.get(folder["id"], {}), **folder}
+        self.by_id = by_id
+        self.__rebuild_lookups()
+
+    def folders(self) -> List[Dict]:
+        return list(self.by_id.values())
+
+    def get_id(self, folder: str) -> Optional[str]:
+        """Resolves a folder id, path or display name (case-insensitive as a fallback) to its id."""
+        if folder in self.by_id:
+            return folder
+        if "/" in folder:
+            return self.by_path.get(folder.strip("/").casefold())
+        return self.by_name.get(folder) or self.by_name.get(folder.casefold())
+
+    def path(self, folder_id: str) -> Optional[str]:
+        names = []
+        seen = set()
+        while folder_id in self.by_id and folder_id not in seen:
+            seen.add(folder_id)
+            folder = self.by_id[folder_id]
+            names.append(folder.get("displayName") or "")
+            folder_id = folder.get("parentFolderId")
+        return "/".join(reversed(names)) if names else None
+
+    def __rebuild_lookups(self):
+        by_name = {}
+        by_path = {}
+        # Top-level folders come first so a name shared with a nested folder resolves to the top-level one.
+        for folder_id in sorted(self.by_id, key=lambda fid: (self.path(fid) or "").count("/")):
+            name = self.by_id[folder_id].get("displayName")
+            if name:
+                by_name.setdefault(name, folder_id)
+                by_name.setdefault(name.casefold(), folder_id)
+            path = self.path(folder_id)
+            if path:
+                by_path.setdefault(path.casefold(), folder_id)
+        self.by_name = by_name
+        self.by_path = by_path
+
+
+class FolderCache:
+    """
+    FolderIndex per mailbox with TTL and LRU eviction.
+
+    An index older than ttl seconds is stale: it is still returned, so the
+    service can refresh it incrementally with its delta link. At most
+    max_mailboxes indexes are kept; the least recently used is evicted first.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_FOLDER_CACHE_TTL, max_mailboxes: int = DEFAULT_MAX_CACHED_MAILBOXES):
+        self.ttl = ttl
+        self.max_mailboxes = max_mailboxes
+        self.__indexes = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, mailbox_address: str) -> Optional[FolderIndex]:
+        key = mailbox_address.lower()
+        with self.__lock:
+            index = self.__indexes.get(key)
+            if index is not None:
+                self.__indexes.move_to_end(key)
+            return index
+
+    def is_stale(self, index: FolderIndex) -> bool:
+        return time.monotonic() - index.fetched_at > self.ttl
+
+    def put(self, mailbox_address: str, index: FolderIndex) -> None:
+        key = mailbox_address.lower()
+        with self.__lock:
+            self.__indexes[key] = index
+            self.__indexes.move_to_end(key)
+            while len(self.__indexes) > self.max_mailboxes:
+                self.__indexes.popitem(last=False)
+
+    def invalidate(self, mailbox_address: Optional[str] = None) -> None:
+        with self.__lock:
+            if mailbox_address is None:
+                self.__indexes.clear()
+            else:
+                self.__indexes.pop(mailbox_address.lower(), None)
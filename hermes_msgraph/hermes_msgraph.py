@@ -1,14 +1,8 @@
-import os
-import sys
+import threading
 
-sys.path.append(os.path.abspath(os.path.dirname(__file__)))
-
-from http_client import HttpClient
-from email_service import EmailService
-from mailbox_folder_service import MailboxFolderService
-from planner_service import PlannerService
-from users_service import UsersService
-from exceptions import HermesMSGraphError       
+from .http_client import DEFAULT_POOL_MAXSIZE, DEFAULT_TIMEOUT, GRAPH_BASE_URL, HttpClient
+from .token_provider import DEFAULT_AUTHORITY
+from .exceptions import HermesMSGraphError       
 from typing import Literal
 
 class HermesMSGraph:
@@ -16,35 +10,208 @@ class HermesMSGraph:
     Class to interact with the Microsoft Graph API for sending and reading emails.
 
     The class contains methods to obtain an access token, send emails, read email messages, organize data into a DataFrame, and save it to a JSON file.
+
+    The services are created, and their modules imported, the first time they are
+    used, so a script that only sends an email does not load the others.
     """
 
-    def __init__(self, client_id, client_secret, tenant_id):
-        self.http_client = HttpClient(client_id, client_secret, tenant_id)
-        self.email_service = EmailService(self.http_client)
-        self.folder_service = MailboxFolderService(self.http_client)
-        self.planner_service = PlannerService(self.http_client)
-        self.users_service = UsersService(self.http_client)
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        tenant_id,
+        token_cache_path=None,
+        retry_policy=None,
+        state_store=None,
+        folder_cache=None,
+        user_store=None,
+        mail_index=None,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        timeout=DEFAULT_TIMEOUT,
+        cache=None,
+        hooks=None,
+        metrics=None,
+        base_url=GRAPH_BASE_URL,
+        authority=DEFAULT_AUTHORITY,
+    ):
+        self.http_client = HttpClient(
+            client_id,
+            client_secret,
+            tenant_id,
+            token_cache_path=token_cache_path,
+            retry_policy=retry_policy,
+            pool_maxsize=pool_maxsize,
+            timeout=timeout,
+            cache=cache,
+            hooks=hooks,
+            metrics=metrics,
+            base_url=base_url,
+            authority=authority,
+        )
         self.client_id = client_id
         self.client_secret = client_secret
         self.tenant_id = tenant_id
-        self.http = HttpClient(client_id, client_secret, tenant_id)
+        self.http = self.http_client
+        self.__state_store = state_store
+        self.__folder_cache = folder_cache
+        self.__user_store = user_store
+        self.__mail_index = mail_index
+        self.__services = {}
+        self.__services_lock = threading.RLock()
+
+    def __service(self, name, factory):
+        service = self.__services.get(name)
+        if service is None:
+            with self.__services_lock:
+                service = self.__services.get(name)
+                if service is None:
+                    service = self.__services[name] = factory()
+        return service
+
+    @property
+    def folder_service(self):
+        def create():
+            from .mailbox_folder_service import MailboxFolderService
+
+            return MailboxFolderService(self.http_client, folder_cache=self.__folder_cache)
+
+        return self.__service("folder", create)
+
+    @property
+    def email_service(self):
+        def create():
+            from .email_service import EmailService
+
+            return EmailService(
+                self.http_client,
+                state_store=self.__state_store,
+                folder_service=self.folder_service,
+                mail_index=self.__mail_index,
+            )
+
+        return self.__service("email", create)
+
+    @property
+    def planner_service(self):
+        def create():
+            from .planner_service import PlannerService
+
+            return PlannerService(self.http_client)
+
+        return self.__service("planner", create)
+
+    @property
+    def users_service(self):
+        def create():
+            from .users_service import UsersService
+
+            return UsersService(self.http_client, user_store=self.__user_store)
+
+        return self.__service("users", create)
+
+    @property
+    def subscription_service(self):
+        def create():
+            from .subscriptions import SubscriptionService
+
+            return SubscriptionService(self.http_client)
+
+        return self.__service("subscriptions", create)
 
         # EmailService methods
     def send_email(self, sender_mail, subject, body, to_address, cc_address=None, attachments=None, delay=0, body_type: Literal["Text", "html"]="Text"):
         return self.email_service.send_email(sender_mail, subject, body, to_address, cc_address, attachments=attachments, delay=delay, body_type=body_type)
 
+    def send_emails_bulk(self, messages, **dispatcher_options):
+        """
+        Sends many emails concurrently with per-sender quotas, see SendDispatcher.
+
+        Args:
+            messages (list): Dicts with the arguments of send_email (sender_mail, subject,
+                body, to_address, and optionally cc_address, attachments, body_type, key).
+            **dispatcher_options: Options of SendDispatcher (max_workers, messages_per_minute, ...).
+
+        Returns:
+            dict: The per-message results and throughput stats of SendDispatcher.run.
+        """
+        from .send_dispatcher import SendDispatcher
+
+        dispatcher = SendDispatcher(self.email_service, **dispatcher_options)
+        for message in messages:
+            dispatcher.submit(**message)
+        return dispatcher.run()
+
     def get_emails(self, mailbox_address, **kwargs):
         return self.email_service.get_emails(mailbox_address, **kwargs)
 
+    def iter_emails(self, mailbox_address, **kwargs):
+        return self.email_service.iter_emails(mailbox_address, **kwargs)
+
+    def get_emails_many(self, mailboxes, max_workers=8, **kwargs):
+        return self.email_service.get_emails_many(mailboxes, max_workers=max_workers, **kwargs)
+
+    def iter_emails_many(self, mailboxes, max_workers=8, **kwargs):
+        return self.email_service.iter_emails_many(mailboxes, max_workers=max_workers, **kwargs)
+
+    def export_emails(self, mailbox_address, directory, **options):
+        return self.email_service.export_emails(mailbox_address, directory, **options)
+
+    def sync_messages(self, mailbox_address, folder="Inbox", select=None, state_store=None, max_page_size=None):
+        return self.email_service.sync_messages(
+            mailbox_address, folder, select=select, state_store=state_store, max_page_size=max_page_size
+        )
+
+    def index_messages(self, mailbox_address, folders=("Inbox",), mail_index=None, max_page_size=None):
+        return self.email_service.index_messages(
+            mailbox_address, folders=folders, mail_index=mail_index, max_page_size=max_page_size
+        )
+
+    def query_emails(self, mailbox_address, **kwargs):
+        return self.email_service.query_emails(mailbox_address, **kwargs)
+
     def move_email_to_folder(self, email_id, mailbox_address, folder_name=None, folder_id=None):
         return self.email_service.move_email_to_folder(email_id, mailbox_address, folder_name, folder_id)
 
+    def bulk_update_emails(self, mailbox_address, action, email_ids=None, **options):
+        return self.email_service.bulk_update_emails(mailbox_address, action, email_ids=email_ids, **options)
+
+    def move_emails(self, mailbox_address, email_ids=None, folder_name=None, folder_id=None, **options):
+        return self.email_service.move_emails(mailbox_address, email_ids=email_ids, folder_name=folder_name, folder_id=folder_id, **options)
+
+    def copy_emails(self, mailbox_address, email_ids=None, folder_name=None, folder_id=None, **options):
+        return self.email_service.copy_emails(mailbox_address, email_ids=email_ids, folder_name=folder_name, folder_id=folder_id, **options)
+
+    def mark_emails_read(self, mailbox_address, email_ids=None, is_read=True, **options):
+        return self.email_service.mark_emails_read(mailbox_address, email_ids=email_ids, is_read=is_read, **options)
+
+    def set_emails_categories(self, mailbox_address, categories, email_ids=None, **options):
+        return self.email_service.set_emails_categories(mailbox_address, categories, email_ids=email_ids, **options)
+
+    def delete_emails(self, mailbox_address, email_ids=None, **options):
+        return self.email_service.delete_emails(mailbox_address, email_ids=email_ids, **options)
+
     def forward_email_by_id(self, email_id, mailbox_address, to_address, comment=None):
         return self.email_service.foward_email_by_id(email_id, mailbox_address, to_address, comment)
     
     def list_email_attachments(self, email_id, mailbox_address):
         return self.email_service.list_email_attachments(email_id, mailbox_address)
 
+    def download_attachment(self, mailbox_address, email_id, attachment_id, file_name):
+        return self.email_service.download_attachment(mailbox_address, email_id, attachment_id, file_name)
+
+    def download_attachments(self, mailbox_address, email_ids, directory, max_workers=4):
+        return self.email_service.download_attachments(mailbox_address, email_ids, directory, max_workers=max_workers)
+
+    def get_emails_by_ids(self, email_ids, mailbox_address, data="all", expand_attachments=False, format=list):
+        return self.email_service.get_emails_by_ids(
+            email_ids, mailbox_address, data=data, expand_attachments=expand_attachments, format=format
+        )
+
+    def get_email_by_id(self, email_id, mailbox_address, data="all", expand_attachments=False):
+        return self.email_service.get_email_by_id(
+            email_id, mailbox_address, data=data, expand_attachments=expand_attachments
+        )
+
     # MailboxFolderService methods
     def list_mailbox_folders(self, mailbox_address):
         return self.folder_service.list_mailbox_folders(mailbox_address)
@@ -58,6 +225,9 @@ class HermesMSGraph:
     def get_folder_id(self, mailbox_address, folder_name):
         return self.folder_service.get_folder_id(mailbox_address, folder_name)
 
+    def invalidate_folder_cache(self, mailbox_address=None):
+        return self.folder_service.invalidate_folder_cache(mailbox_address)
+
     # PlannerService methods
     def list_plans_by_group_id(self, group_id, data="all"):
         return self.planner_service.list_plans_by_group_id(group_id, data)
@@ -70,13 +240,36 @@ class HermesMSGraph:
 
     def list_tasks_by_plan_id(self, planner_id):
         return self.planner_service.list_tasks_by_plan_id(planner_id)
+
+    def list_buckets_by_plan_id(self, plan_id):
+        return self.planner_service.list_buckets_by_plan_id(plan_id)
+
+    def get_planner_snapshot(self, group_ids=None, plan_ids=None, include_details=True, max_workers=8, format=dict):
+        return self.planner_service.get_planner_snapshot(
+            group_ids=group_ids, plan_ids=plan_ids, include_details=include_details, max_workers=max_workers, format=format
+        )
+
+    def get_plans_by_ids(self, plan_ids):
+        return self.planner_service.get_plans_by_ids(plan_ids)
+
+    def get_task_details_by_ids(self, task_ids):
+        return self.planner_service.get_task_details_by_ids(task_ids)
     
     # UsersService methods
     def get_user_id_by_email(self, email_address):
         return self.users_service.get_user_id_by_email(email_address)
     
-    def get_all_users(self, data='all'):
-        return self.users_service.get_all_users(data)
+    def get_users_by_ids(self, user_ids, select=None):
+        return self.users_service.get_users_by_ids(user_ids, select)
+    
+    def get_all_users(self, data='all', refresh=True, format=list):
+        return self.users_service.get_all_users(data, refresh=refresh, format=format)
+
+    def sync_users(self, user_store=None, max_page_size=None):
+        return self.users_service.sync_users(user_store=user_store, max_page_size=max_page_size)
+
+    def iter_all_users(self, prefetch=False):
+        return self.users_service.iter_all_users(prefetch)
     
     def search_from_mailboxes(self, query):
         return self.users_service.search_from_mailboxes(query)
@@ -90,6 +283,28 @@ class HermesMSGraph:
     def add_user_to_shared_mailbox(self, user_address, shared_mailbox_address):
         return self.users_service.add_user_to_shared_mailbox(user_address, shared_mailbox_address)
     
+    # SubscriptionService methods
+    def subscribe_to_messages(self, mailbox_address, notification_url, folder_id=None, change_type="created", **options):
+        return self.subscription_service.subscribe_to_messages(mailbox_address, notification_url, folder_id=folder_id, change_type=change_type, **options)
+
+    def subscribe_to_users(self, notification_url, change_type="updated,deleted", **options):
+        return self.subscription_service.subscribe_to_users(notification_url, change_type=change_type, **options)
+
+    def renew_subscription(self, subscription_id, expiration_minutes=None):
+        return self.subscription_service.renew_subscription(subscription_id, expiration_minutes=expiration_minutes)
+
+    def delete_subscription(self, subscription_id):
+        return self.subscription_service.delete_subscription(subscription_id)
+
+    def list_subscriptions(self):
+        return self.subscription_service.list_subscriptions()
+
+    def start_subscription_renewer(self, renew_before=3600, check_interval=60):
+        """Starts a SubscriptionRenewer for the subscriptions created through this client and returns it."""
+        from .subscriptions import SubscriptionRenewer
+
+        return SubscriptionRenewer(self.subscription_service, renew_before=renew_before, check_interval=check_interval).start()
+
     def __verify_if_str_is_encoded(self, string):
         """
         Verifies if a string is already URL-encoded.
@@ -157,6 +372,9 @@ class HermesMSGraph:
             raise self.HermesMSGraphError("Invalid less_than_date. Must be a string in ISO format.")
 
     def __json_to_dataframe(self, json_file_path):
+        import json
+        import pandas as pd
+
         with open(json_file_path, "r") as file:
             json_data = json.load(file)
         df_emails = pd.json_normalize(json_data)
@@ -171,3 +389,25 @@ class HermesMSGraph:
     
     def list_msgraph_permissions(self):
         self.http.list_msgraph_permisions()
+
+    def get_retry_stats(self):
+        return self.http_client.retry_stats.snapshot()
+
+    def get_cache_stats(self):
+        """Hit/miss statistics of the response cache, or None when caching is off."""
+        return self.http_client.cache.stats() if self.http_client.cache is not None else None
+
+    def clear_cache(self, url_prefix=None):
+        if self.http_client.cache is not None:
+            self.http_client.cache.invalidate(url_prefix)
+
+    def get_metrics(self):
+        """Request metrics by endpoint as a dict, or None when no MetricsCollector was given."""
+        return self.http_client.metrics.snapshot() if self.http_client.metrics is not None else None
+
+    def get_metrics_prometheus(self):
+        """Request metrics in the Prometheus text format, or None when no MetricsCollector was given."""
+        return self.http_client.metrics.to_prometheus() if self.http_client.metrics is not None else None
+
+    def batch(self, requests_list, max_retries=3):
+        return self.http_client.batch(requests_list, max_retries=max_retries)
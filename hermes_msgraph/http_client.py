@@ -1,87 +1,544 @@
 import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from .exceptions import HermesMSGraphError
+from .models import json_loads
+from .retry_policy import IDEMPOTENT_METHODS, THROTTLING_STATUS_CODES, RetryPolicy, RetryStats, parse_retry_after
+from .token_provider import DEFAULT_AUTHORITY, TokenProvider
+
+logger = logging.getLogger(__name__)
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+BATCH_MAX_REQUESTS = 20
+BATCH_RETRY_STATUS_CODES = (429, 503, 504)
+MAX_PAGE_SIZE = 1000
+# Connections kept open per host; size it to the number of worker threads.
+DEFAULT_POOL_MAXSIZE = 32
+# (connect, read) timeouts in seconds.
+DEFAULT_TIMEOUT = (10, 60)
+# Upload session chunks must be multiples of 320 KiB.
+UPLOAD_CHUNK_SIZE = 10 * 320 * 1024
+
+
+def page_size(max_items, max_page_size=MAX_PAGE_SIZE):
+    """$top value for a listing that needs max_items items ("all" or None for everything)."""
+    if max_items in (None, "all"):
+        return max_page_size
+    return max(1, min(int(max_items), max_page_size))
+
+
+def _rebase_url(url, base_url):
+    """Points a URL built on GRAPH_BASE_URL at base_url."""
+    if base_url != GRAPH_BASE_URL and url.startswith(GRAPH_BASE_URL):
+        return base_url + url[len(GRAPH_BASE_URL):]
+    return url
+
+
+def _build_batch_requests(requests_list, base_url=GRAPH_BASE_URL):
+    """Normalizes requests into $batch sub-requests with relative URLs and string ids."""
+    sub_requests = []
+    for index, request in enumerate(requests_list, start=1):
+        url = _rebase_url(request["url"], base_url)
+        if url.startswith(base_url):
+            url = url[len(base_url):]
+        if not url.startswith("/"):
+            url = f"/{url}"
+
+        sub_request = {
+            "id": str(request.get("id", index)),
+            "method": request.get("method", "GET").upper(),
+            "url": url,
+        }
+        headers = dict(request.get("headers") or {})
+        if request.get("body") is not None:
+            sub_request["body"] = request["body"]
+            headers.setdefault("Content-Type", "application/json")
+        if headers:
+            sub_request["headers"] = headers
+        if request.get("dependsOn"):
+            sub_request["dependsOn"] = [str(request_id) for request_id in request["dependsOn"]]
+        sub_requests.append(sub_request)
+
+    ids = [request["id"] for request in sub_requests]
+    if len(set(ids)) != len(ids):
+        raise HermesMSGraphError("Batch request ids must be unique.")
+    return sub_requests
+
+
+def _split_batch_chunks(sub_requests):
+    """Groups requests chained by dependsOn and packs the groups in chunks of 20."""
+    parents = {request["id"]: request["id"] for request in sub_requests}
+
+    def find(request_id):
+        while parents[request_id] != request_id:
+            parents[request_id] = parents[parents[request_id]]
+            request_id = parents[request_id]
+        return request_id
+
+    for request in sub_requests:
+        for dependency in request.get("dependsOn", []):
+            if dependency not in parents:
+                raise HermesMSGraphError(f"Batch request {request['id']} depends on unknown id {dependency}.")
+            parents[find(request["id"])] = find(dependency)
+
+    groups = {}
+    for request in sub_requests:
+        groups.setdefault(find(request["id"]), []).append(request)
+
+    chunks = []
+    current = []
+    for group in groups.values():
+        if len(group) > BATCH_MAX_REQUESTS:
+            raise HermesMSGraphError(
+                f"A dependsOn chain cannot have more than {BATCH_MAX_REQUESTS} requests."
+            )
+        if len(current) + len(group) > BATCH_MAX_REQUESTS:
+            chunks.append(current)
+            current = []
+        current.extend(group)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _parse_batch_responses(response, pending):
+    """Maps the sub-responses of a $batch response by request id."""
+    if response.status_code != 200:
+        raise HermesMSGraphError(
+            f"Error sending batch request: {response.status_code} - {response.text}",
+            error_code=response.status_code,
+        )
+
+    chunk_responses = {}
+    for sub_response in response.json().get("responses", []):
+        chunk_responses[str(sub_response["id"])] = {
+            "id": str(sub_response["id"]),
+            "status": sub_response.get("status"),
+            "headers": sub_response.get("headers") or {},
+            "body": sub_response.get("body"),
+        }
+    for request in pending:
+        if request["id"] not in chunk_responses:
+            raise HermesMSGraphError(f"Batch response is missing request id {request['id']}.")
+    return chunk_responses
+
+
+def _plan_batch_retry(chunk, pending, chunk_responses, attempt):
+    """
+    Selects the sub-requests to re-send after throttling.
+
+    429 and 503 mean the sub-request did not run and are always re-sent; a 504
+    may come after the work was done, so it is re-sent only for idempotent
+    methods (a POST move or copy is not).
 
-from exceptions import HermesMSGraphError
+    Returns the delay to wait and the requests to re-send, keeping only the
+    dependsOn links between requests that are sent again. A request that failed
+    with 424 is re-sent only when a request it depends on is re-sent, i.e. it
+    did not run because of throttling; any other 424 is its final answer.
+    """
+    retry_ids = {
+        request["id"]
+        for request in pending
+        if _is_batch_retryable(request, chunk_responses[request["id"]]["status"])
+    }
+    if not retry_ids:
+        return 0, []
+    throttled = [chunk_responses[request_id] for request_id in retry_ids]
+
+    # A 424 may depend on another 424 that is re-sent, so follow the chains.
+    failed_dependency = [request for request in pending if chunk_responses[request["id"]]["status"] == 424]
+    added = True
+    while added:
+        added = False
+        for request in failed_dependency:
+            if request["id"] not in retry_ids and retry_ids.intersection(request.get("dependsOn", ())):
+                retry_ids.add(request["id"])
+                added = True
+
+    retry_requests = []
+    for request in chunk:
+        if request["id"] in retry_ids:
+            request = dict(request)
+            if "dependsOn" in request:
+                request["dependsOn"] = [d for d in request["dependsOn"] if d in retry_ids]
+                if not request["dependsOn"]:
+                    del request["dependsOn"]
+            retry_requests.append(request)
+
+    delay = max(_batch_retry_after(response, attempt) for response in throttled)
+    return delay, retry_requests
+
+
+def _is_batch_retryable(request, status):
+    if status not in BATCH_RETRY_STATUS_CODES:
+        return False
+    return status in THROTTLING_STATUS_CODES or request["method"].upper() in IDEMPOTENT_METHODS
+
+
+def _batch_retry_after(response, attempt):
+    headers = {key.lower(): value for key, value in response["headers"].items()}
+    retry_after = parse_retry_after(headers.get("retry-after"))
+    return retry_after if retry_after is not None else float(2 ** attempt)
+
+
+def _batch_bodies(urls, batch_responses):
+    """Extracts the bodies of batched GET responses, None for resources not found."""
+    results = []
+    errors = []
+    for url, response in zip(urls, batch_responses):
+        if 200 <= response["status"] < 300:
+            results.append(response["body"])
+        elif response["status"] == 404:
+            results.append(None)
+        else:
+            errors.append(f"{url}: {response['status']} - {response['body']}")
+
+    if errors:
+        raise HermesMSGraphError(f"Error fetching data in batch: {'; '.join(errors)}")
+    return results
+
+
+def _batch_get_requests(urls, headers=None):
+    requests_list = [{"method": "GET", "url": url} for url in urls]
+    if headers:
+        for request in requests_list:
+            request["headers"] = dict(headers)
+    return requests_list
+
+
+def _next_expected_offset(upload_status, default):
+    """Start of the first range in an upload session's nextExpectedRanges."""
+    ranges = upload_status.get("nextExpectedRanges") or []
+    if not ranges:
+        return default
+    return int(ranges[0].split("-")[0])
 
 
 class HttpClient:
-    def __init__(self, client_id, client_secret, tenant_id):
+    """
+    Sends authenticated requests to Microsoft Graph. Safe to share between threads.
+
+    Requests go through one requests.Session whose connection pool keeps up to
+    pool_maxsize keep-alive connections per host; when they are all busy, threads
+    wait for a free connection instead of opening throwaway ones, so size the
+    pool to the number of worker threads. The Authorization header is built for
+    each request from the TokenProvider, whose lock makes concurrent threads
+    share a single token refresh. Responses are gzip-decoded and every request
+    has connect and read timeouts.
+
+    Args:
+        pool_connections (int, optional): Number of hosts with a pooled connection set.
+        pool_maxsize (int, optional): Connections kept open per host.
+        timeout (float or tuple, optional): Seconds, or (connect, read) seconds, per request.
+        cache (ResponseCache, optional): Opt-in cache of GET responses, see
+            MemoryResponseCache and SQLiteResponseCache.
+        hooks (list, optional): RequestHooks notified of every request, retry and token event.
+        metrics (MetricsCollector, optional): Opt-in request metrics, added to the hooks.
+        base_url (str, optional): Graph root the requests go to. The services build
+            URLs on GRAPH_BASE_URL; they are sent to base_url instead, e.g. a
+            national cloud or a local fake server.
+        authority (str, optional): Login endpoint of the default TokenProvider.
+    """
+
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        tenant_id,
+        token_provider=None,
+        token_cache_path=None,
+        retry_policy=None,
+        pool_connections=10,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        timeout=DEFAULT_TIMEOUT,
+        cache=None,
+        hooks=None,
+        metrics=None,
+        base_url=GRAPH_BASE_URL,
+        authority=DEFAULT_AUTHORITY,
+    ):
         self.client_id = client_id
         self.client_secret = client_secret
         self.tenant_id = tenant_id
-        self.session = requests.Session()
-        self.access_token = self.__get_access_token()
-
-    def __get_access_token(self):
-        url = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token"
-        payload = {
-            "grant_type": "client_credentials",
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "scope": "https://graph.microsoft.com/.default",
-        }
+        self.timeout = timeout
+        self.base_url = base_url.rstrip("/")
+        self.session = self.__build_session(pool_connections, pool_maxsize)
+        # The token is requested lazily on the first Graph request.
+        self.token_provider = token_provider or TokenProvider(
+            client_id,
+            client_secret,
+            tenant_id,
+            session=self.session,
+            cache_path=token_cache_path,
+            timeout=timeout,
+            authority=authority,
+        )
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_stats = RetryStats()
+        self.cache = cache
+        self.metrics = metrics
+        self.hooks = tuple(hooks or ()) + ((metrics,) if metrics is not None else ())
+        # Custom token providers only need get_token and invalidate.
+        if hasattr(self.token_provider, "add_listener"):
+            self.token_provider.add_listener(self.__on_token_event)
+
+    @staticmethod
+    def __build_session(pool_connections, pool_maxsize):
+        session = requests.Session()
+        # Retries are handled by the RetryPolicy, not by urllib3.
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0, pool_block=True
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+        return session
+
+    def add_hook(self, hook):
+        self.hooks = self.hooks + (hook,)
+
+    def remove_hook(self, hook):
+        self.hooks = tuple(h for h in self.hooks if h is not hook)
+
+    def __on_token_event(self, event, elapsed):
+        for hook in self.hooks:
+            hook.on_token_event(event, elapsed)
+
+    def __send(self, method, url, headers=None, data=None, stream=False):
+        """Sends one HTTP request through the pooled session, reporting it to the hooks."""
+        hooks = self.hooks
+        if not hooks:
+            return self.session.request(method, url, headers=headers, data=data, stream=stream, timeout=self.timeout)
+
+        for hook in hooks:
+            hook.before_request(method, url, headers)
+        bytes_sent = len(data) if data is not None else 0
+        started = time.perf_counter()
         try:
-            response = self.session.post(url, data=payload)
+            response = self.session.request(method, url, headers=headers, data=data, stream=stream, timeout=self.timeout)
         except Exception as e:
-            raise RuntimeError("Unable to make post request to get access token") from e
-        response.raise_for_status()
-        response_data = response.json()
-        access_token = response_data["access_token"]
-        return access_token
+            self.__after_request(hooks, method, url, None, time.perf_counter() - started, bytes_sent, e)
+            raise
+        self.__after_request(hooks, method, url, response, time.perf_counter() - started, bytes_sent, None)
+        return response
+
+    @staticmethod
+    def __after_request(hooks, method, url, response, elapsed, bytes_sent, error):
+        for hook in hooks:
+            try:
+                hook.after_request(method, url, response, elapsed, bytes_sent=bytes_sent, error=error)
+            except Exception:
+                # Instrumentation must never fail a request that succeeded.
+                logger.exception(f"Request hook {hook!r} failed")
+
+    def __record_retry(self, method, url, reason, delay):
+        self.retry_stats.record_retry(reason, delay)
+        for hook in self.hooks:
+            hook.on_retry(method, url, reason, delay)
+
+    def close(self):
+        """Closes the pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
-    def __headers(self):
+    @property
+    def access_token(self):
+        return self.token_provider.get_token()
+
+    def __headers(self, headers=None):
         access_token = self.access_token
-        headers = {
+        headers_raw = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
         }
-        return headers
-
-    def __verify_response_status_code(self, response):
-        if response.status_code == 200:
-            return 200
-        elif response.status_code == 401:
-            self.access_token = self.__get_access_token()
-            return 401
-        elif response.status_code == 403:
-            return 403
-        elif response.status_code == 404:
-            return 404
-
-    def __get_http(self, url, headers=None):
-        if headers is None:
-            headers = self.__headers()
-        else:
-            headers_raw = self.__headers()
+        if headers:
             headers_raw.update(headers)
-            headers = headers_raw
-            print(headers_raw)
-        response = self.session.get(url, headers=headers)
+        return headers_raw
 
-        response_status_code = self.__verify_response_status_code(response)
-        if response_status_code == 401:
-            response = self.__get_http(url)
+    def __request_http(self, method, url, headers=None, data=None, retry_policy=None, stream=False):
+        """
+        Sends a request, refreshing the token once on 401 and retrying
+        throttled or transient failures according to the retry policy.
+        """
+        policy = retry_policy or self.retry_policy
+        attempt = 0
+        backoff_spent = 0.0
+        token_refreshed = False
 
-        return response
+        while True:
+            request_headers = self.__headers(headers)
+            try:
+                response = self.__send(method, url, headers=request_headers, data=data, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                delay = policy.backoff(attempt + 1)
+                if not policy.should_retry_error(method) or not policy.allows(attempt + 1, backoff_spent, delay):
+                    self.retry_stats.record_exhausted()
+                    raise HermesMSGraphError(f"Error sending {method} request to {url}: {e}") from e
+                reason = type(e).__name__
+            else:
+                if response.status_code == 401 and not token_refreshed:
+                    token_refreshed = True
+                    self.token_provider.invalidate(request_headers["Authorization"][len("Bearer "):])
+                    response.close()
+                    continue
+
+                if not policy.should_retry_status(method, response.status_code):
+                    return response
 
-    def __post_http(self, url, payload):
-        headers = self.__headers()
-        data = json.dumps(payload)
+                delay = policy.backoff(attempt + 1, parse_retry_after(response.headers.get("Retry-After")))
+                if not policy.allows(attempt + 1, backoff_spent, delay):
+                    self.retry_stats.record_exhausted()
+                    return response
+                reason = response.status_code
+                response.close()
 
-        response = self.session.post(url, headers=headers, data=data)
+            attempt += 1
+            backoff_spent += delay
+            self.__record_retry(method, url, reason, delay)
+            time.sleep(delay)
 
-        response_status_code = self.__verify_response_status_code(response)
+    def request(self, method, url, payload=None, headers=None, retry_policy=None, stream=False):
+        """
+        Sends a request with any HTTP verb.
 
-        if response_status_code == 401:
-            response = self.__get_http(url)
+        Args:
+            method (str): The HTTP verb.
+            url (str): The URL of the request.
+            payload (dict, optional): JSON body of the request.
+            headers (dict, optional): Headers added to the default ones.
+            retry_policy (RetryPolicy, optional): Overrides the client retry policy for this call.
+            stream (bool, optional): Do not read the body up front; read it with
+                response.iter_content and close the response when done.
+        """
+        method = method.upper()
+        url = _rebase_url(url, self.base_url)
+        if self.cache is not None:
+            if method == "GET" and not stream:
+                return self.__cached_get(url, headers, retry_policy)
+            if method != "GET":
+                self.cache.invalidate_write(url, payload)
 
+        data = json.dumps(payload) if payload is not None else None
+        return self.__request_http(
+            method, url, headers=headers, data=data, retry_policy=retry_policy, stream=stream
+        )
+
+    def __cached_get(self, url, headers, retry_policy):
+        if not self.cache.is_cacheable(url):
+            return self.__request_http("GET", url, headers=headers, retry_policy=retry_policy)
+        key = self.cache.key(url, headers, scope=f"{self.tenant_id}:{self.client_id}")
+        entry = self.cache.lookup(key)
+        if entry is not None and entry.is_fresh():
+            return entry.to_response()
+
+        request_headers = dict(headers or {})
+        if entry is not None and entry.etag:
+            request_headers["If-None-Match"] = entry.etag
+        response = self.__request_http("GET", url, headers=request_headers, retry_policy=retry_policy)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.renew(key, entry)
+            return entry.to_response()
+        self.cache.record_miss()
+        if response.status_code == 200:
+            self.cache.store(key, url, response)
         return response
 
-    def post(self, url, payload):
-        return self.__post_http(url, payload)
+    def post(self, url, payload, headers=None, retry_policy=None):
+        return self.request("POST", url, payload=payload, headers=headers, retry_policy=retry_policy)
+
+    def get(self, url, headers=None, retry_policy=None, stream=False):
+        return self.request("GET", url, headers=headers, retry_policy=retry_policy, stream=stream)
+
+    def patch(self, url, payload, headers=None, retry_policy=None):
+        return self.request("PATCH", url, payload=payload, headers=headers, retry_policy=retry_policy)
+
+    def delete(self, url, headers=None, retry_policy=None):
+        return self.request("DELETE", url, headers=headers, retry_policy=retry_policy)
+
+    def upload_file(self, upload_url, file_path, chunk_size=UPLOAD_CHUNK_SIZE, retry_policy=None):
+        """
+        Uploads a file to an upload session in ranged chunks.
+
+        The file is read from disk one chunk at a time. A chunk that fails with a
+        retryable status or a connection error is retried after asking the session
+        for its next expected range, so the upload resumes instead of restarting.
+        The upload URL is pre-authenticated, no Authorization header is sent.
+
+        Args:
+            upload_url (str): The uploadUrl returned by createUploadSession.
+            file_path (str): Path of the file to upload.
+            chunk_size (int, optional): Bytes per request, a multiple of 320 KiB.
+            retry_policy (RetryPolicy, optional): Overrides the client retry policy for this call.
+
+        Returns:
+            requests.Response: The response to the last chunk.
+        """
+        policy = retry_policy or self.retry_policy
+        size = os.path.getsize(file_path)
+        offset = 0
+        attempt = 0
+        backoff_spent = 0.0
+
+        with open(file_path, "rb") as file:
+            while True:
+                file.seek(offset)
+                chunk = file.read(chunk_size)
+                headers = {
+                    "Content-Length": str(len(chunk)),
+                    "Content-Range": f"bytes {offset}-{offset + len(chunk) - 1}/{size}",
+                }
+                try:
+                    response = self.__send("PUT", upload_url, headers=headers, data=chunk)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    retry_after = None
+                    reason = type(e).__name__
+                    error = f"{reason}: {e}"
+                else:
+                    if response.status_code in (200, 201):
+                        return response
+                    if response.status_code == 202:
+                        offset = _next_expected_offset(response.json(), offset + len(chunk))
+                        attempt = 0
+                        continue
+                    error = f"{response.status_code} - {response.text}"
+                    if not policy.should_retry_status("PUT", response.status_code):
+                        raise HermesMSGraphError(
+                            f"Error uploading {file_path}: {error}", error_code=response.status_code
+                        )
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    reason = response.status_code
 
-    def get(self, url, headers=None):
-        return self.__get_http(url, headers)
+                delay = policy.backoff(attempt + 1, retry_after)
+                if not policy.allows(attempt + 1, backoff_spent, delay):
+                    self.retry_stats.record_exhausted()
+                    raise HermesMSGraphError(f"Error uploading {file_path}: {error}")
+                attempt += 1
+                backoff_spent += delay
+                self.__record_retry("PUT", upload_url, reason, delay)
+                time.sleep(delay)
+                offset = self.__upload_session_offset(upload_url, offset)
+
+    def __upload_session_offset(self, upload_url, offset):
+        """Next byte the upload session expects, or offset when the session cannot be queried."""
+        try:
+            response = self.__send("GET", upload_url)
+        except (requests.ConnectionError, requests.Timeout):
+            return offset
+        if response.status_code != 200:
+            return offset
+        return _next_expected_offset(response.json(), offset)
 
     def list_msgraph_permisions(self):
         import jwt
@@ -94,17 +551,139 @@ class HttpClient:
         if "roles" in decoded_token:
             print("Application Permissions:", decoded_token["roles"])
 
-    def get_json_response_by_url(self, url, get_value=True):
-        response = self.get(url)
+    def get_json_response_by_url(self, url, get_value=True, headers=None):
+        """
+        Fetches a URL and returns its JSON.
 
-        if response.status_code == 200:
-            try:
-                json_response = response.json()
-                return json_response.get("value", []) if get_value else json_response
-            except ValueError:
-                print(f"Invalid JSON response from {url}")
-                return None
-        else:
+        With get_value=True, returns the items of every page, following
+        @odata.nextLink; otherwise returns the JSON of the single response.
+        """
+        if get_value:
+            return list(self.iter_items(url, headers=headers))
+        return self.__fetch_page(url, headers)
+
+    def iter_pages(self, url, headers=None, prefetch=False):
+        """
+        Yields the JSON of each page of a collection, following @odata.nextLink.
+
+        Args:
+            url (str): The URL of the first page.
+            headers (dict, optional): Headers sent with every page request.
+            prefetch (bool, optional): Fetch the next page in a background thread
+                while the caller processes the current one. Defaults to False.
+
+        Yields:
+            dict: The JSON of each page, including @odata.nextLink/@odata.deltaLink.
+        """
+        if not prefetch:
+            while url:
+                page = self.__fetch_page(url, headers)
+                yield page
+                url = page.get("@odata.nextLink")
+            return
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hermes-prefetch")
+        try:
+            future = executor.submit(self.__fetch_page, url, headers)
+            while future is not None:
+                page = future.result()
+                next_url = page.get("@odata.nextLink")
+                future = executor.submit(self.__fetch_page, next_url, headers) if next_url else None
+                yield page
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def iter_items(self, url, headers=None, max_items=None, prefetch=False):
+        """
+        Yields the items of a collection page by page, in constant memory.
+
+        Args:
+            url (str): The URL of the first page.
+            headers (dict, optional): Headers sent with every page request.
+            max_items (int, optional): Stop after this many items. Defaults to all items.
+            prefetch (bool, optional): Fetch the next page in the background. Defaults to False.
+        """
+        if max_items is not None and max_items <= 0:
+            return
+        count = 0
+        pages = self.iter_pages(url, headers=headers, prefetch=prefetch)
+        try:
+            for page in pages:
+                for item in page.get("value", []):
+                    yield item
+                    count += 1
+                    if max_items is not None and count >= max_items:
+                        return
+        finally:
+            pages.close()
+
+    def __fetch_page(self, url, headers=None):
+        response = self.get(url, headers=headers)
+
+        if response.status_code != 200:
             raise HermesMSGraphError(
-                f"Error fetching data from {url}: {response.status_code} - {response.text}"
-            )
\ No newline at end of file
+                f"Error fetching data from {url}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+        try:
+            return json_loads(response.content)
+        except ValueError as e:
+            raise HermesMSGraphError(f"Invalid JSON response from {url}") from e
+
+    def batch(self, requests_list, max_retries=3):
+        """
+        Sends several Graph requests through the JSON $batch endpoint.
+
+        Requests are packed in batches of up to 20 sub-requests. Requests linked
+        through ``dependsOn`` are always sent in the same batch, as Graph requires.
+        Throttled sub-requests (429/503) are re-sent after their ``Retry-After``,
+        and so are 504 answers to idempotent methods.
+
+        Args:
+            requests_list (list): Dicts with ``method`` and ``url`` (absolute or relative
+                to v1.0) and optional ``id``, ``body``, ``headers`` and ``dependsOn``.
+            max_retries (int, optional): Retries for throttled sub-requests. Defaults to 3.
+
+        Returns:
+            list: One dict per request, in input order, with ``id``, ``status``,
+                ``headers`` and ``body``.
+        """
+        sub_requests = _build_batch_requests(requests_list, self.base_url)
+        responses = {}
+
+        for chunk in _split_batch_chunks(sub_requests):
+            pending = chunk
+            attempt = 0
+            while pending:
+                response = self.post(f"{self.base_url}/$batch", payload={"requests": pending})
+                chunk_responses = _parse_batch_responses(response, pending)
+                responses.update(chunk_responses)
+
+                if attempt >= max_retries:
+                    break
+                attempt += 1
+                delay, pending = _plan_batch_retry(chunk, pending, chunk_responses, attempt)
+                if pending:
+                    self.__record_retry("POST", f"{self.base_url}/$batch", "batch", delay)
+                    time.sleep(delay)
+
+        return [responses[request["id"]] for request in sub_requests]
+
+    def batch_get(self, urls, headers=None):
+        """
+        Fetches several resources with GET requests packed through $batch.
+
+        Args:
+            urls (list): URLs of the resources to fetch.
+            headers (dict, optional): Headers added to every sub-request.
+
+        Returns:
+            list: The JSON body of each resource, in input order, or None when not found.
+
+        Raises:
+            HermesMSGraphError: If any sub-request fails with a status other than 404.
+        """
+        responses = self.batch(_batch_get_requests(urls, headers))
+        return _batch_bodies(urls, responses)
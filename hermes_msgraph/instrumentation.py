@@ -0,0 +1,275 @@
+import bisect
+import re
+import threading
+from urllib.parse import unquote, urlsplit
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+DEFAULT_LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_GRAPH_VERSIONS = ("v1.0", "beta")
+_GUID = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+_KEY_IN_PARENTHESES = re.compile(r"\(([^)]+)\)")
+_ID_CHARACTERS = re.compile(r"[0-9=_+\-]")
+
+
+def _is_id(segment):
+    segment = unquote(segment)
+    if _GUID.match(segment) or "@" in segment or segment.isdigit():
+        return True
+    # Message, plan and task ids are long opaque strings; Graph path names have no digits.
+    return len(segment) >= 16 and bool(_ID_CHARACTERS.search(segment))
+
+
+def endpoint_template(url):
+    """
+    Endpoint of a URL with its ids replaced by {id}, without the query.
+
+    https://graph.microsoft.com/v1.0/users/a@b.com/mailFolders('inbox')/messages?$top=5
+    becomes /users/{id}/mailFolders({id})/messages. URLs outside the Graph API,
+    such as upload sessions, keep their host.
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split("/") if segment]
+    prefix = ""
+    if segments and segments[0] in _GRAPH_VERSIONS:
+        segments = segments[1:]
+    else:
+        prefix = parts.netloc
+
+    template = []
+    for segment in segments:
+        if _is_id(segment):
+            template.append("{id}")
+        else:
+            template.append(_KEY_IN_PARENTHESES.sub("({id})", segment))
+    return f"{prefix}/{'/'.join(template)}"
+
+
+class RequestHooks:
+    """
+    Receives the events of an HttpClient; override the methods you need.
+
+    before_request may add headers (e.g. client-request-id) or raise to cancel
+    the request. Every attempt is reported, retries included; responses served
+    by the response cache are not, since they never reach the network.
+    """
+
+    def before_request(self, method, url, headers):
+        pass
+
+    def after_request(self, method, url, response, elapsed, bytes_sent=0, error=None):
+        """
+        :param response: The requests.Response, or None when the request failed with error.
+        :param elapsed: Seconds until the headers arrived, or the whole body unless streaming.
+        """
+        pass
+
+    def on_retry(self, method, url, reason, delay):
+        """:param reason: The status code, or the exception name, that caused the retry."""
+        pass
+
+    def on_token_event(self, event, elapsed):
+        """:param event: "fetched", "loaded" (from the token cache file) or "invalidated"."""
+        pass
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "max")
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, buckets, value):
+        self.counts[bisect.bisect_left(buckets, value)] += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, buckets, q):
+        """Estimates a quantile by linear interpolation inside its bucket."""
+        total = sum(self.counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = buckets[index - 1] if index > 0 else 0.0
+                upper = buckets[index] if index < len(buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+
+class _EndpointStats:
+    __slots__ = ("latency", "statuses", "throttled", "retries", "errors", "bytes_sent", "bytes_received")
+
+    def __init__(self, buckets):
+        self.latency = _Histogram(buckets)
+        self.statuses = {}
+        self.throttled = 0
+        self.retries = {}
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+def _response_size(response):
+    if response.headers.get("Content-Length", "").isdigit():
+        return int(response.headers["Content-Length"])
+    # Only measure bodies already read; reading a streamed one here would consume it.
+    if response._content_consumed and isinstance(response._content, bytes):
+        return len(response._content)
+    return 0
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+
+
+class MetricsCollector(RequestHooks):
+    """
+    Request metrics by method and endpoint template, safe to share between clients and threads.
+
+    Records latency histograms, status codes, throttling (429), retries,
+    connection errors, bytes sent and received, and token events. Read them
+    with snapshot(), or to_prometheus() for the Prometheus text format.
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS, namespace="hermes_msgraph"):
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self.__endpoints = {}
+        self.__token_events = {}
+        self.__lock = threading.Lock()
+
+    def __endpoint(self, method, url):
+        key = (method, endpoint_template(url))
+        stats = self.__endpoints.get(key)
+        if stats is None:
+            stats = self.__endpoints[key] = _EndpointStats(self.buckets)
+        return stats
+
+    def after_request(self, method, url, response, elapsed, bytes_sent=0, error=None):
+        received = _response_size(response) if response is not None else 0
+        with self.__lock:
+            stats = self.__endpoint(method, url)
+            stats.latency.observe(self.buckets, elapsed)
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += received
+            if response is None:
+                stats.errors += 1
+                return
+            stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+            if response.status_code == 429:
+                stats.throttled += 1
+
+    def on_retry(self, method, url, reason, delay):
+        with self.__lock:
+            stats = self.__endpoint(method, url)
+            stats.retries[reason] = stats.retries.get(reason, 0) + 1
+
+    def on_token_event(self, event, elapsed):
+        with self.__lock:
+            count, seconds = self.__token_events.get(event, (0, 0.0))
+            self.__token_events[event] = (count + 1, seconds + elapsed)
+
+    def reset(self):
+        with self.__lock:
+            self.__endpoints.clear()
+            self.__token_events.clear()
+
+    def snapshot(self):
+        """
+        Metrics as a dict, endpoints keyed by "METHOD /template" and sorted by total time spent.
+        """
+        with self.__lock:
+            endpoints = {}
+            ordered = sorted(self.__endpoints.items(), key=lambda item: item[1].latency.sum, reverse=True)
+            for (method, template), stats in ordered:
+                latency = stats.latency
+                count = sum(latency.counts)
+                endpoints[f"{method} {template}"] = {
+                    "requests": count,
+                    "statuses": dict(stats.statuses),
+                    "errors": stats.errors,
+                    "throttled": stats.throttled,
+                    "retries": sum(stats.retries.values()),
+                    "retries_by_reason": dict(stats.retries),
+                    "bytes_sent": stats.bytes_sent,
+                    "bytes_received": stats.bytes_received,
+                    "latency_seconds": {
+                        "total": latency.sum,
+                        "mean": latency.sum / count if count else 0.0,
+                        "p50": latency.quantile(self.buckets, 0.5),
+                        "p95": latency.quantile(self.buckets, 0.95),
+                        "p99": latency.quantile(self.buckets, 0.99),
+                        "max": latency.max,
+                    },
+                }
+            token_events = {
+                event: {"count": count, "seconds": seconds} for event, (count, seconds) in self.__token_events.items()
+            }
+        return {"endpoints": endpoints, "token_events": token_events}
+
+    def to_prometheus(self):
+        """Metrics in the Prometheus text exposition format."""
+        name = self.namespace
+        lines = []
+
+        def header(metric, metric_type, description):
+            lines.append(f"# HELP {name}_{metric} {description}")
+            lines.append(f"# TYPE {name}_{metric} {metric_type}")
+
+        with self.__lock:
+            endpoints = sorted(self.__endpoints.items())
+
+            header("request_duration_seconds", "histogram", "Latency of Graph requests by endpoint template.")
+            for (method, template), stats in endpoints:
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), stats.latency.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_request_duration_seconds_bucket{{{_labels(method=method, endpoint=template, le=le)}}} {cumulative}")
+                labels = _labels(method=method, endpoint=template)
+                lines.append(f"{name}_request_duration_seconds_sum{{{labels}}} {stats.latency.sum}")
+                lines.append(f"{name}_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+            header("requests_total", "counter", "Graph responses by endpoint template and status code.")
+            for (method, template), stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f"{name}_requests_total{{{_labels(method=method, endpoint=template, status=status)}}} {count}")
+
+            header("request_errors_total", "counter", "Graph requests that failed without a response.")
+            for (method, template), stats in endpoints:
+                if stats.errors:
+                    lines.append(f"{name}_request_errors_total{{{_labels(method=method, endpoint=template)}}} {stats.errors}")
+
+            header("throttled_total", "counter", "Graph responses with status 429.")
+            for (method, template), stats in endpoints:
+                if stats.throttled:
+                    lines.append(f"{name}_throttled_total{{{_labels(method=method, endpoint=template)}}} {stats.throttled}")
+
+            header("retries_total", "counter", "Graph requests retried, by reason.")
+            for (method, template), stats in endpoints:
+                for reason, count in sorted(stats.retries.items(), key=lambda item: str(item[0])):
+                    lines.append(f"{name}_retries_total{{{_labels(method=method, endpoint=template, reason=reason)}}} {count}")
+
+            header("request_bytes_total", "counter", "Request body bytes sent to Graph.")
+            for (method, template), stats in endpoints:
+                lines.append(f"{name}_request_bytes_total{{{_labels(method=method, endpoint=template)}}} {stats.bytes_sent}")
+
+            header("response_bytes_total", "counter", "Response body bytes received from Graph.")
+            for (method, template), stats in endpoints:
+                lines.append(f"{name}_response_bytes_total{{{_labels(method=method, endpoint=template)}}} {stats.bytes_received}")
+
+            header("token_events_total", "counter", "Access token fetches, cache loads and invalidations.")
+            for event, (count, _) in sorted(self.__token_events.items()):
+                lines.append(f"{name}_token_events_total{{{_labels(event=event)}}} {count}")
+
+        return "\n".join(lines) + "\n"
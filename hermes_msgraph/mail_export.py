@@ -0,0 +1,143 @@
+import os
+from datetime import datetime
+
+from .exceptions import HermesMSGraphError
+
+# Columns kept by get_emails(format=pd.DataFrame), in the same order and names.
+EMAIL_COLUMNS = [
+    "subject",
+    "isRead",
+    "sentDateTime",
+    "receivedDateTime",
+    "sender.emailAddress.name",
+    "sender.emailAddress.address",
+    "from.emailAddress.name",
+    "from.emailAddress.address",
+    "bodyPreview",
+    "body.contentType",
+    "body.content",
+    "id",
+]
+
+# Top-level message properties needed for EMAIL_COLUMNS.
+EMAIL_SELECT = "subject,isRead,sentDateTime,receivedDateTime,sender,from,bodyPreview,body,id"
+
+_DATETIME_COLUMNS = ("sentDateTime", "receivedDateTime")
+_BOOLEAN_COLUMNS = ("isRead",)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise HermesMSGraphError(
+            "Parquet export requires pyarrow. Install it with: pip install hermes_msgraph[parquet]"
+        ) from e
+    return pyarrow
+
+
+def email_schema():
+    """Arrow schema of the exported emails."""
+    pa = _import_pyarrow()
+    fields = []
+    for column in EMAIL_COLUMNS:
+        if column in _DATETIME_COLUMNS:
+            fields.append(pa.field(column, pa.timestamp("us", tz="UTC")))
+        elif column in _BOOLEAN_COLUMNS:
+            fields.append(pa.field(column, pa.bool_()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def _parse_datetime(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _email_value(email, column):
+    value = email
+    for key in column.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    if column in _DATETIME_COLUMNS:
+        return _parse_datetime(value)
+    return value
+
+
+class ParquetMailWriter:
+    """
+    Writes emails to a directory of Parquet files, one record batch at a time.
+
+    Emails are buffered until batch_size rows and converted to a typed Arrow
+    record batch, so memory is bounded by the batch size. A new part file is
+    started every rows_per_file rows.
+    """
+
+    def __init__(self, directory, batch_size=10000, rows_per_file=1000000, compression="zstd"):
+        self.pa = _import_pyarrow()
+        self.directory = directory
+        self.batch_size = batch_size
+        self.rows_per_file = rows_per_file
+        self.compression = compression
+        self.schema = email_schema()
+        self.files = []
+        self.rows = 0
+        self.__columns = {column: [] for column in EMAIL_COLUMNS}
+        self.__buffered = 0
+        self.__writer = None
+        self.__file_rows = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, email):
+        for column, values in self.__columns.items():
+            values.append(_email_value(email, column))
+        self.__buffered += 1
+        if self.__buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.__buffered:
+            return
+        batch = self.pa.RecordBatch.from_arrays(
+            [self.pa.array(self.__columns[column], type=self.schema.field(column).type) for column in EMAIL_COLUMNS],
+            schema=self.schema,
+        )
+        self.__columns = {column: [] for column in EMAIL_COLUMNS}
+        self.__buffered = 0
+
+        offset = 0
+        while offset < batch.num_rows:
+            if self.__writer is None:
+                self.__open_file()
+            length = min(batch.num_rows - offset, self.rows_per_file - self.__file_rows)
+            self.__writer.write_batch(batch.slice(offset, length))
+            offset += length
+            self.__file_rows += length
+            self.rows += length
+            if self.__file_rows >= self.rows_per_file:
+                self.__close_file()
+
+    def close(self):
+        self.flush()
+        self.__close_file()
+
+    def __open_file(self):
+        path = os.path.join(self.directory, f"part-{len(self.files):05d}.parquet")
+        self.__writer = self.pa.parquet.ParquetWriter(path, self.schema, compression=self.compression)
+        self.__file_rows = 0
+        self.files.append(path)
+
+    def __close_file(self):
+        if self.__writer is not None:
+            self.__writer.close()
+            self.__writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
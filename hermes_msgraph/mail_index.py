@@ -0,0 +1,198 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import timedelta, timezone
+
+from .message_query import _parse_bound
+from .state_store import SQLiteStateStore
+
+
+def _like_pattern(pattern):
+    """Converts a * wildcard pattern into a LIKE pattern escaped with backslash."""
+    escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped.replace("*", "%")
+
+
+def _fts_query(text):
+    """FTS5 query matching every word of text; a trailing * on a word matches it as a prefix."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.strip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms)
+
+
+def _received_bound(value, name, upper):
+    """
+    A date bound in the UTC "YYYY-MM-DDTHH:MM:SSZ" form of the stored receivedDateTime,
+    so that it compares as text. Graph times have whole seconds: a fractional lower
+    bound is truncated and a fractional upper bound rounded up without changing
+    which messages match.
+    """
+    bound = _parse_bound(value, name).astimezone(timezone.utc)
+    if bound.microsecond:
+        bound = bound.replace(microsecond=0) + (timedelta(seconds=1) if upper else timedelta())
+    return bound.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SQLiteMailIndex:
+    """
+    Local index of synced messages, queried with the filters of get_emails.
+
+    Messages are stored with their JSON and the columns used by the filters.
+    Subject and sender accept * wildcards anywhere, as in get_emails, which
+    Graph cannot filter on. Free-text search over subject and body preview uses an
+    FTS5 table when the SQLite build supports it and LIKE otherwise. Delta
+    links of the syncs feeding the index are kept in the same database, in
+    state_store.
+    """
+
+    def __init__(self, path, table="hermes_messages"):
+        self.path = path
+        self.table = table
+        with self.__connect() as connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "id TEXT PRIMARY KEY, mailbox TEXT NOT NULL, folder_id TEXT, subject TEXT, "
+                "sender_address TEXT, received TEXT, has_attachments INTEGER, "
+                "internet_message_id TEXT, body_preview TEXT, data TEXT NOT NULL)"
+            )
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_received ON {self.table} (mailbox, received)"
+            )
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_sender ON {self.table} (mailbox, sender_address)"
+            )
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_internet_id ON {self.table} (internet_message_id)"
+            )
+            try:
+                connection.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table}_fts USING fts5(id UNINDEXED, subject, body_preview)"
+                )
+                self.full_text = True
+            except sqlite3.OperationalError:
+                self.full_text = False
+        self.state_store = SQLiteStateStore(path, table=f"{table}_state")
+
+    @contextmanager
+    def __connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def ingest(self, mailbox_address, messages=(), removed=()):
+        """
+        Adds or replaces messages and deletes removed ones.
+
+        :param mailbox_address: Mailbox the messages belong to.
+        :param messages: Messages as returned by Graph.
+        :param removed: Messages, or message IDs, to delete.
+        :return: The number of messages stored.
+        """
+        mailbox = mailbox_address.lower()
+        removed_ids = [(item["id"] if isinstance(item, dict) else item,) for item in removed]
+        rows = []
+        for message in messages:
+            sender = (message.get("sender") or message.get("from") or {}).get("emailAddress") or {}
+            rows.append((
+                message["id"],
+                mailbox,
+                message.get("parentFolderId"),
+                message.get("subject"),
+                (sender.get("address") or "").lower(),
+                message.get("receivedDateTime"),
+                int(bool(message.get("hasAttachments"))),
+                message.get("internetMessageId"),
+                message.get("bodyPreview"),
+                json.dumps(message),
+            ))
+
+        with self.__connect() as connection:
+            connection.executemany(f"DELETE FROM {self.table} WHERE id = ?", removed_ids)
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (id, mailbox, folder_id, subject, sender_address, received, "
+                "has_attachments, internet_message_id, body_preview, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if self.full_text:
+                connection.executemany(f"DELETE FROM {self.table}_fts WHERE id = ?", removed_ids + [(row[0],) for row in rows])
+                connection.executemany(
+                    f"INSERT INTO {self.table}_fts (id, subject, body_preview) VALUES (?, ?, ?)",
+                    [(row[0], row[3], row[8]) for row in rows],
+                )
+        return len(rows)
+
+    def query(
+        self,
+        mailbox_address,
+        subject=None,
+        folder_id=None,
+        sender=None,
+        n_of_messages=10,
+        has_attachments="",
+        greater_than_date=None,
+        less_than_date=None,
+        internet_message_id=None,
+        search=None,
+    ):
+        """
+        Returns the indexed messages matching the filters, newest first.
+
+        :param subject: Subject or * wildcard pattern, case-insensitive.
+        :param sender: Sender address or wildcard pattern, case-insensitive.
+        :param search: Words to find in the subject or body preview; "word*" matches a prefix.
+            Without FTS5 every word matches as a substring.
+        :param n_of_messages: Maximum number of messages, or "all".
+        Other parameters match get_emails; dates are ISO 8601 strings, naive ones in UTC.
+        :return: List of messages.
+        """
+        conditions = ["m.mailbox = ?"]
+        params = [mailbox_address.lower()]
+
+        def add(condition, *values):
+            conditions.append(condition)
+            params.extend(values)
+
+        if subject:
+            add("m.subject LIKE ? ESCAPE '\\'", _like_pattern(subject))
+        if sender:
+            add("m.sender_address LIKE ? ESCAPE '\\'", _like_pattern(sender.lower()))
+        if folder_id:
+            add("m.folder_id = ?", folder_id)
+        if has_attachments in (True, False):
+            add("m.has_attachments = ?", int(has_attachments))
+        if greater_than_date:
+            add("m.received > ?", _received_bound(greater_than_date, "greater_than_date", upper=False))
+        if less_than_date:
+            add("m.received < ?", _received_bound(less_than_date, "less_than_date", upper=True))
+        if internet_message_id:
+            add("m.internet_message_id = ?", internet_message_id)
+        if search:
+            if self.full_text:
+                add(f"m.id IN (SELECT id FROM {self.table}_fts WHERE {self.table}_fts MATCH ?)", _fts_query(search))
+            else:
+                for word in search.split():
+                    pattern = f"%{_like_pattern(word.strip('*'))}%"
+                    add("(m.subject LIKE ? ESCAPE '\\' OR m.body_preview LIKE ? ESCAPE '\\')", pattern, pattern)
+
+        sql = f"SELECT m.data FROM {self.table} m WHERE {' AND '.join(conditions)} ORDER BY m.received DESC"
+        if n_of_messages != "all":
+            sql += " LIMIT ?"
+            params.append(int(n_of_messages))
+
+        with self.__connect() as connection:
+            return [json.loads(data) for (data,) in connection.execute(sql, params)]
+
+    def count(self, mailbox_address=None):
+        with self.__connect() as connection:
+            if mailbox_address is None:
+                return connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            return connection.execute(
+                f"SELECT COUNT(*) FROM {self.table} WHERE mailbox = ?", (mailbox_address.lower(),)
+            ).fetchone()[0]
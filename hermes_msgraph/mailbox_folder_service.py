@@ -1,20 +1,27 @@
-from typing import List, Dict, Union
-import pandas as pd
-from http_client import HttpClient
-from exceptions import HermesMSGraphError
-from typing import Optional
+import time
+from typing import Iterator, List, Dict, Union
+from .http_client import HttpClient
+from .exceptions import HermesMSGraphError
+from .folder_cache import FolderCache, FolderIndex
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class MailboxFolderService:
-    def __init__(self, http_client: HttpClient):
+    def __init__(self, http_client: HttpClient, folder_cache: Optional[FolderCache] = None):
         self.http = http_client
+        self.folder_cache = folder_cache or FolderCache()
 
-    def get_mailbox_folders(self, mailbox_address: str) -> pd.DataFrame:
+    def get_mailbox_folders(self, mailbox_address: str) -> "pd.DataFrame":
         """
         Retrieve all mailbox folders for a given mailbox address and return as a DataFrame.
         :param mailbox_address: The email address of the mailbox.
         :return: DataFrame containing mailbox folders.
         """
+        import pandas as pd
+
         mail_folders = self.list_mailbox_folders(mailbox_address)
         df_mail_folders = pd.DataFrame(mail_folders)
         return df_mail_folders if not df_mail_folders.empty else pd.DataFrame()
@@ -25,18 +32,17 @@ class MailboxFolderService:
         :param mailbox_address: The email address of the mailbox.
         :return: List of mailbox folders.
         """
-        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/mailfolders/delta?$select=displayname"
-        all_folders = []
+        return self.get_folder_index(mailbox_address).folders()
 
-        while url:
-            data = self._fetch_data(url)
-            if data:
-                all_folders.extend(data.get("value", []))
-                url = data.get("@odata.nextLink")
-            else:
-                raise HermesMSGraphError(f"Failed to retrieve folders for {mailbox_address}")
-
-        return all_folders
+    def iter_mailbox_folders(self, mailbox_address: str, prefetch: bool = False) -> Iterator[Dict]:
+        """
+        Yield the mailbox folders for a given mailbox address page by page, bypassing the cache.
+        :param mailbox_address: The email address of the mailbox.
+        :param prefetch: Fetch the next page in the background while the current one is consumed.
+        :return: Generator of mailbox folders.
+        """
+        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/mailfolders/delta?$select=displayName,parentFolderId"
+        return self.http.iter_items(url, prefetch=prefetch)
 
     def validate_folder_id(self, mailbox_address: str, folder_id: str) -> bool:
         """
@@ -45,33 +51,72 @@ class MailboxFolderService:
         :param folder_id: The ID of the folder to validate.
         :return: True if the folder ID exists, False otherwise.
         """
-        df_folders = self.get_mailbox_folders(mailbox_address)
-        if not df_folders.empty:
-            return not df_folders.loc[df_folders["id"] == folder_id].empty
-        return False
+        return folder_id in self.get_folder_index(mailbox_address).by_id
 
     def get_folder_id(self, mailbox_address: str, folder_name: str) -> Optional[str]:
         """
         Retrieve the folder ID for a given folder name.
         :param mailbox_address: The email address of the mailbox.
-        :param folder_name: The name of the folder.
+        :param folder_name: The name of the folder, or its path for nested folders (e.g. "Inbox/Clients").
         :return: The folder ID if found, None otherwise.
         """
-        df_folders = self.get_mailbox_folders(mailbox_address)
+        if not folder_name:
+            return None
+        return self.get_folder_index(mailbox_address).get_id(folder_name)
 
-        if folder_name and not df_folders.empty:
-            folder_row = df_folders.loc[df_folders["displayName"] == folder_name]
-            if not folder_row.empty:
-                return folder_row["id"].iloc[0]
-        return None
+    def get_folder_index(self, mailbox_address: str, refresh: bool = False) -> FolderIndex:
+        """
+        Retrieve the cached folder index of a mailbox.
 
-    def _fetch_data(self, url: str) -> Dict:
+        The first call scans the folders with a delta query. Once the index is
+        older than the cache TTL (or refresh is True), only the changes since
+        that scan are fetched through its delta link.
+        :param mailbox_address: The email address of the mailbox.
+        :param refresh: Refresh the index even if it is not stale.
+        :return: The folder index of the mailbox.
         """
-        Helper method to fetch data from a given URL with error handling.
-        :param url: The URL to fetch data from.
-        :return: JSON response as a dictionary.
+        index = self.folder_cache.get(mailbox_address)
+        if index is None:
+            index = self.__scan_folders(mailbox_address)
+        elif refresh or self.folder_cache.is_stale(index):
+            index = self.__refresh_folders(mailbox_address, index)
+        else:
+            return index
+
+        self.folder_cache.put(mailbox_address, index)
+        return index
+
+    def invalidate_folder_cache(self, mailbox_address: Optional[str] = None) -> None:
         """
-        response = self.http.get(url)
-        if response.status_code != 200:
-            raise HermesMSGraphError(f"Failed to fetch data: {response.status_code} - {response.text}")
-        return response.json()
\ No newline at end of file
+        Drop the cached folders of a mailbox, or of every mailbox.
+        :param mailbox_address: The email address of the mailbox, None for all mailboxes.
+        """
+        self.folder_cache.invalidate(mailbox_address)
+
+    def __scan_folders(self, mailbox_address: str) -> FolderIndex:
+        url = f"https://graph.microsoft.com/v1.0/users/{mailbox_address}/mailfolders/delta?$select=displayName,parentFolderId"
+        index = FolderIndex()
+        self.__apply_delta(index, url)
+        return index
+
+    def __refresh_folders(self, mailbox_address: str, index: FolderIndex) -> FolderIndex:
+        if not index.delta_link:
+            return self.__scan_folders(mailbox_address)
+        try:
+            self.__apply_delta(index, index.delta_link)
+        except HermesMSGraphError as e:
+            if e.error_code != 410:
+                raise
+            return self.__scan_folders(mailbox_address)
+        return index
+
+    def __apply_delta(self, index: FolderIndex, url: str) -> None:
+        changes = []
+        delta_link = None
+        for page in self.http.iter_pages(url):
+            changes.extend(page.get("value", []))
+            delta_link = page.get("@odata.deltaLink", delta_link)
+
+        index.apply(changes)
+        index.delta_link = delta_link
+        index.fetched_at = time.monotonic()
@@ -0,0 +1,330 @@
+"""
+Query planner of get_emails: decides which filters Graph evaluates and which are checked locally.
+
+Graph filters messages on a small set of predicates and rejects the rest:
+
+- eq on subject, sender/emailAddress/address, internetMessageId and hasAttachments;
+- startswith on subject;
+- gt/lt ranges on receivedDateTime;
+- contains and endswith on subject are rejected;
+- $orderby needs its properties at the start of $filter, in the same order,
+  or Graph answers InefficientFilter;
+- $search (KQL) cannot be combined with $filter or $orderby.
+
+plan_message_query pushes every supported predicate into $filter, most selective
+first after the receivedDateTime range that $orderby relies on. A subject
+pattern Graph cannot filter on ("*report*", "*2024", "Q*report") is checked
+on each returned message instead. "*" is the only wildcard; "?" and every
+other character match themselves, so "Can you review?" is still an exact
+subject eq. When no sender or internetMessageId narrows
+the listing, the whole words of such a pattern are sent as a $search, whose
+results are a superset of the matches, rather than scanning the folder. Graph
+returns at most 1000 $search results, so a query asking for more messages, or
+for all of them, scans the folder with $filter instead.
+"""
+import re
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+
+from .exceptions import HermesMSGraphError
+from .http_client import page_size
+
+# Days added on each side of a KQL received range; KQL compares dates in the
+# mailbox time zone, so the exact bounds are checked locally.
+_SEARCH_DATE_SLACK = timedelta(days=1)
+# Graph returns at most this many results for a $search on messages.
+SEARCH_MAX_RESULTS = 1000
+_WORD = re.compile(r"\w+")
+# Characters left readable in $filter and $search; "#", "&", "+" and "%" in a
+# value would otherwise cut or change the query string.
+_QUERY_SAFE = " '\"/(),:*=<>$"
+
+
+def _has_wildcards(pattern):
+    return "*" in pattern
+
+
+def _literal(value):
+    """An OData string literal, with single quotes doubled."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _pattern_regex(pattern):
+    """Case-insensitive regex matching the whole value against a * wildcard pattern."""
+    translated = ".*".join(re.escape(part) for part in pattern.split("*"))
+    return re.compile(translated, re.IGNORECASE | re.DOTALL)
+
+
+def _prefix(pattern):
+    """The prefix of a "prefix*" pattern, or None when the pattern has other wildcards."""
+    prefix = pattern.rstrip("*")
+    if prefix and prefix != pattern and not _has_wildcards(prefix):
+        return prefix
+    return None
+
+
+def _kql_subject_terms(pattern):
+    """
+    KQL terms matched by every subject that matches pattern.
+
+    Only whole words, or word prefixes followed by a wildcard, are safe: in
+    "*monthly report*" the word before the wildcard may be the end of a longer
+    word ("bimonthly"), so the terms are just subject:report*.
+    """
+    terms = []
+    parts = pattern.split("*")
+    last = len(parts) - 1
+    for index, part in enumerate(parts):
+        for match in _WORD.finditer(part):
+            if match.start() == 0 and index > 0:
+                continue
+            complete = match.end() < len(part) or index == last
+            term = f"subject:{match.group()}" if complete else f"subject:{match.group()}*"
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+def _parse_datetime(value):
+    """Parses an ISO date or datetime; naive values are taken as UTC."""
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _parse_bound(value, name):
+    try:
+        return _parse_datetime(value)
+    except ValueError as e:
+        raise HermesMSGraphError(f"Invalid {name}. Must be a string in ISO format.") from e
+
+
+def _sender_address(message):
+    return ((message.get("sender") or {}).get("emailAddress") or {}).get("address") or ""
+
+
+class _Predicate:
+    """A get_emails filter: its $filter clause, if Graph supports it, and its local check."""
+
+    __slots__ = ("name", "clause", "rank", "fields", "check")
+
+    def __init__(self, name, clause, rank, fields, check):
+        self.name = name
+        self.clause = clause
+        # Lower ranks are more selective and come first in $filter.
+        self.rank = rank
+        self.fields = fields
+        self.check = check
+
+
+def _predicates(subject, sender, has_attachments, greater_than_date, less_than_date, internet_message_id):
+    predicates = []
+    if internet_message_id:
+        predicates.append(_Predicate(
+            "internet_message_id",
+            f"internetMessageId eq {_literal(internet_message_id)}",
+            0,
+            ("internetMessageId",),
+            lambda message: message.get("internetMessageId") == internet_message_id,
+        ))
+    if sender:
+        sender_regex = _pattern_regex(sender)
+        predicates.append(_Predicate(
+            "sender",
+            None if _has_wildcards(sender) else f"sender/emailAddress/address eq {_literal(sender)}",
+            1,
+            ("sender",),
+            lambda message: sender_regex.fullmatch(_sender_address(message)) is not None,
+        ))
+    if subject:
+        subject_regex = _pattern_regex(subject)
+        prefix = _prefix(subject)
+        if not _has_wildcards(subject):
+            clause = f"subject eq {_literal(subject)}"
+        elif prefix:
+            clause = f"startswith(subject, {_literal(prefix)})"
+        else:
+            clause = None
+        predicates.append(_Predicate(
+            "subject",
+            clause,
+            2,
+            ("subject",),
+            lambda message: subject_regex.fullmatch(message.get("subject") or "") is not None,
+        ))
+    if greater_than_date:
+        lower = _parse_bound(greater_than_date, "greater_than_date")
+        predicates.append(_Predicate(
+            "greater_than_date",
+            f"receivedDateTime gt {greater_than_date}",
+            3,
+            ("receivedDateTime",),
+            lambda message: bool(message.get("receivedDateTime")) and _parse_datetime(message["receivedDateTime"]) > lower,
+        ))
+    if less_than_date:
+        upper = _parse_bound(less_than_date, "less_than_date")
+        predicates.append(_Predicate(
+            "less_than_date",
+            f"receivedDateTime lt {less_than_date}",
+            3,
+            ("receivedDateTime",),
+            lambda message: bool(message.get("receivedDateTime")) and _parse_datetime(message["receivedDateTime"]) < upper,
+        ))
+    if has_attachments in (True, False):
+        predicates.append(_Predicate(
+            "has_attachments",
+            f"hasAttachments eq {str(has_attachments).lower()}",
+            4,
+            ("hasAttachments",),
+            lambda message: message.get("hasAttachments") is has_attachments,
+        ))
+    return predicates
+
+
+class MessageQueryPlan:
+    """
+    How a get_emails query runs: the $filter/$orderby or $search sent to Graph,
+    and the predicates checked on each message Graph returns.
+    """
+
+    def __init__(self, filters=(), orderby=None, search=None, local_predicates=(), max_items=None):
+        self.filters = list(filters)
+        self.orderby = orderby
+        self.search = search
+        self.local_predicates = list(local_predicates)
+        self.max_items = max_items
+
+    @property
+    def server_max_items(self):
+        """Items to read from Graph: all of them when some are still filtered out locally."""
+        return None if self.local_predicates else self.max_items
+
+    @property
+    def local_fields(self):
+        """Message properties the local predicates read, to add to $select."""
+        fields = []
+        for predicate in self.local_predicates:
+            fields.extend(field for field in predicate.fields if field not in fields)
+        return fields
+
+    def query(self):
+        """The query string of the messages request, without the leading "?"."""
+        params = []
+        if self.search:
+            search = f'"{self.search}"'
+            params.append(f"$search={quote(search, safe=_QUERY_SAFE)}")
+        if self.filters:
+            params.append(f"$filter={quote(' and '.join(self.filters), safe=_QUERY_SAFE)}")
+        if self.orderby:
+            params.append(f"$orderby={self.orderby}")
+        # Small pages only pay off when every returned message is kept.
+        params.append(f"$top={page_size(self.server_max_items)}")
+        return "&".join(params)
+
+    def matches(self, message):
+        """True when message passes every local predicate."""
+        for predicate in self.local_predicates:
+            if not predicate.check(message):
+                return False
+        return True
+
+    def apply(self, messages):
+        """Filters an iterable of messages by the local predicates and stops after max_items."""
+        if not self.local_predicates:
+            return messages
+        return self.__apply(messages)
+
+    def __apply(self, messages):
+        count = 0
+        try:
+            for message in messages:
+                if self.matches(message):
+                    yield message
+                    count += 1
+                    if self.max_items is not None and count >= self.max_items:
+                        return
+        finally:
+            close = getattr(messages, "close", None)
+            if close is not None:
+                close()
+
+    async def apply_async(self, messages):
+        """apply for an async iterable of messages."""
+        count = 0
+        try:
+            async for message in messages:
+                if self.matches(message):
+                    yield message
+                    count += 1
+                    if self.max_items is not None and count >= self.max_items:
+                        return
+        finally:
+            aclose = getattr(messages, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def describe(self):
+        """The plan as a dict, for logs and debugging."""
+        return {
+            "filter": " and ".join(self.filters) or None,
+            "orderby": self.orderby,
+            "search": self.search,
+            "local": [predicate.name for predicate in self.local_predicates],
+        }
+
+    def __repr__(self):
+        return f"MessageQueryPlan({self.describe()})"
+
+
+def plan_message_query(
+    subject=None,
+    sender=None,
+    n_of_messages=None,
+    has_attachments="",
+    greater_than_date=None,
+    less_than_date=None,
+    internet_message_id=None,
+):
+    """
+    Plans a get_emails query.
+
+    :param subject: Subject, or a pattern with * wildcards anywhere, case-insensitive.
+    :param sender: Sender address, or a wildcard pattern such as "*@contoso.com".
+    :param n_of_messages: Messages to return, or "all".
+    :return: A MessageQueryPlan.
+    """
+    predicates = _predicates(subject, sender, has_attachments, greater_than_date, less_than_date, internet_message_id)
+    max_items = None if n_of_messages in (None, "all") else n_of_messages
+    pushed = [predicate for predicate in predicates if predicate.clause]
+    local = [predicate for predicate in predicates if not predicate.clause]
+
+    # Without a sender or an internetMessageId in $filter, a subject pattern Graph
+    # cannot filter on would scan the folder; a $search reads only its candidates,
+    # but no more than SEARCH_MAX_RESULTS of them, so larger queries keep the scan.
+    narrowed = any(predicate.rank <= 1 for predicate in pushed)
+    search_fits = max_items is not None and max_items <= SEARCH_MAX_RESULTS
+    subject_terms = _kql_subject_terms(subject) if subject and any(p.name == "subject" for p in local) else []
+    if subject_terms and not narrowed and search_fits:
+        terms = list(subject_terms)
+        if greater_than_date:
+            lower = _parse_bound(greater_than_date, "greater_than_date") - _SEARCH_DATE_SLACK
+            terms.append(f"received>={lower.date().isoformat()}")
+        if less_than_date:
+            upper = _parse_bound(less_than_date, "less_than_date") + _SEARCH_DATE_SLACK
+            terms.append(f"received<={upper.date().isoformat()}")
+        # $search cannot be combined with $filter, so every predicate is checked locally.
+        return MessageQueryPlan(search=" AND ".join(terms), local_predicates=predicates, max_items=max_items)
+
+    # receivedDateTime leads $filter so $orderby=receivedDateTime desc is accepted.
+    pushed.sort(key=lambda predicate: (predicate.name not in ("greater_than_date", "less_than_date"), predicate.rank))
+    orderby = "receivedDateTime desc" if greater_than_date or less_than_date else None
+    return MessageQueryPlan(
+        filters=[predicate.clause for predicate in pushed],
+        orderby=orderby,
+        local_predicates=local,
+        max_items=max_items,
+    )
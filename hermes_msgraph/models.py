@@ -0,0 +1,268 @@
+"""
+Compact typed objects for the Graph resources the library returns most.
+
+Each model keeps its properties in __slots__ instead of a per-object dict, so
+a Message takes a fraction of the memory of the nested dicts of response.json().
+Properties use snake_case names (from_ for the "from" property) and are None
+when the response did not include them. Properties without a slot are kept in
+extra, OData annotations are dropped, and to_graph() rebuilds the Graph JSON.
+"""
+import json
+import sys
+
+try:
+    import orjson
+except ImportError:  # optional, pip install hermes_msgraph[fast]
+    orjson = None
+
+# Short strings repeated across many objects, such as addresses and enum values,
+# are interned so all the objects share a single copy.
+_intern = sys.intern
+
+
+def json_loads(content):
+    """Decodes a JSON body (bytes or str) with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _interned(value):
+    return _intern(value) if isinstance(value, str) else value
+
+
+def _many(decode):
+    def decode_all(values):
+        return tuple(map(decode, values))
+
+    return decode_all
+
+
+def _slots(fields):
+    return tuple(attribute for attribute, _, _ in fields) + ("extra",)
+
+
+# OData annotations present on most items; they are dropped without building extra.
+_ANNOTATIONS = frozenset(("@odata.etag", "@odata.type", "@odata.id", "@odata.context"))
+
+
+def _extra(data, known):
+    return {key: value for key, value in data.items() if key not in known and key[0] != "@"} or None
+
+
+def _build_from_graph(cls):
+    """
+    Generates the from_graph of a model, one statement per field, like dataclasses
+    generates __init__; a loop over _fields with setattr is about twice as slow.
+    """
+    namespace = {
+        "_new": object.__new__,
+        "_intern": _intern,
+        "_extra": _extra,
+        "_known": cls._keys | _ANNOTATIONS,
+        "_EMPTY": {},
+    }
+    lines = ["def from_graph(cls, data):"]
+    if cls._source:
+        lines.append(f"    data = data.get({cls._source!r}) or _EMPTY")
+    lines += ["    obj = _new(cls)", "    get = data.get"]
+    for index, (attribute, key, decode) in enumerate(cls._fields):
+        lines.append(f"    value = get({key!r})")
+        if decode is None:
+            lines.append(f"    obj.{attribute} = value")
+        elif decode is _interned:
+            lines.append(f"    obj.{attribute} = _intern(value) if type(value) is str else value")
+        else:
+            namespace[f"_decode_{index}"] = decode
+            lines.append(f"    obj.{attribute} = None if value is None else _decode_{index}(value)")
+    lines += ["    obj.extra = None if _known.issuperset(data) else _extra(data, _known)", "    return obj"]
+    exec("\n".join(lines), namespace)
+    from_graph = namespace["from_graph"]
+    from_graph.__qualname__ = f"{cls.__qualname__}.from_graph"
+    from_graph.__doc__ = "Builds the object from a Graph JSON dict."
+    return classmethod(from_graph)
+
+
+def _encode(value):
+    if isinstance(value, _Model):
+        return value.to_graph()
+    if isinstance(value, tuple):
+        return [_encode(item) for item in value]
+    return value
+
+
+class _Model:
+    """
+    Base of the models. _fields lists (attribute, Graph property, decoder) for
+    every slot; the decoder converts the JSON value, or is None to keep it.
+    _source names the property that nests the fields, e.g. "emailAddress".
+    """
+
+    __slots__ = ()
+    _fields = ()
+    _source = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._keys = frozenset(key for _, key, _ in cls._fields)
+        cls.from_graph = _build_from_graph(cls)
+
+    def __init__(self, extra=None, **properties):
+        for attribute, _, _ in self._fields:
+            setattr(self, attribute, properties.pop(attribute, None))
+        if properties:
+            raise TypeError(f"{type(self).__name__} has no properties {', '.join(sorted(properties))}")
+        self.extra = extra
+
+    def to_graph(self):
+        """The object as a Graph JSON dict, without the properties that are None."""
+        data = dict(self.extra) if self.extra else {}
+        for attribute, key, _ in self._fields:
+            value = getattr(self, attribute)
+            if value is not None:
+                data[key] = _encode(value)
+        return {self._source: data} if self._source else data
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, attribute) == getattr(other, attribute) for attribute in self.__slots__)
+
+    def __repr__(self):
+        properties = ", ".join(
+            f"{attribute}={getattr(self, attribute)!r}"
+            for attribute in self.__slots__
+            if getattr(self, attribute) is not None
+        )
+        return f"{type(self).__name__}({properties})"
+
+
+class Recipient(_Model):
+    """An emailAddress of a message or an event: name and address."""
+
+    _fields = (
+        ("name", "name", _interned),
+        ("address", "address", _interned),
+    )
+    _source = "emailAddress"
+    __slots__ = _slots(_fields)
+
+
+class ItemBody(_Model):
+    _fields = (
+        ("content_type", "contentType", _interned),
+        ("content", "content", None),
+    )
+    __slots__ = _slots(_fields)
+
+
+class Attachment(_Model):
+    """Attachment of a message; content_bytes is only set when it was requested."""
+
+    _fields = (
+        ("id", "id", None),
+        ("odata_type", "@odata.type", _interned),
+        ("name", "name", None),
+        ("content_type", "contentType", _interned),
+        ("size", "size", None),
+        ("is_inline", "isInline", None),
+        ("last_modified_date_time", "lastModifiedDateTime", None),
+        ("content_bytes", "contentBytes", None),
+    )
+    __slots__ = _slots(_fields)
+
+
+class Message(_Model):
+    _fields = (
+        ("id", "id", None),
+        ("subject", "subject", None),
+        ("body_preview", "bodyPreview", None),
+        ("body", "body", ItemBody.from_graph),
+        ("from_", "from", Recipient.from_graph),
+        ("sender", "sender", Recipient.from_graph),
+        ("to_recipients", "toRecipients", _many(Recipient.from_graph)),
+        ("cc_recipients", "ccRecipients", _many(Recipient.from_graph)),
+        ("bcc_recipients", "bccRecipients", _many(Recipient.from_graph)),
+        ("reply_to", "replyTo", _many(Recipient.from_graph)),
+        ("sent_date_time", "sentDateTime", None),
+        ("received_date_time", "receivedDateTime", None),
+        ("created_date_time", "createdDateTime", None),
+        ("last_modified_date_time", "lastModifiedDateTime", None),
+        ("is_read", "isRead", None),
+        ("is_draft", "isDraft", None),
+        ("has_attachments", "hasAttachments", None),
+        ("importance", "importance", _interned),
+        ("internet_message_id", "internetMessageId", None),
+        ("conversation_id", "conversationId", _interned),
+        ("parent_folder_id", "parentFolderId", _interned),
+        ("categories", "categories", _many(_interned)),
+        ("web_link", "webLink", None),
+        ("attachments", "attachments", _many(Attachment.from_graph)),
+    )
+    __slots__ = _slots(_fields)
+
+
+class MailFolder(_Model):
+    _fields = (
+        ("id", "id", None),
+        ("display_name", "displayName", None),
+        ("parent_folder_id", "parentFolderId", _interned),
+        ("child_folder_count", "childFolderCount", None),
+        ("unread_item_count", "unreadItemCount", None),
+        ("total_item_count", "totalItemCount", None),
+        ("is_hidden", "isHidden", None),
+    )
+    __slots__ = _slots(_fields)
+
+
+class User(_Model):
+    _fields = (
+        ("id", "id", None),
+        ("display_name", "displayName", None),
+        ("given_name", "givenName", None),
+        ("surname", "surname", None),
+        ("user_principal_name", "userPrincipalName", None),
+        ("mail", "mail", None),
+        ("job_title", "jobTitle", _interned),
+        ("department", "department", _interned),
+        ("office_location", "officeLocation", _interned),
+        ("mobile_phone", "mobilePhone", None),
+        ("business_phones", "businessPhones", tuple),
+        ("user_type", "userType", _interned),
+        ("account_enabled", "accountEnabled", None),
+    )
+    __slots__ = _slots(_fields)
+
+
+class PlannerTask(_Model):
+    """A Planner task; assignments keeps the Graph dict of assignments by user id."""
+
+    _fields = (
+        ("id", "id", None),
+        ("plan_id", "planId", _interned),
+        ("bucket_id", "bucketId", _interned),
+        ("title", "title", None),
+        ("percent_complete", "percentComplete", None),
+        ("priority", "priority", None),
+        ("order_hint", "orderHint", None),
+        ("start_date_time", "startDateTime", None),
+        ("due_date_time", "dueDateTime", None),
+        ("completed_date_time", "completedDateTime", None),
+        ("created_date_time", "createdDateTime", None),
+        ("assignments", "assignments", None),
+    )
+    __slots__ = _slots(_fields)
+
+
+def decode(model, content):
+    """
+    Decodes a Graph response body straight into model objects.
+
+    :param model: The model class, e.g. Message.
+    :param content: The JSON body, as bytes or str.
+    :return: A list of objects for a collection page (its "value"), else one object.
+    """
+    data = json_loads(content)
+    if isinstance(data, dict) and isinstance(data.get("value"), list):
+        return [model.from_graph(item) for item in data["value"]]
+    return model.from_graph(data)
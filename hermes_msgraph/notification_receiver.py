@@ -0,0 +1,218 @@
+import hmac
+import json
+import logging
+import queue
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BODY_BYTES = 4 * 1024 * 1024
+
+_SERVER_CLASS = None
+
+
+def _server_class():
+    """
+    The HTTP server class, defined on first use: http.server pulls in the email
+    package and mimetypes, which importing hermes_msgraph should not pay for.
+    """
+    global _SERVER_CLASS
+    if _SERVER_CLASS is not None:
+        return _SERVER_CLASS
+
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _NotificationHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            receiver = self.server.receiver
+            url = urlsplit(self.path)
+            if url.path != receiver.path:
+                self.__reply(404)
+                return
+
+            # Subscription validation: echo the token back as plain text within 10 seconds.
+            token = parse_qs(url.query).get("validationToken")
+            if token:
+                self.__discard_body()
+                self.__reply(200, token[0].encode("utf-8"), "text/plain; charset=utf-8")
+                return
+
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > receiver.max_body_bytes:
+                self.close_connection = True
+                self.__reply(413)
+                return
+            try:
+                notifications = json.loads(self.rfile.read(length) or b"{}").get("value", [])
+            except (ValueError, AttributeError):
+                self.__reply(400)
+                return
+
+            # Graph retries notifications not acknowledged within 3 seconds, so
+            # callbacks run on the dispatcher thread, after the reply.
+            self.__reply(202)
+            receiver._accept(notifications)
+
+        def do_GET(self):
+            self.__reply(405)
+
+        def __discard_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+
+        def __reply(self, status, body=b"", content_type=None):
+            self.send_response(status)
+            if content_type:
+                self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    class _NotificationServer(ThreadingHTTPServer):
+        daemon_threads = True
+
+        def __init__(self, address):
+            super().__init__(address, _NotificationHandler)
+
+    _SERVER_CLASS = _NotificationServer
+    return _SERVER_CLASS
+
+
+class NotificationReceiver:
+    """
+    Embeddable HTTP endpoint receiving Graph change notifications.
+
+    Answers subscription validation requests and acknowledges notification
+    posts right away. Notifications whose clientState does not match are
+    dropped; the others are put on notification_queue and, when a callback is
+    given, passed to it one at a time from a dispatcher thread. Lifecycle
+    notifications (reauthorizationRequired, subscriptionRemoved, missed) go to
+    lifecycle_callback when given, and are handled as the others otherwise.
+    Without a callback or a queue, notifications are read from self.queue.
+
+    Graph only calls public HTTPS URLs, so in production the receiver runs
+    behind a reverse proxy or tunnel terminating TLS.
+
+    :param host: Interface to listen on.
+    :param port: Port to listen on; 0 picks a free one.
+    :param path: URL path of the endpoint, used as notificationUrl behind the proxy.
+    :param client_state: Secret given to create_subscription; None accepts every notification.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=8080,
+        path="/notifications",
+        client_state=None,
+        callback=None,
+        notification_queue=None,
+        lifecycle_callback=None,
+        max_body_bytes=DEFAULT_MAX_BODY_BYTES,
+    ):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.client_state = client_state
+        self.callback = callback
+        self.lifecycle_callback = lifecycle_callback
+        self.max_body_bytes = max_body_bytes
+        self.queue = notification_queue
+        if self.queue is None and callback is None:
+            self.queue = queue.Queue()
+        self.__pending = queue.Queue()
+        self.__server = None
+        self.__threads = []
+        self.__stats = {"received": 0, "rejected": 0, "dispatched": 0, "callback_errors": 0}
+        self.__stats_lock = threading.Lock()
+
+    @property
+    def server_address(self):
+        return self.__server.server_address if self.__server is not None else (self.host, self.port)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self):
+        if self.__server is not None:
+            return self
+        self.__server = _server_class()((self.host, self.port))
+        self.__server.receiver = self
+        self.__threads = [
+            threading.Thread(target=self.__server.serve_forever, name="hermes-notification-server", daemon=True),
+        ]
+        if self.callback is not None or self.lifecycle_callback is not None:
+            self.__threads.append(threading.Thread(target=self.__dispatch, name="hermes-notification-dispatcher", daemon=True))
+        for thread in self.__threads:
+            thread.start()
+        logger.info(f"Listening for Graph notifications on {self.url}")
+        return self
+
+    def stop(self):
+        """Stops the server, then waits for the notifications already accepted to be dispatched."""
+        if self.__server is None:
+            return
+        self.__server.shutdown()
+        self.__server.server_close()
+        if len(self.__threads) > 1:
+            self.__pending.put(None)
+        for thread in self.__threads:
+            thread.join()
+        self.__server = None
+        self.__threads = []
+
+    def stats(self):
+        with self.__stats_lock:
+            return dict(self.__stats)
+
+    def _accept(self, notifications):
+        for notification in notifications:
+            if not isinstance(notification, dict):
+                continue
+            if self.client_state is not None and not hmac.compare_digest(
+                str(notification.get("clientState") or ""), self.client_state
+            ):
+                self.__record("rejected")
+                logger.warning(f"Dropped notification with a wrong clientState for {notification.get('subscriptionId')}")
+                continue
+            self.__record("received")
+            lifecycle = "lifecycleEvent" in notification and self.lifecycle_callback is not None
+            if self.queue is not None and not lifecycle:
+                self.queue.put(notification)
+            if lifecycle or self.callback is not None:
+                self.__pending.put(notification)
+
+    def __dispatch(self):
+        while True:
+            notification = self.__pending.get()
+            if notification is None:
+                return
+            callback = self.callback
+            if "lifecycleEvent" in notification and self.lifecycle_callback is not None:
+                callback = self.lifecycle_callback
+            try:
+                callback(notification)
+                self.__record("dispatched")
+            except Exception:
+                self.__record("callback_errors")
+                logger.exception(f"Notification callback failed for {notification.get('subscriptionId')}")
+
+    def __record(self, name):
+        with self.__stats_lock:
+            self.__stats[name] += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
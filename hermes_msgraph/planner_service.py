@@ -1,31 +1,34 @@
 from typing import List, Dict, Union
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from http_client import HttpClient
-from exceptions import HermesMSGraphError
+from .http_client import HttpClient
+from .exceptions import HermesMSGraphError
 
 logger = logging.getLogger(__name__)
 
+# Task ids per worker when task details are fetched in parallel $batch calls.
+TASK_DETAILS_CHUNK_SIZE = 100
+
+
+def _process_plans(plans: List[Dict]) -> List[Dict[str, str]]:
+    """Helper function to process plan data."""
+    return [
+        {
+            "id": plan["id"],
+            "title": plan["title"],
+            "owner": plan.get("owner", {}).get("user", {}).get("displayName", "N/A")
+        }
+        for plan in plans
+    ]
+
+
 class PlannerService:
     def __init__(self, http_client: HttpClient):
         self.http = http_client
 
-    def _process_plans(self, plans: List[Dict]) -> List[Dict[str, str]]:
-        """Helper method to process plan data."""
-        return [
-            {
-                "id": plan["id"],
-                "title": plan["title"],
-                "owner": plan.get("owner", {}).get("user", {}).get("displayName", "N/A")
-            }
-            for plan in plans
-        ]
-
     def _fetch_data(self, url: str) -> List[Dict]:
-        """Helper method to fetch data from a given URL with error handling."""
-        response = self.http.get(url)
-        if response.status_code != 200:
-            raise HermesMSGraphError(f"Failed to fetch data: {response.status_code} - {response.text}")
-        return response.json().get("value", [])
+        """Helper method to fetch every page of a collection with error handling."""
+        return list(self.http.iter_items(url))
 
     def list_plans_by_group_id(self, group_id: str, data: str = "all") -> Union[List[Dict], List[Dict[str, str]]]:
         """
@@ -36,7 +39,7 @@ class PlannerService:
         """
         url = f"https://graph.microsoft.com/v1.0/groups/{group_id}/planner/plans"
         plans = self._fetch_data(url)
-        return plans if data == "all" else self._process_plans(plans)
+        return plans if data == "all" else _process_plans(plans)
 
     def list_visible_plans_by_user_id(self, user_id: str) -> List[Dict[str, str]]:
         """
@@ -46,7 +49,7 @@ class PlannerService:
         """
         url = f"https://graph.microsoft.com/v1.0/users/{user_id}/planner/plans"
         plans = self._fetch_data(url)
-        return self._process_plans(plans)
+        return _process_plans(plans)
 
     def list_tasks_by_user_id(self, user_id: str) -> List[Dict]:
         """
@@ -57,4 +60,135 @@ class PlannerService:
         url = f"https://graph.microsoft.com/v1.0/users/{user_id}/planner/tasks"
         tasks = self._fetch_data(url)
         logger.debug(f"Fetched tasks for user {user_id}: {tasks}")
-        return tasks
\ No newline at end of file
+        return tasks
+
+    def list_tasks_by_plan_id(self, plan_id: str) -> List[Dict]:
+        """
+        List every task of a plan.
+        :param plan_id: The ID of the plan.
+        :return: List of tasks.
+        """
+        url = f"https://graph.microsoft.com/v1.0/planner/plans/{plan_id}/tasks"
+        return self._fetch_data(url)
+
+    def list_buckets_by_plan_id(self, plan_id: str) -> List[Dict]:
+        """
+        List the buckets of a plan.
+        :param plan_id: The ID of the plan.
+        :return: List of buckets.
+        """
+        url = f"https://graph.microsoft.com/v1.0/planner/plans/{plan_id}/buckets"
+        return self._fetch_data(url)
+
+    def get_planner_snapshot(
+        self,
+        group_ids: List[str] = None,
+        plan_ids: List[str] = None,
+        include_details: bool = True,
+        max_workers: int = 8,
+        format=dict,
+    ) -> Dict:
+        """
+        Export plans with their buckets, tasks and task details.
+        Plans are read from the groups and/or by ID, then the buckets and tasks
+        of every plan are paged through concurrently, and the task details are
+        fetched with $batch requests spread over the same worker pool. A plan,
+        group or chunk of task details that fails is reported in ``errors``
+        without stopping the others.
+        :param group_ids: Groups whose plans are exported.
+        :param plan_ids: Plans to export.
+        :param include_details: Also fetch the details (description, checklist, references) of every task.
+        :param max_workers: Maximum number of concurrent requests.
+        :param format: dict for lists of dicts, or pd.DataFrame for one DataFrame per collection.
+        :return: Dict with ``plans``, ``buckets``, ``tasks``, ``task_details`` and ``errors`` (message by plan, group or task ID).
+        """
+        if format is not dict:
+            import pandas as pd
+
+            if format is not pd.DataFrame:
+                raise HermesMSGraphError("Invalid format. Must be dict or pd.DataFrame")
+
+        snapshot = {"plans": [], "buckets": [], "tasks": [], "task_details": [], "errors": {}}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hermes-planner") as executor:
+            group_futures = {
+                group_id: executor.submit(self.list_plans_by_group_id, group_id) for group_id in group_ids or []
+            }
+            if plan_ids:
+                try:
+                    plans = self.get_plans_by_ids(plan_ids)
+                except Exception as e:
+                    plans = [None] * len(plan_ids)
+                    snapshot["errors"].update((plan_id, str(e)) for plan_id in plan_ids)
+                for plan_id, plan in zip(plan_ids, plans):
+                    if plan is not None:
+                        snapshot["plans"].append(plan)
+                    elif plan_id not in snapshot["errors"]:
+                        snapshot["errors"][plan_id] = "Plan not found."
+            for group_id, future in group_futures.items():
+                try:
+                    snapshot["plans"].extend(future.result())
+                except Exception as e:
+                    snapshot["errors"][group_id] = str(e)
+
+            unique_plans = {plan["id"]: plan for plan in snapshot["plans"]}
+            snapshot["plans"] = list(unique_plans.values())
+            # A plan missing by ID may still have been listed through its group.
+            snapshot["errors"] = {key: error for key, error in snapshot["errors"].items() if key not in unique_plans}
+
+            plan_futures = {
+                plan_id: (
+                    executor.submit(self.list_buckets_by_plan_id, plan_id),
+                    executor.submit(self.list_tasks_by_plan_id, plan_id),
+                )
+                for plan_id in unique_plans
+            }
+            for plan_id, (buckets_future, tasks_future) in plan_futures.items():
+                try:
+                    buckets, tasks = buckets_future.result(), tasks_future.result()
+                except Exception as e:
+                    snapshot["errors"][plan_id] = str(e)
+                    continue
+                snapshot["buckets"].extend(buckets)
+                snapshot["tasks"].extend(tasks)
+
+            if include_details:
+                task_ids = [task["id"] for task in snapshot["tasks"]]
+                chunks = [
+                    task_ids[start:start + TASK_DETAILS_CHUNK_SIZE]
+                    for start in range(0, len(task_ids), TASK_DETAILS_CHUNK_SIZE)
+                ]
+                chunk_futures = [(chunk, executor.submit(self.get_task_details_by_ids, chunk)) for chunk in chunks]
+                for chunk, future in chunk_futures:
+                    try:
+                        details = future.result()
+                    except Exception as e:
+                        snapshot["errors"].update((task_id, str(e)) for task_id in chunk)
+                        continue
+                    snapshot["task_details"].extend(detail for detail in details if detail is not None)
+
+        logger.info(
+            f"Planner snapshot: {len(snapshot['plans'])} plans, {len(snapshot['tasks'])} tasks, "
+            f"{len(snapshot['errors'])} errors"
+        )
+        if format is not dict:
+            for key in ("plans", "buckets", "tasks", "task_details"):
+                snapshot[key] = pd.json_normalize(snapshot[key])
+        return snapshot
+
+    def get_plans_by_ids(self, plan_ids: List[str]) -> List[Dict]:
+        """
+        Retrieve several plans by their IDs using batched requests.
+        :param plan_ids: The IDs of the plans.
+        :return: List of plans in the same order as plan_ids, None for plans not found.
+        """
+        urls = [f"https://graph.microsoft.com/v1.0/planner/plans/{plan_id}" for plan_id in plan_ids]
+        return self.http.batch_get(urls)
+
+    def get_task_details_by_ids(self, task_ids: List[str]) -> List[Dict]:
+        """
+        Retrieve the details of several tasks using batched requests.
+        :param task_ids: The IDs of the tasks.
+        :return: List of task details in the same order as task_ids, None for tasks not found.
+        """
+        urls = [f"https://graph.microsoft.com/v1.0/planner/tasks/{task_id}/details" for task_id in task_ids]
+        return self.http.batch_get(urls)
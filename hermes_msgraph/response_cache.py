@@ -0,0 +1,299 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_TTL = 0
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Seconds a response stays fresh, by regular expression matching the whole Graph
+# path; the first match wins. Only directory reads and Planner plans, which change
+# rarely, are listed; anything else is not cached unless default_ttl is raised.
+DEFAULT_CACHE_TTLS = {
+    r"/subscribedSkus": 3600,
+    r"/sites": 3600,
+    r"/users": 900,
+    r"/users/[^/]+": 900,
+    r"/(groups|users)/[^/]+/planner/plans": 300,
+    r"/planner/plans/[^/]+": 300,
+}
+
+# Path segments of mailbox contents and change feeds, which are never cached
+# whatever the rules say: they change with every delivery.
+_UNCACHEABLE_SEGMENT = re.compile(r"messages|mailfolders|(microsoft\.graph\.)?delta(\(.*\))?", re.IGNORECASE)
+
+# Response headers kept with a cached body.
+_CACHED_HEADERS = ("Content-Type", "ETag")
+
+
+def _graph_path(url):
+    """Path of a Graph URL without the API version: /v1.0/users/x -> /users/x"""
+    path = urlsplit(url).path
+    return "/" + path.lstrip("/").partition("/")[2].rstrip("/")
+
+
+def _collection_prefix(url):
+    """The URL of the top-level collection of a resource: .../v1.0/users/x/y -> .../v1.0/users"""
+    parts = urlsplit(url)
+    version, _, rest = parts.path.lstrip("/").partition("/")
+    collection = rest.split("/", 1)[0]
+    return urlunsplit((parts.scheme, parts.netloc, f"/{version}/{collection}", "", ""))
+
+
+class CacheEntry:
+    """A cached GET response with its validator and expiry time."""
+
+    __slots__ = ("url", "content", "headers", "etag", "expires_at")
+
+    def __init__(self, url, content, headers, etag, expires_at):
+        self.url = url
+        self.content = content
+        self.headers = headers
+        self.etag = etag
+        self.expires_at = expires_at
+
+    @property
+    def size(self):
+        return len(self.content)
+
+    def is_fresh(self):
+        return time.time() < self.expires_at
+
+    def to_response(self):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response.encoding = "utf-8"
+        return response
+
+
+class ResponseCache:
+    """
+    Cache of successful GET responses used by HttpClient.
+
+    A response is fresh for the TTL of the first ttl_rules regular expression
+    matching its whole path (relative to the Graph version root), or default_ttl;
+    a TTL of 0 means the response is not cached. Messages, mail folders and
+    delta queries are never cached. A stale entry
+    with an ETag is revalidated with If-None-Match; a 304 renews it without
+    downloading the body again. Entries are evicted least recently used first
+    once max_bytes is exceeded. Subclasses implement the storage.
+    """
+
+    def __init__(self, default_ttl=DEFAULT_CACHE_TTL, ttl_rules=None, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.default_ttl = default_ttl
+        self.ttl_rules = DEFAULT_CACHE_TTLS if ttl_rules is None else ttl_rules
+        self.max_bytes = max_bytes
+        self.__stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+        self.__stats_lock = threading.Lock()
+
+    def key(self, url, headers=None, scope=""):
+        """Cache key of a GET request; scope separates the entries of different clients."""
+        request_headers = sorted((name.lower(), value) for name, value in (headers or {}).items())
+        raw = json.dumps([scope, url, request_headers])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, url):
+        path = _graph_path(url)
+        if any(_UNCACHEABLE_SEGMENT.fullmatch(segment) for segment in path.split("/")):
+            return 0
+        for pattern, ttl in self.ttl_rules.items():
+            if re.fullmatch(pattern, path):
+                return ttl
+        return self.default_ttl
+
+    def is_cacheable(self, url):
+        return self.ttl_for(url) > 0
+
+    def invalidate_write(self, url, payload=None):
+        """
+        Drops the entries a write may have made stale: the whole collection the
+        written URL belongs to (a PATCH of /users/{id} changes the /users listing
+        too), or, for a $batch, the collections of its non-GET sub-requests.
+        """
+        if _graph_path(url) == "/$batch":
+            root = url.split("?", 1)[0][: -len("/$batch")]
+            for request in (payload or {}).get("requests", []):
+                if str(request.get("method", "GET")).upper() != "GET":
+                    self.invalidate(_collection_prefix(root + "/" + request.get("url", "").lstrip("/")))
+            return
+        self.invalidate(_collection_prefix(url))
+
+    def lookup(self, key):
+        """Returns the entry for key, fresh or stale, or None; fresh entries count as hits."""
+        entry = self.get(key)
+        if entry is not None and entry.is_fresh():
+            self._record("hits")
+        return entry
+
+    def record_miss(self):
+        self._record("misses")
+
+    def store(self, key, url, response):
+        ttl = self.ttl_for(url)
+        if ttl <= 0 or len(response.content) > self.max_bytes:
+            return
+        headers = {name: response.headers[name] for name in _CACHED_HEADERS if name in response.headers}
+        entry = CacheEntry(url, response.content, headers, response.headers.get("ETag"), time.time() + ttl)
+        evicted = self._put(key, entry)
+        self._record("stores")
+        if evicted:
+            self._record("evictions", evicted)
+
+    def renew(self, key, entry):
+        """Extends an entry after the server confirmed it with 304 Not Modified."""
+        entry.expires_at = time.time() + self.ttl_for(entry.url)
+        self._put(key, entry)
+        self._record("revalidated")
+
+    def _record(self, name, count=1):
+        with self.__stats_lock:
+            self.__stats[name] += count
+
+    def stats(self):
+        with self.__stats_lock:
+            stats = dict(self.__stats)
+        lookups = stats["hits"] + stats["misses"] + stats["revalidated"]
+        stats["hit_ratio"] = (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+        stats["entries"], stats["bytes"] = self._usage()
+        return stats
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def _put(self, key, entry):
+        """Stores entry and returns the number of entries evicted to make room."""
+        raise NotImplementedError
+
+    def invalidate(self, url_prefix=None):
+        """Drops every entry, or the entries whose URL starts with url_prefix."""
+        raise NotImplementedError
+
+    def _usage(self):
+        raise NotImplementedError
+
+
+class MemoryResponseCache(ResponseCache):
+    """Responses kept in memory for the lifetime of the process."""
+
+    def __init__(self, default_ttl=DEFAULT_CACHE_TTL, ttl_rules=None, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        super().__init__(default_ttl=default_ttl, ttl_rules=ttl_rules, max_bytes=max_bytes)
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                self.__entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        evicted = 0
+        with self.__lock:
+            previous = self.__entries.pop(key, None)
+            if previous is not None:
+                self.__bytes -= previous.size
+            self.__entries[key] = entry
+            self.__bytes += entry.size
+            while self.__bytes > self.max_bytes and len(self.__entries) > 1:
+                _, oldest = self.__entries.popitem(last=False)
+                self.__bytes -= oldest.size
+                evicted += 1
+        return evicted
+
+    def invalidate(self, url_prefix=None):
+        with self.__lock:
+            if url_prefix is None:
+                self.__entries.clear()
+                self.__bytes = 0
+                return
+            for key in [key for key, entry in self.__entries.items() if entry.url.startswith(url_prefix)]:
+                self.__bytes -= self.__entries.pop(key).size
+
+    def _usage(self):
+        with self.__lock:
+            return len(self.__entries), self.__bytes
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Responses kept in a SQLite database, shared between threads, processes and runs."""
+
+    def __init__(self, path, default_ttl=DEFAULT_CACHE_TTL, ttl_rules=None, max_bytes=DEFAULT_CACHE_MAX_BYTES, table="hermes_http_cache"):
+        super().__init__(default_ttl=default_ttl, ttl_rules=ttl_rules, max_bytes=max_bytes)
+        self.path = path
+        self.table = table
+        with self.__connect() as connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, url TEXT NOT NULL, content BLOB NOT NULL, headers TEXT NOT NULL, "
+                "etag TEXT, expires_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+
+    @contextmanager
+    def __connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key):
+        with self.__connect() as connection:
+            row = connection.execute(
+                f"SELECT url, content, headers, etag, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        url, content, headers, etag, expires_at = row
+        return CacheEntry(url, bytes(content), json.loads(headers), etag, expires_at)
+
+    def _put(self, key, entry):
+        with self.__connect() as connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, url, content, headers, etag, expires_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.url, entry.content, json.dumps(entry.headers), entry.etag, entry.expires_at, time.time(), entry.size),
+            )
+            total = connection.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                # Oldest accesses first, keeping the entry just stored.
+                rows = connection.execute(
+                    f"SELECT key, size FROM {self.table} WHERE key != ? ORDER BY accessed_at", (key,)
+                ).fetchall()
+                doomed = []
+                for old_key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append((old_key,))
+                    total -= size
+                connection.executemany(f"DELETE FROM {self.table} WHERE key = ?", doomed)
+                evicted = len(doomed)
+        return evicted
+
+    def invalidate(self, url_prefix=None):
+        with self.__connect() as connection:
+            if url_prefix is None:
+                connection.execute(f"DELETE FROM {self.table}")
+            else:
+                escaped = url_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                connection.execute(f"DELETE FROM {self.table} WHERE url LIKE ? ESCAPE '\\'", (f"{escaped}%",))
+
+    def _usage(self):
+        with self.__connect() as connection:
+            return connection.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
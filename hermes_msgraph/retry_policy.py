@@ -0,0 +1,112 @@
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+THROTTLING_STATUS_CODES = frozenset({429, 503})
+TRANSIENT_STATUS_CODES = frozenset({500, 502, 504})
+
+
+def parse_retry_after(value):
+    """Returns the delay in seconds of a Retry-After header (seconds or HTTP date), or None."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """
+    Decides which responses are retried and how long to wait.
+
+    429 and 503 are Graph throttling answers: the request was not processed,
+    so they are retried for every verb, waiting for Retry-After when present.
+    500/502/504 and connection errors are retried with jittered exponential
+    backoff only for idempotent verbs, unless retry_unsafe_methods is True.
+    A call gives up once max_retries is reached or the next wait would exceed
+    max_retry_time seconds spent backing off. Retry-After is honored in full,
+    not capped by max_backoff, since retrying earlier is throttled again; a
+    Retry-After longer than the time left makes the call give up at once.
+    """
+
+    def __init__(
+        self,
+        max_retries=5,
+        backoff_factor=0.5,
+        max_backoff=60.0,
+        max_retry_time=120.0,
+        retry_unsafe_methods=False,
+    ):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_retry_time = max_retry_time
+        self.retry_unsafe_methods = retry_unsafe_methods
+
+    def should_retry_status(self, method, status_code):
+        if status_code in THROTTLING_STATUS_CODES:
+            return True
+        if status_code in TRANSIENT_STATUS_CODES:
+            return self.retry_unsafe_methods or method.upper() in IDEMPOTENT_METHODS
+        return False
+
+    def should_retry_error(self, method):
+        return self.retry_unsafe_methods or method.upper() in IDEMPOTENT_METHODS
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before retry number attempt (starting at 1); Retry-After is never shortened."""
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** (attempt - 1)))
+        # Full jitter spreads retries of concurrent workers instead of synchronizing them.
+        return random.uniform(0, delay)
+
+    def allows(self, attempt, elapsed_backoff, delay):
+        return attempt <= self.max_retries and elapsed_backoff + delay <= self.max_retry_time
+
+
+NO_RETRY = RetryPolicy(max_retries=0)
+
+
+class RetryStats:
+    """Thread-safe counters of the retries made by a client."""
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.__lock:
+            self.retries = 0
+            self.retries_by_status = {}
+            self.backoff_seconds = 0.0
+            self.exhausted = 0
+
+    def record_retry(self, reason, delay):
+        with self.__lock:
+            self.retries += 1
+            self.retries_by_status[reason] = self.retries_by_status.get(reason, 0) + 1
+            self.backoff_seconds += delay
+
+    def record_exhausted(self):
+        with self.__lock:
+            self.exhausted += 1
+
+    def snapshot(self):
+        with self.__lock:
+            return {
+                "retries": self.retries,
+                "retries_by_status": dict(self.retries_by_status),
+                "backoff_seconds": self.backoff_seconds,
+                "exhausted": self.exhausted,
+            }
@@ -0,0 +1,283 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .email_service import EmailService
+from .exceptions import HermesMSGraphError
+from .retry_policy import NO_RETRY
+
+logger = logging.getLogger(__name__)
+
+# Exchange Online sending limits per mailbox.
+EXCHANGE_MESSAGES_PER_MINUTE = 30
+EXCHANGE_RECIPIENTS_PER_DAY = 10000
+GRAPH_CONCURRENT_REQUESTS_PER_MAILBOX = 4
+
+
+class TokenBucket:
+    """Token bucket holding up to capacity tokens, refilled continuously at refill_rate tokens per second."""
+
+    def __init__(self, capacity, refill_rate):
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def wait_time(self, tokens=1):
+        """Seconds until tokens are available, 0 if they are available now."""
+        self.__refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.refill_rate
+
+    def consume(self, tokens=1):
+        self.__refill()
+        self.tokens -= tokens
+
+    def __refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+
+class SenderQuota:
+    """Messages per minute, recipients per day and concurrent requests allowed to one sender mailbox."""
+
+    def __init__(self, messages_per_minute, recipients_per_day, max_concurrent):
+        self.messages = TokenBucket(messages_per_minute, messages_per_minute / 60.0)
+        self.recipients = TokenBucket(recipients_per_day, recipients_per_day / 86400.0)
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+
+    def reserve(self, recipients):
+        """Takes the quota for one message if available now; otherwise returns the seconds to wait."""
+        if self.in_flight >= self.max_concurrent:
+            return 0.05
+        delay = max(self.messages.wait_time(1), self.recipients.wait_time(recipients))
+        if delay > 0:
+            return delay
+        self.messages.consume(1)
+        self.recipients.consume(recipients)
+        self.in_flight += 1
+        return 0.0
+
+    def release(self):
+        self.in_flight -= 1
+
+
+class SendDispatcher:
+    """
+    Sends queued emails concurrently while respecting per-sender quotas.
+
+    Each sender mailbox gets its own token buckets for messages per minute and
+    recipients per day (Exchange Online limits by default) and a cap of
+    concurrent requests. Throttled messages (429/503) are requeued after their
+    Retry-After instead of blocking a worker. run() returns the outcome of every
+    message and throughput statistics.
+
+    Example:
+        dispatcher = SendDispatcher(graph.email_service, max_workers=16)
+        for row in rows:
+            dispatcher.submit(row.sender, row.subject, row.body, row.to)
+        report = dispatcher.run()
+    """
+
+    def __init__(
+        self,
+        email_service: EmailService,
+        max_workers=8,
+        messages_per_minute=EXCHANGE_MESSAGES_PER_MINUTE,
+        recipients_per_day=EXCHANGE_RECIPIENTS_PER_DAY,
+        max_concurrent_per_sender=GRAPH_CONCURRENT_REQUESTS_PER_MAILBOX,
+        max_attempts=5,
+    ):
+        self.email_service = email_service
+        self.max_workers = max_workers
+        self.messages_per_minute = messages_per_minute
+        self.recipients_per_day = recipients_per_day
+        self.max_concurrent_per_sender = max_concurrent_per_sender
+        self.max_attempts = max_attempts
+        self.__queue = []
+        self.__sequence = itertools.count()
+        self.__quotas = {}
+        self.__lock = threading.Lock()
+
+    def submit(self, sender_mail, subject, body, to_address, cc_address=None, attachments=None, body_type="Text", key=None):
+        """
+        Queues an email. Accepts the same arguments as EmailService.send_email.
+
+        Args:
+            key (optional): Identifier reported with the outcome of the message.
+                Defaults to the position of the message in the queue.
+
+        Returns:
+            The key of the message.
+        """
+        sequence = next(self.__sequence)
+        message = {
+            "key": sequence if key is None else key,
+            "sequence": sequence,
+            "sender_mail": sender_mail,
+            "subject": subject,
+            "body": body,
+            "to_address": to_address,
+            "cc_address": cc_address,
+            "attachments": attachments,
+            "body_type": body_type,
+            "attempts": 0,
+        }
+        with self.__lock:
+            heapq.heappush(self.__queue, (0.0, sequence, message))
+        return message["key"]
+
+    def run(self):
+        """
+        Sends every queued email and blocks until all of them are sent or failed.
+
+        Returns:
+            dict: ``results`` (one dict per message, in submission order, with key,
+                sender, status "sent"/"failed", attempts, status_code and error) and
+                ``stats`` (sent, failed, throttled, elapsed_seconds, messages_per_second).
+        """
+        started_at = time.monotonic()
+        results = {}
+        throttled = 0
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hermes-send") as executor:
+            while True:
+                with self.__lock:
+                    queue_empty = not self.__queue
+                if queue_empty and not in_flight:
+                    break
+
+                next_ready_at = self.__dispatch_ready(executor, in_flight, results)
+
+                if next_ready_at is None or len(in_flight) >= self.max_workers:
+                    timeout = None
+                else:
+                    timeout = max(0.0, next_ready_at - time.monotonic())
+                if in_flight:
+                    done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    done = ()
+                    time.sleep(timeout or 0)
+
+                for future in done:
+                    message = in_flight.pop(future)
+                    self.__quota(message["sender_mail"]).release()
+                    outcome = future.result()
+                    if outcome["status"] == "throttled" and message["attempts"] < self.max_attempts:
+                        throttled += 1
+                        logger.debug(f"Message {message['key']} throttled, retrying in {outcome['retry_after']}s")
+                        with self.__lock:
+                            ready_at = time.monotonic() + outcome["retry_after"]
+                            heapq.heappush(self.__queue, (ready_at, message["sequence"], message))
+                        continue
+                    if outcome["status"] == "throttled":
+                        throttled += 1
+                        outcome["status"] = "failed"
+                    results[message["sequence"]] = self.__result(message, outcome)
+
+        elapsed = time.monotonic() - started_at
+        ordered_results = [results[sequence] for sequence in sorted(results)]
+        sent = sum(1 for result in ordered_results if result["status"] == "sent")
+        return {
+            "results": ordered_results,
+            "stats": {
+                "sent": sent,
+                "failed": len(ordered_results) - sent,
+                "throttled": throttled,
+                "elapsed_seconds": elapsed,
+                "messages_per_second": sent / elapsed if elapsed > 0 else 0.0,
+            },
+        }
+
+    def __dispatch_ready(self, executor, in_flight, results):
+        """Starts the messages whose time and sender quota allow it; returns when the next one is due."""
+        now = time.monotonic()
+        postponed = []
+        with self.__lock:
+            while self.__queue and self.__queue[0][0] <= now and len(in_flight) < self.max_workers:
+                _, sequence, message = heapq.heappop(self.__queue)
+                recipients = _count_recipients(message)
+                quota = self.__quota(message["sender_mail"])
+
+                if recipients > quota.recipients.capacity:
+                    results[sequence] = self.__result(
+                        message,
+                        {"status": "failed", "status_code": None, "error": "Too many recipients for the daily sender quota."},
+                    )
+                    continue
+
+                delay = quota.reserve(recipients)
+                if delay > 0:
+                    postponed.append((now + delay, sequence, message))
+                    continue
+
+                message["attempts"] += 1
+                in_flight[executor.submit(self.__send, message)] = message
+
+            for entry in postponed:
+                heapq.heappush(self.__queue, entry)
+            return self.__queue[0][0] if self.__queue else None
+
+    def __quota(self, sender_mail):
+        key = sender_mail.lower()
+        if key not in self.__quotas:
+            self.__quotas[key] = SenderQuota(
+                self.messages_per_minute, self.recipients_per_day, self.max_concurrent_per_sender
+            )
+        return self.__quotas[key]
+
+    def __send(self, message):
+        try:
+            # Throttling is handled by requeuing, so the worker is not blocked in a backoff sleep.
+            response = self.email_service.send_email(
+                message["sender_mail"],
+                message["subject"],
+                message["body"],
+                message["to_address"],
+                cc_address=message["cc_address"],
+                attachments=message["attachments"],
+                body_type=message["body_type"],
+                retry_policy=NO_RETRY,
+            )
+        except HermesMSGraphError as e:
+            if e.error_code in (429, 503):
+                return {
+                    "status": "throttled",
+                    "status_code": e.error_code,
+                    "error": str(e),
+                    "retry_after": e.retry_after if e.retry_after is not None else 2.0 ** message["attempts"],
+                }
+            return {"status": "failed", "status_code": e.error_code, "error": str(e)}
+        except Exception as e:
+            # A worker must always report an outcome, or run() would lose the message.
+            logger.exception(f"Unexpected error sending message {message['key']}")
+            return {"status": "failed", "status_code": None, "error": f"{type(e).__name__}: {e}"}
+        return {"status": "sent", "status_code": response.status_code, "error": None}
+
+    def __result(self, message, outcome):
+        return {
+            "key": message["key"],
+            "sender": message["sender_mail"],
+            "status": outcome["status"],
+            "attempts": message["attempts"],
+            "status_code": outcome.get("status_code"),
+            "error": outcome.get("error"),
+        }
+
+
+def _count_recipients(message):
+    count = 0
+    for addresses in (message["to_address"], message["cc_address"]):
+        if not addresses:
+            continue
+        if isinstance(addresses, str):
+            addresses = addresses.split(";")
+        count += len(addresses)
+    return count
@@ -0,0 +1,121 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .exceptions import HermesMSGraphError
+from .token_provider import _file_lock
+
+
+class StateStore:
+    """
+    Key/value store for sync state such as delta links.
+
+    Values are JSON-serializable dicts. Subclasses implement get, set and delete.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class MemoryStateStore(StateStore):
+    """State kept in memory for the lifetime of the process."""
+
+    def __init__(self):
+        self.__state = {}
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        with self.__lock:
+            return self.__state.get(key)
+
+    def set(self, key, value):
+        with self.__lock:
+            self.__state[key] = value
+
+    def delete(self, key):
+        with self.__lock:
+            self.__state.pop(key, None)
+
+
+class FileStateStore(StateStore):
+    """State kept in a JSON file, safe to share between processes."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get(self, key):
+        with _file_lock(f"{self.path}.lock"):
+            return self.__read().get(key)
+
+    def set(self, key, value):
+        with _file_lock(f"{self.path}.lock"):
+            state = self.__read()
+            state[key] = value
+            self.__write(state)
+
+    def delete(self, key):
+        with _file_lock(f"{self.path}.lock"):
+            state = self.__read()
+            if state.pop(key, None) is not None:
+                self.__write(state)
+
+    def __read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            raise HermesMSGraphError(f"Invalid state file {self.path}") from e
+
+    def __write(self, state):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(temp_path, self.path)
+
+
+class SQLiteStateStore(StateStore):
+    """State kept in a SQLite database, safe to share between threads and processes."""
+
+    def __init__(self, path, table="hermes_state"):
+        self.path = path
+        self.table = table
+        with self.__connect() as connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def __connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key):
+        with self.__connect() as connection:
+            row = connection.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value):
+        with self.__connect() as connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value) VALUES (?, ?)", (key, json.dumps(value))
+            )
+
+    def delete(self, key):
+        with self.__connect() as connection:
+            connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
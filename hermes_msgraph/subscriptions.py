@@ -0,0 +1,242 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from .exceptions import HermesMSGraphError
+from .http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+# Longest subscription lifetime Graph accepts, in minutes, by resource type.
+MAX_SUBSCRIPTION_MINUTES = {"messages": 10070, "users": 41760}
+DEFAULT_SUBSCRIPTION_MINUTES = 4230
+
+
+def _max_minutes(resource: str) -> int:
+    for resource_type, minutes in MAX_SUBSCRIPTION_MINUTES.items():
+        if resource.rstrip("/").split("?")[0].endswith(resource_type):
+            return minutes
+    return DEFAULT_SUBSCRIPTION_MINUTES
+
+
+def _expiration(minutes: int) -> str:
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=minutes)
+    return expires_at.strftime("%Y-%m-%dT%H:%M:%S.0000000Z")
+
+
+def _parse_expiration(value: str) -> datetime:
+    # Graph returns seven fractional digits, more than fromisoformat accepts before Python 3.11.
+    return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+class SubscriptionService:
+    """
+    Creates, renews and deletes Graph change-notification subscriptions.
+
+    Subscriptions created or renewed through the service are tracked, so a
+    SubscriptionRenewer can extend them before they expire.
+    """
+
+    def __init__(self, http_client: HttpClient):
+        self.http = http_client
+        self.subscriptions: Dict[str, Dict] = {}
+        self.__lock = threading.Lock()
+
+    def create_subscription(
+        self,
+        resource: str,
+        notification_url: str,
+        change_type: str = "created",
+        expiration_minutes: Optional[int] = None,
+        client_state: Optional[str] = None,
+        lifecycle_notification_url: Optional[str] = None,
+    ) -> Dict:
+        """
+        Create a subscription.
+        :param resource: Graph resource, e.g. "users/{id}/messages".
+        :param notification_url: Public HTTPS URL of the NotificationReceiver.
+        :param change_type: Comma separated "created", "updated" and/or "deleted".
+        :param expiration_minutes: Lifetime; defaults to the longest allowed for the resource.
+        :param client_state: Secret echoed in every notification, checked by the receiver.
+        :param lifecycle_notification_url: URL receiving reauthorizationRequired and subscriptionRemoved events.
+        :return: The subscription.
+        :raises HermesMSGraphError: If Graph rejects the subscription (e.g. the validation request failed).
+        """
+        payload = {
+            "changeType": change_type,
+            "notificationUrl": notification_url,
+            "resource": resource,
+            "expirationDateTime": _expiration(expiration_minutes or _max_minutes(resource)),
+        }
+        if client_state:
+            payload["clientState"] = client_state
+        if lifecycle_notification_url:
+            payload["lifecycleNotificationUrl"] = lifecycle_notification_url
+
+        response = self.http.post("https://graph.microsoft.com/v1.0/subscriptions", payload=payload)
+        if response.status_code != 201:
+            raise HermesMSGraphError(
+                f"Error creating subscription for {resource}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+        subscription = response.json()
+        self.__track(subscription)
+        logger.info(f"Subscribed to {resource} until {subscription['expirationDateTime']}")
+        return subscription
+
+    def subscribe_to_messages(
+        self,
+        mailbox_address: str,
+        notification_url: str,
+        folder_id: Optional[str] = None,
+        change_type: str = "created",
+        **options,
+    ) -> Dict:
+        """
+        Subscribe to the messages of a mailbox, or of one of its folders.
+        :param mailbox_address: The email address of the mailbox.
+        :param notification_url: Public HTTPS URL of the NotificationReceiver.
+        :param folder_id: Folder ID or well-known name ("inbox"); all messages when None.
+        :param change_type: Comma separated "created", "updated" and/or "deleted".
+        :param options: Other arguments of create_subscription.
+        :return: The subscription.
+        """
+        resource = f"users/{mailbox_address}/messages"
+        if folder_id:
+            resource = f"users/{mailbox_address}/mailFolders('{folder_id}')/messages"
+        return self.create_subscription(resource, notification_url, change_type=change_type, **options)
+
+    def subscribe_to_users(self, notification_url: str, change_type: str = "updated,deleted", **options) -> Dict:
+        """
+        Subscribe to changes of the users of the tenant.
+        :param notification_url: Public HTTPS URL of the NotificationReceiver.
+        :param change_type: Comma separated "updated" and/or "deleted".
+        :param options: Other arguments of create_subscription.
+        :return: The subscription.
+        """
+        return self.create_subscription("users", notification_url, change_type=change_type, **options)
+
+    def renew_subscription(self, subscription_id: str, expiration_minutes: Optional[int] = None) -> Dict:
+        """
+        Extend the expiration of a subscription.
+        :param subscription_id: The ID of the subscription.
+        :param expiration_minutes: New lifetime from now; defaults to the longest allowed for the resource.
+        :return: The renewed subscription.
+        :raises HermesMSGraphError: If the subscription no longer exists or cannot be renewed.
+        """
+        with self.__lock:
+            tracked = self.subscriptions.get(subscription_id)
+        minutes = expiration_minutes or _max_minutes(tracked["resource"] if tracked else "")
+
+        url = f"https://graph.microsoft.com/v1.0/subscriptions/{subscription_id}"
+        response = self.http.patch(url, payload={"expirationDateTime": _expiration(minutes)})
+        if response.status_code != 200:
+            if response.status_code == 404:
+                self.__untrack(subscription_id)
+            raise HermesMSGraphError(
+                f"Error renewing subscription {subscription_id}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+        subscription = response.json()
+        self.__track(subscription)
+        return subscription
+
+    def delete_subscription(self, subscription_id: str) -> None:
+        """
+        Delete a subscription.
+        :param subscription_id: The ID of the subscription.
+        :raises HermesMSGraphError: If the request fails with a status other than 404.
+        """
+        url = f"https://graph.microsoft.com/v1.0/subscriptions/{subscription_id}"
+        response = self.http.delete(url)
+        self.__untrack(subscription_id)
+        if response.status_code not in (204, 404):
+            raise HermesMSGraphError(
+                f"Error deleting subscription {subscription_id}: {response.status_code} - {response.text}",
+                error_code=response.status_code,
+            )
+
+    def list_subscriptions(self) -> List[Dict]:
+        """
+        List the active subscriptions of the application.
+        :return: List of subscriptions.
+        """
+        return list(self.http.iter_items("https://graph.microsoft.com/v1.0/subscriptions"))
+
+    def due_for_renewal(self, renew_before: float) -> List[Dict]:
+        """
+        Tracked subscriptions expiring within renew_before seconds.
+        :param renew_before: Seconds before expiration.
+        :return: List of subscriptions.
+        """
+        deadline = datetime.now(timezone.utc) + timedelta(seconds=renew_before)
+        with self.__lock:
+            return [
+                subscription for subscription in self.subscriptions.values()
+                if _parse_expiration(subscription["expirationDateTime"]) <= deadline
+            ]
+
+    def __track(self, subscription):
+        with self.__lock:
+            previous = self.subscriptions.get(subscription["id"], {})
+            self.subscriptions[subscription["id"]] = {**previous, **subscription}
+
+    def __untrack(self, subscription_id):
+        with self.__lock:
+            self.subscriptions.pop(subscription_id, None)
+
+
+class SubscriptionRenewer:
+    """
+    Background thread renewing the subscriptions of a SubscriptionService.
+
+    Every check_interval seconds, subscriptions expiring within renew_before
+    seconds are renewed to their longest lifetime. Subscriptions that no longer
+    exist are dropped; other failures are logged and retried on the next check.
+    """
+
+    def __init__(self, subscription_service: SubscriptionService, renew_before: float = 3600, check_interval: float = 60):
+        self.subscription_service = subscription_service
+        self.renew_before = renew_before
+        self.check_interval = check_interval
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def renew_due(self) -> List[Dict]:
+        """
+        Renew the subscriptions due now.
+        :return: The renewed subscriptions.
+        """
+        renewed = []
+        for subscription in self.subscription_service.due_for_renewal(self.renew_before):
+            try:
+                renewed.append(self.subscription_service.renew_subscription(subscription["id"]))
+            except Exception as e:
+                # Any failure, not only Graph errors, must not kill the renewer thread.
+                logger.warning(f"Could not renew subscription {subscription['id']}: {e}")
+        return renewed
+
+    def start(self) -> "SubscriptionRenewer":
+        if self.__thread is None or not self.__thread.is_alive():
+            self.__stop.clear()
+            self.__thread = threading.Thread(target=self.__run, name="hermes-subscription-renewer", daemon=True)
+            self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self):
+        while not self.__stop.is_set():
+            self.renew_due()
+            self.__stop.wait(self.check_interval)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
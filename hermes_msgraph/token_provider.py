@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from .exceptions import HermesMSGraphError
+
+DEFAULT_REFRESH_MARGIN = 300
+# (connect, read) timeouts in seconds of the token request.
+DEFAULT_TOKEN_TIMEOUT = (10, 30)
+# Microsoft Entra ID endpoint of the public cloud.
+DEFAULT_AUTHORITY = "https://login.microsoftonline.com"
+
+
+@contextmanager
+def _file_lock(lock_path):
+    """Exclusive lock on lock_path shared by every process on the machine."""
+    with open(lock_path, "a+") as lock_file:
+        if os.name == "nt":
+            import msvcrt
+
+            lock_file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class TokenProvider:
+    """
+    Client credentials token source shared by HttpClient and AsyncHttpClient.
+
+    The token is requested on first use and refreshed refresh_margin seconds
+    before it expires. Concurrent callers wait for a single refresh. When
+    cache_path is set, the token is also stored in that file, so every process
+    of the same client/tenant reuses it; the file is guarded by a lock file
+    and never stores the client secret. authority points the token request at
+    another cloud, or at a local fake server in benchmarks.
+    """
+
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        tenant_id,
+        session=None,
+        refresh_margin=DEFAULT_REFRESH_MARGIN,
+        cache_path=None,
+        timeout=DEFAULT_TOKEN_TIMEOUT,
+        authority=DEFAULT_AUTHORITY,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.tenant_id = tenant_id
+        self.session = session or requests.Session()
+        self.refresh_margin = refresh_margin
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.authority = authority.rstrip("/")
+        self.access_token = None
+        self.expires_at = 0.0
+        self.__lock = threading.Lock()
+        self.__listeners = []
+        self.__cache_key = hashlib.sha256(f"{tenant_id}:{client_id}".encode("utf-8")).hexdigest()
+
+    def add_listener(self, callback):
+        """
+        Calls callback(event, elapsed) when a token is "fetched" from the login
+        endpoint, "loaded" from the cache file, or "invalidated".
+        """
+        self.__listeners.append(callback)
+
+    def __notify(self, event, elapsed=0.0):
+        for callback in self.__listeners:
+            callback(event, elapsed)
+
+    def peek_token(self):
+        """Returns the current token if it is still fresh, without any I/O."""
+        access_token = self.access_token
+        if access_token and time.time() < self.expires_at - self.refresh_margin:
+            return access_token
+        return None
+
+    def get_token(self):
+        """Returns a fresh access token, requesting a new one only when needed."""
+        access_token = self.peek_token()
+        if access_token:
+            return access_token
+
+        with self.__lock:
+            # Another thread may have refreshed while we were waiting.
+            access_token = self.peek_token()
+            if access_token:
+                return access_token
+
+            started = time.perf_counter()
+            event = "fetched"
+            if self.cache_path:
+                with _file_lock(f"{self.cache_path}.lock"):
+                    if self.__load_cached_token():
+                        event = "loaded"
+                    else:
+                        self.__fetch_token()
+                        self.__store_cached_token()
+            else:
+                self.__fetch_token()
+
+            self.__notify(event, time.perf_counter() - started)
+            return self.access_token
+
+    def invalidate(self, access_token=None):
+        """
+        Discards the current token, e.g. after Graph answered 401.
+
+        When access_token is given, the token is discarded only if it is still
+        the current one, so a token refreshed meanwhile by another caller is kept.
+        """
+        with self.__lock:
+            if access_token is None or access_token == self.access_token:
+                expired_token = self.access_token
+                self.access_token = None
+                self.expires_at = 0.0
+                if self.cache_path and expired_token:
+                    with _file_lock(f"{self.cache_path}.lock"):
+                        self.__drop_cached_token(expired_token)
+                self.__notify("invalidated")
+
+    def __fetch_token(self):
+        url = f"{self.authority}/{self.tenant_id}/oauth2/v2.0/token"
+        payload = {
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "scope": "https://graph.microsoft.com/.default",
+        }
+        requested_at = time.time()
+        try:
+            response = self.session.post(url, data=payload, timeout=self.timeout)
+        except Exception as e:
+            raise RuntimeError("Unable to make post request to get access token") from e
+        response.raise_for_status()
+        response_data = response.json()
+        self.access_token = response_data["access_token"]
+        self.expires_at = requested_at + float(response_data.get("expires_in", 3599))
+
+    def __read_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            return {}
+
+    def __load_cached_token(self):
+        entry = self.__read_cache().get(self.__cache_key)
+        if not entry:
+            return False
+        if time.time() >= entry.get("expires_at", 0) - self.refresh_margin:
+            return False
+        self.access_token = entry["access_token"]
+        self.expires_at = entry["expires_at"]
+        return True
+
+    def __store_cached_token(self):
+        cache = self.__read_cache()
+        cache[self.__cache_key] = {"access_token": self.access_token, "expires_at": self.expires_at}
+        self.__write_cache(cache)
+
+    def __drop_cached_token(self, access_token):
+        cache = self.__read_cache()
+        entry = cache.get(self.__cache_key)
+        # Keep a token another process already refreshed.
+        if entry and entry.get("access_token") == access_token:
+            del cache[self.__cache_key]
+            self.__write_cache(cache)
+
+    def __write_cache(self, cache):
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(cache, file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            raise HermesMSGraphError(f"Unable to write token cache {self.cache_path}") from e
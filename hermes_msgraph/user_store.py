@@ -0,0 +1,110 @@
+import json
+import sqlite3
+import uuid
+from contextlib import contextmanager
+
+
+class SQLiteUserStore:
+    """
+    Local copy of the tenant directory kept up to date by UsersService.sync_users.
+
+    Users are stored as JSON by id together with the delta link of the last
+    completed sync. Changes are applied page by page; the delta link is saved
+    only when every page was read, so an interrupted sync is simply replayed
+    (applying a change twice is harmless). A full sync tags the users it sees
+    and drops the others when it completes, so readers never see an empty
+    directory while it runs.
+    """
+
+    def __init__(self, path, table="hermes_users"):
+        self.path = path
+        self.table = table
+        with self.__connect() as connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, data TEXT NOT NULL, sync_run TEXT)"
+            )
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table}_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    @contextmanager
+    def __connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @property
+    def delta_link(self):
+        with self.__connect() as connection:
+            row = connection.execute(
+                f"SELECT value FROM {self.table}_state WHERE key = 'delta_link'"
+            ).fetchone()
+        return row[0] if row else None
+
+    def start_full_sync(self):
+        """Returns the id that tags the users seen by a full sync."""
+        return uuid.uuid4().hex
+
+    def apply(self, users, sync_run=None):
+        """
+        Upserts changed users and deletes removed ones.
+
+        Updated users are merged into the stored ones, since delta pages may
+        only carry the changed properties.
+
+        :param users: Users from a delta page; removed ones carry "@removed".
+        :param sync_run: Id from start_full_sync during a full sync.
+        :return: Tuple with the number of users upserted and removed.
+        """
+        upserted = 0
+        removed = 0
+        with self.__connect() as connection:
+            for user in users:
+                if "@removed" in user:
+                    connection.execute(f"DELETE FROM {self.table} WHERE id = ?", (user["id"],))
+                    removed += 1
+                    continue
+                row = connection.execute(f"SELECT data FROM {self.table} WHERE id = ?", (user["id"],)).fetchone()
+                data = json.loads(row[0]) if row else {}
+                data.update(user)
+                connection.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (id, data, sync_run) VALUES (?, ?, ?)",
+                    (user["id"], json.dumps(data), sync_run),
+                )
+                upserted += 1
+        return upserted, removed
+
+    def complete_sync(self, delta_link, sync_run=None):
+        """
+        Saves the delta link of a completed sync.
+
+        :param sync_run: Id of a full sync; users it did not see are deleted.
+        :return: The number of users deleted.
+        """
+        with self.__connect() as connection:
+            removed = 0
+            if sync_run is not None:
+                removed = connection.execute(
+                    f"DELETE FROM {self.table} WHERE sync_run IS NOT ?", (sync_run,)
+                ).rowcount
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.table}_state (key, value) VALUES ('delta_link', ?)", (delta_link,)
+            )
+        return removed
+
+    def reset(self):
+        """Forgets the delta link so the next sync is a full one."""
+        with self.__connect() as connection:
+            connection.execute(f"DELETE FROM {self.table}_state WHERE key = 'delta_link'")
+
+    def iter_users(self):
+        with self.__connect() as connection:
+            for (data,) in connection.execute(f"SELECT data FROM {self.table} ORDER BY id"):
+                yield json.loads(data)
+
+    def count(self):
+        with self.__connect() as connection:
+            return connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
@@ -1,9 +1,61 @@
-from exceptions import HermesMSGraphError
-from tqdm import tqdm
+from .exceptions import HermesMSGraphError
+from .models import User
+
+# Properties kept for each user by iter_all_users and sync_users.
+USER_SELECT = "id,displayName,mail,officeLocation,jobTitle,userPrincipalName,userType,accountEnabled,assignedLicenses,assignedPlans"
+
+
+def _filter_user_data(users: list) -> list:
+    users_filtered = []
+    for user in users:
+        users_filtered.append({
+            "displayName": user.get("displayName"),
+            "jobTitle": user.get("jobTitle"),
+            "mail": user.get("mail"),
+            "officeLocation": user.get("officeLocation"),
+        })
+    return users_filtered
+
+
+def _add_friendly_license_names(sku_list):
+    friendly_names = {
+        "POWER_BI_PRO": "Power BI Pro",
+        "WINDOWS_STORE": "Windows Store",
+        "FLOW_FREE": "Power Automate Free",
+        "MICROSOFT_BUSINESS_CENTER": "Microsoft Business Center",
+        "CCIBOTS_PRIVPREV_VIRAL": "Copilot (Preview)",
+        "SPB": "Microsoft 365 Business Premium",
+        "POWERAPPS_VIRAL": "Power Apps (Trial)",
+        "EXCHANGESTANDARD": "Exchange Online (Plan 1)",
+        "Microsoft_Teams_Exploratory_Dept": "Teams Exploratory",
+        "O365_BUSINESS_PREMIUM": "Microsoft 365 Business Standard",
+        "POWER_BI_STANDARD": "Power BI (Free)",
+        "PBI_PREMIUM_PER_USER": "Power BI Premium (Per User)",
+        "Power_Pages_vTrial_for_Makers": "Power Pages (Trial)",
+        "RMSBASIC": "Rights Management (Basic)",
+        "Teams_Premium_(for_Departments)": "Teams Premium (Departments)",
+        "POWERAPPS_DEV": "Power Apps Developer",
+        "PROJECT_PLAN3_DEPT": "Project Plan 3 (Departments)"
+    }
+
+    skuid_list = []
+
+    for sku in sku_list:
+        sku_id = sku.get("skuId")
+        sku_name = sku.get("skuPartNumber")
+        if sku_name in friendly_names:
+            sku_friendly_name = friendly_names[sku_name]
+        else:
+            sku["friendlyName"] = friendly_names.get(sku_name, "Desconhecido")
+        skuid_list.append({"skuId": sku_id, "skuName": sku_name, "friendlyName": sku_friendly_name})
+
+    return skuid_list
+
 
 class UsersService:
-    def __init__(self, http):
+    def __init__(self, http, user_store=None):
         self.http = http
+        self.user_store = user_store
 
     def get_user_id_by_email(self, email_address: str) -> str:
         """
@@ -24,109 +76,132 @@ class UsersService:
             raise HermesMSGraphError(error_message)
     
     
-    def __filter_data(self, users: list) -> list:
-        users_filtered = []
-        for user in users:
-            users_filtered.append({
-                "displayName": user.get("displayName"),
-                "jobTitle": user.get("jobTitle"),
-                "mail": user.get("mail"),
-                "officeLocation": user.get("officeLocation"),
-            })
-        return users_filtered
-    
-    def __add_friendly_license_names(self, sku_list):
-        friendly_names = {
-            "POWER_BI_PRO": "Power BI Pro",
-            "WINDOWS_STORE": "Windows Store",
-            "FLOW_FREE": "Power Automate Free",
-            "MICROSOFT_BUSINESS_CENTER": "Microsoft Business Center",
-            "CCIBOTS_PRIVPREV_VIRAL": "Copilot (Preview)",
-            "SPB": "Microsoft 365 Business Premium",
-            "POWERAPPS_VIRAL": "Power Apps (Trial)",
-            "EXCHANGESTANDARD": "Exchange Online (Plan 1)",
-            "Microsoft_Teams_Exploratory_Dept": "Teams Exploratory",
-            "O365_BUSINESS_PREMIUM": "Microsoft 365 Business Standard",
-            "POWER_BI_STANDARD": "Power BI (Free)",
-            "PBI_PREMIUM_PER_USER": "Power BI Premium (Per User)",
-            "Power_Pages_vTrial_for_Makers": "Power Pages (Trial)",
-            "RMSBASIC": "Rights Management (Basic)",
-            "Teams_Premium_(for_Departments)": "Teams Premium (Departments)",
-            "POWERAPPS_DEV": "Power Apps Developer",
-            "PROJECT_PLAN3_DEPT": "Project Plan 3 (Departments)"
-        }
-
-        skuid_list = []
-
-        for sku in sku_list:
-            sku_id = sku.get("skuId")
-            sku_name = sku.get("skuPartNumber")
-            if sku_name in friendly_names:
-                sku_friendly_name = friendly_names[sku_name]
-            else:
-                sku["friendlyName"] = friendly_names.get(sku_name, "Desconhecido")
-            skuid_list.append({"skuId": sku_id, "skuName": sku_name, "friendlyName": sku_friendly_name})
-
-        return skuid_list
-
-    
     def get_tenant_licenses(self):
         response = self.http.get('https://graph.microsoft.com/v1.0/subscribedSkus')
         if response.status_code == 200:
             skus = response.json().get("value", [])
-            skuid_list = self.__add_friendly_license_names(skus)
+            skuid_list = _add_friendly_license_names(skus)
             return skuid_list
         else:
             error_message = f"Error fetching SKUs: {response.status_code} - {response.text}"
             raise HermesMSGraphError(error_message)
 
 
+    def get_users_by_ids(self, user_ids: list, select: str = None) -> list:
+        """
+        Retrieve several users by ID or user principal name using batched requests.
+        :param user_ids: The IDs or user principal names of the users.
+        :param select: Optional comma separated list of properties to return.
+        :return: The users in the same order as user_ids, None for users not found.
+        :raises HermesMSGraphError: If any request fails with a status other than 404.
+        """
+        query = f"?$select={select}" if select else ""
+        urls = [f"https://graph.microsoft.com/v1.0/users/{user_id}{query}" for user_id in user_ids]
+        return self.http.batch_get(urls)
+
     def __get_license_details(self, users: list) -> list:
-        
+        from tqdm import tqdm
+
         users_all_info = []
-        for user in tqdm(users, desc="Fetching user details", unit="user"):
-            user_id = user['id']
-            print(user_id)
-            response = self.http.get(f"https://graph.microsoft.com/v1.0/users/{user_id}?$select=displayName,userPrincipalName,accountEnabled,assignedLicenses,assignedPlans")
-        
-            print(response)
-            if response.status_code == 200:
-                print(response.json())
-                user['userDetails'] = response.json().get("value", [])
-            else:
-                user['userDetails'] = {}
+        user_details = self.get_users_by_ids(
+            [user['id'] for user in users],
+            select="displayName,userPrincipalName,accountEnabled,assignedLicenses,assignedPlans",
+        )
+        for user, details in tqdm(zip(users, user_details), total=len(users), desc="Fetching user details", unit="user"):
+            user['userDetails'] = details or {}
             users_all_info.append(user)
         return users_all_info
 
 
-    def get_all_users(self, data='all') -> list:
+    def get_all_users(self, data='all', refresh: bool = True, format=list) -> list:
         """
-        Retrieve all users' email addresses.
-        :return: A list of email addresses.
+        Retrieve all member users.
+        When the service has a user store, the users are read from it after an
+        incremental sync_users, so only the users changed since the last call
+        are downloaded.
+        :param data: 'all' for every selected property, 'simple' for name, job title, mail and office.
+        :param refresh: With a user store, sync it before reading. Defaults to True.
+        :param format: list for dicts, or User for User objects.
+        :return: A list of users.
         :raises HermesMSGraphError: If the request fails.
         """
-        url = "https://graph.microsoft.com/v1.0/users?$top=999&$filter=userType eq 'Member'&$select=id,displayName,mail,officeLocation,userPrincipalName,accountEnabled,assignedLicenses,assignedPlans"
-
-        users = []
-
-        while url:
-            response = self.http.get(url)
-            if response.status_code != 200:
-                raise HermesMSGraphError(f"Error fetching users' emails: {response.status_code} - {response.text}")
-                
-            response_data = response.json()
-            users.extend(response_data.get("value", []))
-            url = response_data.get("@odata.nextLink")
+        if format is not list and format is not User:
+            raise HermesMSGraphError("Invalid format. Must be list or User")
+        if self.user_store is not None:
+            if refresh or self.user_store.delta_link is None:
+                self.sync_users()
+            users = [user for user in self.user_store.iter_users() if user.get("userType") == "Member"]
+        else:
+            users = list(self.iter_all_users())
         
         match data:
             case 'simple':
-                return self.__filter_data(users)
+                users = _filter_user_data(users)
             case 'all':
                 #users_all_info = self.__get_license_details(users)
-                return users
+                pass
             case _:
                 raise ValueError(f"Invalid data type: {data}")
+
+        if format is User:
+            return [User.from_graph(user) for user in users]
+        return users
             
+    def iter_all_users(self, prefetch: bool = False):
+        """
+        Yield all member users page by page, in constant memory.
+        :param prefetch: Fetch the next page in the background while the current one is consumed.
+        :return: Generator of users.
+        :raises HermesMSGraphError: If the request fails.
+        """
+        url = f"https://graph.microsoft.com/v1.0/users?$top=999&$filter=userType eq 'Member'&$select={USER_SELECT}"
+        return self.http.iter_items(url, prefetch=prefetch)
+
+    def sync_users(self, user_store=None, max_page_size: int = None) -> dict:
+        """
+        Bring the local user store up to date with users/delta.
+        The first sync, or one whose delta token expired, reads the whole
+        directory; later ones only download the users added, changed or
+        deleted since the previous sync.
+        :param user_store: Store to update. Defaults to the store of the service.
+        :param max_page_size: Preferred number of users per page.
+        :return: Dict with ``upserted`` and ``removed`` counts, ``full_sync`` (bool) and ``users`` in the store.
+        :raises HermesMSGraphError: If no user store is available or a request fails.
+        """
+        user_store = user_store or self.user_store
+        if user_store is None:
+            raise HermesMSGraphError("sync_users requires a user store, e.g. SQLiteUserStore.")
+        headers = {"Prefer": f"odata.maxpagesize={max_page_size}"} if max_page_size else None
+
+        delta_link = user_store.delta_link
+        if delta_link:
+            try:
+                return self.__consume_users_delta(delta_link, headers, user_store, full_sync=False)
+            except HermesMSGraphError as e:
+                if e.error_code != 410:
+                    raise
+                user_store.reset()
+
+        url = f"https://graph.microsoft.com/v1.0/users/delta?$select={USER_SELECT}"
+        return self.__consume_users_delta(url, headers, user_store, full_sync=True)
+
+    def __consume_users_delta(self, url, headers, user_store, full_sync):
+        sync_run = user_store.start_full_sync() if full_sync else None
+        result = {"upserted": 0, "removed": 0, "full_sync": full_sync}
+        delta_link = None
+
+        for page in self.http.iter_pages(url, headers=headers, prefetch=True):
+            upserted, removed = user_store.apply(page.get("value", []), sync_run=sync_run)
+            result["upserted"] += upserted
+            result["removed"] += removed
+            delta_link = page.get("@odata.deltaLink", delta_link)
+
+        if delta_link is None:
+            raise HermesMSGraphError(f"users/delta did not return a delta link: {url}")
+        result["removed"] += user_store.complete_sync(delta_link, sync_run=sync_run)
+        result["users"] = user_store.count()
+        return result
+
     def search_from_mailboxes(self, query: str) -> list:
         """
         Search for users by email address or display name using $search.
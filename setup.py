@@ -15,7 +15,12 @@ setup(
         "pyyaml>=5.0",
         "tqdm",
     ],
-    python_requires=">=3.7",
+    extras_require={
+        "async": ["httpx>=0.23"],
+        "parquet": ["pyarrow>=8.0"],
+        "fast": ["orjson>=3.0"],
+    },
+    python_requires=">=3.10",
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
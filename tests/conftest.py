@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The tests run against the fake Graph server of the benchmarks.
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+from fake_graph import FakeGraphServer  # noqa: E402
+
+from hermes_msgraph import HermesMSGraph  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def server():
+    with FakeGraphServer(messages_per_mailbox=600, max_page_size=100) as server:
+        yield server
+
+
+@pytest.fixture
+def make_graph(server):
+    """Builds HermesMSGraph clients talking to the fake server."""
+
+    def make_graph(**options):
+        return HermesMSGraph(
+            "client", "secret", "tenant", base_url=server.base_url, authority=server.authority, **options
+        )
+
+    return make_graph
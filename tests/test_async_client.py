@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import AsyncHermesMSGraph
+from hermes_msgraph.exceptions import HermesMSGraphError
+from hermes_msgraph.retry_policy import NO_RETRY
+
+
+def _async_graph(server, **options):
+    return AsyncHermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority, **options)
+
+
+def test_get_emails_matches_the_sync_client(server, make_graph):
+    mailbox = server.data.mailboxes[0]
+
+    async def read():
+        async with _async_graph(server, max_concurrency=4) as graph:
+            return await graph.get_emails(mailbox, n_of_messages=250, data=["id", "subject"])
+
+    assert asyncio.run(read()) == make_graph().get_emails(mailbox, n_of_messages=250, data=["id", "subject"])
+
+
+def test_get_emails_many_reports_failing_mailboxes(server):
+    mailboxes = server.data.mailboxes[:3] + ["unknown@contoso.test"]
+
+    async def read():
+        async with _async_graph(server, max_concurrency=2) as graph:
+            return await graph.get_emails_many(mailboxes, n_of_messages=5, data=["id"])
+
+    result = asyncio.run(read())
+
+    assert sorted(result["messages"]) == sorted(mailboxes[:3])
+    for mailbox in mailboxes[:3]:
+        assert [email["id"] for email in result["messages"][mailbox]] == [
+            message["id"] for message in server.data.messages[mailbox][:5]
+        ]
+    assert isinstance(result["errors"]["unknown@contoso.test"], HermesMSGraphError)
+
+
+def test_throttled_requests_are_retried():
+    with FakeGraphServer(throttle_rate=0.3, retry_after=0, seed=5, users=300, max_page_size=20) as server:
+
+        async def read():
+            async with _async_graph(server) as graph:
+                return await graph.get_all_users(), graph.get_retry_stats()
+
+        users, stats = asyncio.run(read())
+
+    assert len(users) == 300
+    assert server.throttled > 0
+    assert stats["retries_by_status"].get(429) == server.throttled
+
+
+def test_read_timeout_is_applied():
+    with FakeGraphServer(latency=0.5) as server:
+
+        async def read():
+            async with _async_graph(server, timeout=(5, 0.1), retry_policy=NO_RETRY) as graph:
+                return await graph.get_emails(server.data.mailboxes[0], n_of_messages=1)
+
+        with pytest.raises(HermesMSGraphError):
+            asyncio.run(read())
@@ -0,0 +1,80 @@
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph
+from hermes_msgraph.http_client import _plan_batch_retry
+
+
+def _requests(*specs):
+    """Sub-requests from (id, dependsOn) pairs."""
+    requests_list = []
+    for request_id, depends_on in specs:
+        request = {"id": request_id, "method": "GET", "url": f"/items/{request_id}"}
+        if depends_on:
+            request["dependsOn"] = list(depends_on)
+        requests_list.append(request)
+    return requests_list
+
+
+def _responses(**statuses):
+    return {
+        request_id: {"id": request_id, "status": status, "headers": {"Retry-After": "3"} if status == 429 else {}}
+        for request_id, status in statuses.items()
+    }
+
+
+def test_nothing_to_retry_when_no_request_was_throttled():
+    chunk = _requests(("1", None), ("2", ["1"]))
+    delay, retry = _plan_batch_retry(chunk, chunk, _responses(**{"1": 404, "2": 424}), attempt=0)
+    assert (delay, retry) == (0, [])
+
+
+def test_throttled_requests_are_retried_after_retry_after():
+    chunk = _requests(("1", None), ("2", None))
+    delay, retry = _plan_batch_retry(chunk, chunk, _responses(**{"1": 200, "2": 429}), attempt=0)
+    assert delay == 3
+    assert [request["id"] for request in retry] == ["2"]
+
+
+def test_424_behind_a_throttled_request_is_retried_with_its_dependency():
+    chunk = _requests(("1", None), ("2", ["1"]), ("3", ["2"]))
+    _, retry = _plan_batch_retry(chunk, chunk, _responses(**{"1": 429, "2": 424, "3": 424}), attempt=0)
+    assert [request["id"] for request in retry] == ["1", "2", "3"]
+    assert retry[1]["dependsOn"] == ["1"]
+    assert retry[2]["dependsOn"] == ["2"]
+
+
+def test_424_behind_a_final_failure_is_not_retried():
+    chunk = _requests(("1", None), ("2", ["1"]), ("3", None))
+    _, retry = _plan_batch_retry(chunk, chunk, _responses(**{"1": 400, "2": 424, "3": 503}), attempt=0)
+    assert [request["id"] for request in retry] == ["3"]
+
+
+def test_dependencies_on_requests_not_retried_are_dropped():
+    chunk = _requests(("1", None), ("2", ["1"]))
+    _, retry = _plan_batch_retry(chunk, chunk, _responses(**{"1": 200, "2": 429}), attempt=0)
+    assert retry == [{"id": "2", "method": "GET", "url": "/items/2"}]
+
+
+def test_504_is_retried_only_for_idempotent_methods():
+    chunk = [
+        {"id": "1", "method": "POST", "url": "/me/messages/a/move"},
+        {"id": "2", "method": "DELETE", "url": "/me/messages/b"},
+        {"id": "3", "method": "POST", "url": "/me/messages/c/copy"},
+    ]
+    _, retry = _plan_batch_retry(chunk, chunk, _responses(**{"1": 504, "2": 504, "3": 503}), attempt=0)
+    assert [request["id"] for request in retry] == ["2", "3"]
+
+
+def test_batch_get_recovers_from_throttling():
+    with FakeGraphServer(throttle_rate=0.3, retry_after=0, seed=3, mailboxes=1, messages_per_mailbox=60) as server:
+        graph = HermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority)
+        mailbox = server.data.mailboxes[0]
+        messages = server.data.messages[mailbox][:50]
+        urls = [f"https://graph.microsoft.com/v1.0/users/{mailbox}/messages/{message['id']}" for message in messages]
+        urls.append(f"https://graph.microsoft.com/v1.0/users/{mailbox}/messages/missing")
+
+        bodies = graph.http_client.batch_get(urls)
+
+        assert [body["id"] for body in bodies[:-1]] == [message["id"] for message in messages]
+        assert bodies[-1] is None
+        assert server.throttled > 0
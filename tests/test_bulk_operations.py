@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph
+from hermes_msgraph.exceptions import HermesMSGraphError
+
+
+@pytest.fixture
+def server():
+    # Every test changes the mailbox, so each gets its own server.
+    with FakeGraphServer(mailboxes=1, messages_per_mailbox=50, folders_per_mailbox=4) as server:
+        yield server
+
+
+@pytest.fixture
+def graph(server):
+    return HermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority)
+
+
+@pytest.mark.parametrize("filters", [{}, {"subject": None}, {"sender": ""}, {"subject": None, "n_of_messages": 5}])
+def test_delete_without_a_selective_filter_is_rejected(server, graph, filters):
+    mailbox = server.data.mailboxes[0]
+
+    with pytest.raises(HermesMSGraphError):
+        graph.delete_emails(mailbox, **filters)
+
+    assert len(server.data.messages[mailbox]) == 50
+
+
+@pytest.mark.parametrize("name", ["format", "messages_json_path"])
+def test_get_emails_output_options_are_rejected(server, graph, name):
+    with pytest.raises(HermesMSGraphError):
+        graph.delete_emails(server.data.mailboxes[0], subject="Invoice*", **{name: "x"})
+
+
+def test_delete_by_filter_removes_only_the_matches(server, graph):
+    mailbox = server.data.mailboxes[0]
+    matches = {message["id"] for message in server.data.messages[mailbox] if message["subject"].startswith("Invoice")}
+
+    result = graph.delete_emails(mailbox, subject="Invoice*", sender=None)
+
+    assert {item["id"] for item in result["results"]} == matches
+    assert result["stats"]["succeeded"] == len(matches) and result["stats"]["failed"] == 0
+    assert not matches & {message["id"] for message in server.data.messages[mailbox]}
+    assert len(server.data.messages[mailbox]) == 50 - len(matches)
+
+
+def test_move_returns_the_new_ids_and_reports_failures(server, graph):
+    mailbox = server.data.mailboxes[0]
+    email_ids = [message["id"] for message in server.data.messages[mailbox][:3]] + ["missing"]
+    archive_id = server.data.folders[mailbox][3]["id"]
+
+    result = graph.move_emails(mailbox, email_ids=email_ids, folder_name="Archive")
+
+    assert [item["status"] for item in result["results"]] == ["succeeded"] * 3 + ["failed"]
+    assert result["results"][3]["status_code"] == 404
+    moved = {message["id"]: message for message in server.data.messages[mailbox]}
+    for item in result["results"][:3]:
+        assert moved[item["new_id"]]["parentFolderId"] == archive_id
+
+
+def test_mark_read_by_id(server, graph):
+    mailbox = server.data.mailboxes[0]
+    unread = [message["id"] for message in server.data.messages[mailbox] if not message["isRead"]]
+
+    result = graph.mark_emails_read(mailbox, email_ids=unread)
+
+    assert result["stats"]["succeeded"] == len(unread)
+    assert all(message["isRead"] for message in server.data.messages[mailbox])
+
+
+@pytest.mark.parametrize("max_concurrency, batch_size", [(4, 4), (1, 1), (40, 20)])
+def test_sub_requests_in_flight_are_bounded(server, graph, max_concurrency, batch_size):
+    mailbox = server.data.mailboxes[0]
+    batch = graph.http_client.batch
+    lock = threading.Lock()
+    sizes = []
+    in_flight = [0, 0]
+
+    def recording_batch(requests_list, **options):
+        with lock:
+            sizes.append(len(requests_list))
+            in_flight[0] += len(requests_list)
+            in_flight[1] = max(in_flight)
+        try:
+            return batch(requests_list, **options)
+        finally:
+            with lock:
+                in_flight[0] -= len(requests_list)
+
+    graph.http_client.batch = recording_batch
+    email_ids = [message["id"] for message in server.data.messages[mailbox]]
+
+    result = graph.mark_emails_read(mailbox, email_ids=email_ids, max_concurrency=max_concurrency)
+
+    assert result["stats"]["succeeded"] == 50
+    assert max(sizes) == batch_size
+    assert in_flight[1] <= max_concurrency
@@ -0,0 +1,24 @@
+import pytest
+
+from hermes_msgraph.exceptions import HermesMSGraphError
+from hermes_msgraph.models import Message
+
+
+def test_iter_emails_many_yields_each_mailbox(server, make_graph):
+    graph = make_graph()
+    mailboxes = server.data.mailboxes[:2] + ["unknown@contoso.test"]
+
+    results = {mailbox: (emails, error) for mailbox, emails, error in graph.iter_emails_many(mailboxes, n_of_messages=3, format=Message)}
+
+    for mailbox in mailboxes[:2]:
+        emails, error = results[mailbox]
+        assert error is None
+        assert [email.id for email in emails] == [message["id"] for message in server.data.messages[mailbox][:3]]
+    assert results["unknown@contoso.test"][0] is None
+    assert isinstance(results["unknown@contoso.test"][1], HermesMSGraphError)
+
+
+@pytest.mark.parametrize("format", [dict, "DataFrame"])
+def test_iter_emails_many_rejects_other_formats(server, make_graph, format):
+    with pytest.raises(HermesMSGraphError):
+        next(make_graph().iter_emails_many(server.data.mailboxes[:1], format=format))
@@ -0,0 +1,116 @@
+import pytest
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph
+from hermes_msgraph.folder_cache import FolderCache, FolderIndex
+
+
+@pytest.fixture
+def server():
+    # Tests rename and delete folders, so each gets its own server.
+    with FakeGraphServer(mailboxes=2, messages_per_mailbox=1, folders_per_mailbox=8) as server:
+        yield server
+
+
+def _graph(server, **options):
+    return HermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority, **options)
+
+
+def test_index_resolves_ids_names_and_paths():
+    index = FolderIndex([
+        {"id": "inbox", "displayName": "Inbox", "parentFolderId": "root"},
+        {"id": "clients", "displayName": "Clients", "parentFolderId": "inbox"},
+        {"id": "acme", "displayName": "ACME", "parentFolderId": "clients"},
+        {"id": "archive", "displayName": "Archive", "parentFolderId": "root"},
+        {"id": "nested-archive", "displayName": "Archive", "parentFolderId": "clients"},
+    ])
+
+    assert index.get_id("acme") == "acme"
+    assert index.get_id("Inbox/Clients/ACME") == "acme"
+    assert index.get_id("inbox/clients/acme") == "acme"
+    assert index.get_id("clients") == "clients"
+    # A name shared by several folders resolves to the top-level one.
+    assert index.get_id("Archive") == "archive"
+    assert index.get_id("Inbox/Clients/Archive") == "nested-archive"
+    assert index.get_id("Missing") is None
+
+
+def test_index_applies_renames_and_removals():
+    index = FolderIndex([
+        {"id": "inbox", "displayName": "Inbox", "parentFolderId": "root"},
+        {"id": "clients", "displayName": "Clients", "parentFolderId": "inbox"},
+    ])
+
+    index.apply([{"id": "clients", "displayName": "Customers"}, {"id": "inbox", "@removed": {"reason": "deleted"}}])
+
+    assert index.get_id("Clients") is None
+    assert index.get_id("Customers") == "clients"
+    assert index.get_id("Inbox") is None
+    assert index.by_id["clients"]["parentFolderId"] == "inbox"
+
+
+def test_cache_evicts_the_least_recently_used_mailbox():
+    cache = FolderCache(max_mailboxes=2)
+    cache.put("a@contoso.test", FolderIndex())
+    cache.put("b@contoso.test", FolderIndex())
+    cache.get("A@contoso.test")
+    cache.put("c@contoso.test", FolderIndex())
+
+    assert cache.get("a@contoso.test") is not None
+    assert cache.get("b@contoso.test") is None
+    assert cache.get("c@contoso.test") is not None
+
+
+def test_folders_are_fetched_once_while_fresh(server):
+    graph = _graph(server)
+    mailbox = server.data.mailboxes[0]
+    graph.get_folder_id(mailbox, "Inbox")
+    requests_before = server.requests
+
+    assert graph.get_folder_id(mailbox, "Archive") == server.data.folders[mailbox][3]["id"]
+    assert graph.get_folder_id(mailbox, "Inbox/Project 5") == server.data.folders[mailbox][5]["id"]
+    assert graph.validate_folder_id(mailbox, server.data.folders[mailbox][6]["id"])
+    assert server.requests == requests_before
+
+
+def test_stale_index_is_refreshed_with_the_delta_link(server):
+    graph = _graph(server, folder_cache=FolderCache(ttl=0))
+    mailbox = server.data.mailboxes[0]
+    folders = server.data.folders[mailbox]
+    index = graph.folder_service.get_folder_index(mailbox)
+    first_delta_link = index.delta_link
+
+    folders[5]["displayName"] = "Renamed"
+    removed = folders.pop(6)
+
+    assert graph.get_folder_id(mailbox, "Renamed") == folders[5]["id"]
+    assert graph.get_folder_id(mailbox, "Project 5") is None
+    assert not graph.validate_folder_id(mailbox, removed["id"])
+    assert graph.folder_service.get_folder_index(mailbox) is index
+    assert index.delta_link != first_delta_link
+
+
+def test_expired_delta_link_rescans_the_folders(server):
+    graph = _graph(server, folder_cache=FolderCache(ttl=0))
+    mailbox = server.data.mailboxes[0]
+    index = graph.folder_service.get_folder_index(mailbox)
+    server.router.delta_snapshots.clear()
+    server.data.folders[mailbox][4]["displayName"] = "After expiry"
+
+    refreshed = graph.folder_service.get_folder_index(mailbox)
+
+    assert refreshed is not index
+    assert refreshed.get_id("After expiry") == server.data.folders[mailbox][4]["id"]
+
+
+def test_invalidate_drops_one_mailbox(server):
+    graph = _graph(server)
+    first, second = server.data.mailboxes
+    graph.get_folder_id(first, "Inbox")
+    graph.get_folder_id(second, "Inbox")
+
+    graph.invalidate_folder_cache(first)
+
+    assert graph.folder_service.folder_cache.get(first) is None
+    assert graph.folder_service.folder_cache.get(second) is not None
@@ -0,0 +1,112 @@
+import pytest
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph
+from hermes_msgraph.mail_index import SQLiteMailIndex
+
+
+@pytest.fixture
+def server():
+    # Tests delete messages, so each gets its own server.
+    with FakeGraphServer(mailboxes=1, messages_per_mailbox=150, folders_per_mailbox=4, max_page_size=50) as server:
+        yield server
+
+
+@pytest.fixture
+def mail_index(tmp_path):
+    return SQLiteMailIndex(str(tmp_path / "mail.db"))
+
+
+@pytest.fixture
+def graph(server, mail_index):
+    return HermesMSGraph(
+        "client", "secret", "tenant", base_url=server.base_url, authority=server.authority, mail_index=mail_index
+    )
+
+
+def _ids(emails):
+    return [email["id"] for email in emails]
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"subject": "Invoice*"},
+        {"subject": "*report*", "n_of_messages": "all"},
+        {"sender": "sender1*", "has_attachments": True, "n_of_messages": "all"},
+        {"greater_than_date": "2024-01-01T01:00:00Z", "less_than_date": "2024-01-01T01:30:00Z", "n_of_messages": "all"},
+        # The same range written in another time zone.
+        {"greater_than_date": "2024-01-01T03:00:00+02:00", "less_than_date": "2024-01-01T03:30:00+02:00", "n_of_messages": "all"},
+    ],
+)
+def test_query_emails_answers_like_get_emails(server, graph, filters):
+    graph.index_messages(server.data.mailboxes[0])
+    mailbox = server.data.mailboxes[0]
+
+    assert _ids(graph.query_emails(mailbox, **filters)) == _ids(graph.get_emails(mailbox, data=["id"], **filters))
+
+
+def test_fractional_date_bounds_keep_the_matching_messages(server, graph):
+    mailbox = server.data.mailboxes[0]
+    graph.index_messages(mailbox)
+
+    emails = graph.query_emails(
+        mailbox, greater_than_date="2024-01-01T00:59:59.5Z", less_than_date="2024-01-01T01:02:00.5Z", n_of_messages="all"
+    )
+
+    assert [email["receivedDateTime"] for email in emails] == [
+        "2024-01-01T01:02:00Z", "2024-01-01T01:01:00Z", "2024-01-01T01:00:00Z"
+    ]
+
+
+def test_next_index_run_applies_only_the_changes(server, graph, mail_index):
+    mailbox = server.data.mailboxes[0]
+    assert graph.index_messages(mailbox)["Inbox"] == {"added": 150, "updated": 0, "removed": 0, "full_sync": True}
+    removed = server.data.messages[mailbox].pop(0)
+    server.data.messages[mailbox][0]["subject"] = "Renamed subject"
+
+    assert graph.index_messages(mailbox)["Inbox"] == {"added": 0, "updated": 1, "removed": 1, "full_sync": False}
+
+    assert mail_index.count(mailbox) == 149
+    assert graph.query_emails(mailbox, internet_message_id=removed["internetMessageId"]) == []
+    assert _ids(graph.query_emails(mailbox, subject="renamed subject")) == [server.data.messages[mailbox][0]["id"]]
+
+
+def _message(message_id, subject, preview="", received="2024-01-01T00:00:00Z"):
+    return {
+        "id": message_id,
+        "subject": subject,
+        "bodyPreview": preview,
+        "receivedDateTime": received,
+        "sender": {"emailAddress": {"address": "Someone@Contoso.test"}},
+    }
+
+
+@pytest.mark.parametrize("full_text", [True, False])
+def test_search_finds_words_in_subject_and_preview(mail_index, full_text):
+    if full_text and not mail_index.full_text:
+        pytest.skip("SQLite built without FTS5")
+    mail_index.full_text = full_text
+    mail_index.ingest("box@contoso.test", [
+        _message("1", "Quarterly budget", "Numbers for the board"),
+        _message("2", "Lunch", "Budgeting workshop tomorrow"),
+        _message("3", "Release notes", "Nothing about money"),
+    ])
+
+    assert sorted(_ids(mail_index.query("box@contoso.test", search="budget*", n_of_messages="all"))) == ["1", "2"]
+    # Without FTS5 the LIKE fallback matches substrings, so only FTS5 tells whole words apart.
+    whole_words = ["1"] if full_text else ["1", "2"]
+    assert sorted(_ids(mail_index.query("box@contoso.test", search="budget", n_of_messages="all"))) == whole_words
+    assert _ids(mail_index.query("box@contoso.test", search="board numbers", n_of_messages="all")) == ["1"]
+
+
+def test_patterns_treat_like_characters_literally(mail_index):
+    mail_index.ingest("box@contoso.test", [
+        _message("1", "50% off_today?"),
+        _message("2", "500 offXtoday!"),
+    ])
+
+    assert _ids(mail_index.query("box@contoso.test", subject="50% off_today?")) == ["1"]
+    assert _ids(mail_index.query("box@contoso.test", subject="50*off_*")) == ["1"]
+    assert sorted(_ids(mail_index.query("BOX@contoso.test", sender="someone@*", n_of_messages="all"))) == ["1", "2"]
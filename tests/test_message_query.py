@@ -0,0 +1,115 @@
+import itertools
+import re
+
+import pytest
+
+from hermes_msgraph.exceptions import HermesMSGraphError
+from hermes_msgraph.message_query import SEARCH_MAX_RESULTS, _parse_datetime, plan_message_query
+
+
+def test_supported_predicates_are_pushed_to_filter():
+    plan = plan_message_query(subject="Invoice*", sender="a@contoso.com", has_attachments=True)
+    assert plan.filters == [
+        "sender/emailAddress/address eq 'a@contoso.com'",
+        "startswith(subject, 'Invoice')",
+        "hasAttachments eq true",
+    ]
+    assert plan.local_predicates == []
+    assert plan.search is None
+
+
+def test_date_range_leads_filter_for_orderby():
+    plan = plan_message_query(sender="a@contoso.com", greater_than_date="2024-01-01T00:00:00Z")
+    assert plan.filters[0] == "receivedDateTime gt 2024-01-01T00:00:00Z"
+    assert plan.orderby == "receivedDateTime desc"
+
+
+def test_quotes_are_escaped():
+    plan = plan_message_query(subject="O'Brien")
+    assert plan.filters == ["subject eq 'O''Brien'"]
+
+
+def test_question_mark_is_not_a_wildcard():
+    plan = plan_message_query(subject="Can you review?")
+    assert plan.filters == ["subject eq 'Can you review?'"]
+    assert plan.local_predicates == [] and plan.search is None
+
+    plan = plan_message_query(subject="Why? *")
+    assert plan.filters == ["startswith(subject, 'Why? ')"]
+    assert plan.local_predicates == []
+
+
+def test_unsupported_subject_pattern_uses_search():
+    plan = plan_message_query(subject="*monthly report*", n_of_messages=10)
+    assert plan.search == "subject:report*"
+    assert plan.filters == []
+    assert [predicate.name for predicate in plan.local_predicates] == ["subject"]
+    assert plan.server_max_items is None
+
+
+@pytest.mark.parametrize("n_of_messages", [SEARCH_MAX_RESULTS + 1, "all"])
+def test_search_is_not_used_beyond_its_result_cap(n_of_messages):
+    plan = plan_message_query(subject="*monthly report*", n_of_messages=n_of_messages)
+    assert plan.search is None
+    assert [predicate.name for predicate in plan.local_predicates] == ["subject"]
+
+
+def test_sender_narrows_the_scan_instead_of_search():
+    plan = plan_message_query(subject="*monthly report*", sender="a@contoso.com", n_of_messages=10)
+    assert plan.search is None
+    assert plan.filters == ["sender/emailAddress/address eq 'a@contoso.com'"]
+
+
+def test_invalid_date_is_rejected():
+    with pytest.raises(HermesMSGraphError):
+        plan_message_query(greater_than_date="yesterday")
+
+
+def _matches(pattern, value):
+    """Whole-value, case-insensitive match where only * is a wildcard."""
+    return re.fullmatch(".*".join(re.escape(part) for part in pattern.lower().split("*")), value.lower()) is not None
+
+
+def _expected(messages, subject=None, sender=None, has_attachments="", greater_than_date=None, less_than_date=None, n_of_messages=10):
+    """Ids get_emails must return, by checking every message."""
+    ids = []
+    for message in messages:
+        if subject and not _matches(subject, message["subject"]):
+            continue
+        if sender and not _matches(sender, message["sender"]["emailAddress"]["address"]):
+            continue
+        if has_attachments in (True, False) and message["hasAttachments"] is not has_attachments:
+            continue
+        received = _parse_datetime(message["receivedDateTime"])
+        if greater_than_date and not received > _parse_datetime(greater_than_date):
+            continue
+        if less_than_date and not received < _parse_datetime(less_than_date):
+            continue
+        ids.append(message["id"])
+    return ids if n_of_messages == "all" else ids[:n_of_messages]
+
+
+@pytest.mark.parametrize(
+    "subject, sender, dates, n_of_messages",
+    list(itertools.product(
+        [None, "Invoice*", "*report*", "*#7", "Order *udget*", "Order budget?"],
+        [None, "*@fabrikam.test", "sender1*"],
+        [(None, None), ("2024-01-01T03:00:00Z", "2024-01-01T06:30:00Z")],
+        [5, "all"],
+    )),
+)
+def test_get_emails_matches_a_full_scan(server, make_graph, subject, sender, dates, n_of_messages):
+    graph = make_graph()
+    mailbox = server.data.mailboxes[0]
+    greater_than_date, less_than_date = dates
+    filters = dict(
+        subject=subject,
+        sender=sender,
+        greater_than_date=greater_than_date,
+        less_than_date=less_than_date,
+        n_of_messages=n_of_messages,
+    )
+
+    emails = graph.get_emails(mailbox, data=["id"], **filters)
+
+    assert [email["id"] for email in emails] == _expected(server.data.messages[mailbox], **filters)
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from hermes_msgraph import models
+from hermes_msgraph.models import MailFolder, Message, PlannerTask, Recipient, User, decode
+
+MESSAGE = {
+    "@odata.etag": 'W/"CQAAABYAAAA"',
+    "id": "AAMkAD1",
+    "subject": "Quarterly report",
+    "bodyPreview": "Numbers attached",
+    "body": {"contentType": "html", "content": "<p>Numbers attached</p>"},
+    "from": {"emailAddress": {"name": "Ann", "address": "ann@contoso.test"}},
+    "toRecipients": [
+        {"emailAddress": {"name": "Bob", "address": "bob@contoso.test"}},
+        {"emailAddress": {"address": "carol@contoso.test"}},
+    ],
+    "receivedDateTime": "2024-01-01T00:00:00Z",
+    "hasAttachments": True,
+    "categories": ["Blue", "Finance"],
+    "attachments": [{"@odata.type": "#microsoft.graph.fileAttachment", "id": "ATT1", "name": "q1.xlsx", "size": 10}],
+    "flag": {"flagStatus": "notFlagged"},
+}
+
+
+def test_message_keeps_every_property_and_rebuilds_the_graph_json():
+    message = Message.from_graph(MESSAGE)
+
+    assert message.subject == "Quarterly report"
+    assert message.from_ == Recipient(name="Ann", address="ann@contoso.test")
+    assert [recipient.address for recipient in message.to_recipients] == ["bob@contoso.test", "carol@contoso.test"]
+    assert message.body.content_type == "html"
+    assert message.attachments[0].odata_type == "#microsoft.graph.fileAttachment"
+    assert message.is_read is None
+    # Properties without a slot are kept, annotations are dropped.
+    assert message.extra == {"flag": {"flagStatus": "notFlagged"}}
+    assert message.to_graph() == {key: value for key, value in MESSAGE.items() if key != "@odata.etag"}
+
+
+def test_models_have_no_instance_dict():
+    for model in (Message, Recipient, MailFolder, User, PlannerTask):
+        assert not hasattr(model.from_graph({"id": "1"}), "__dict__")
+    with pytest.raises(AttributeError):
+        Message.from_graph(MESSAGE).unknown = 1
+
+
+def test_repeated_strings_are_shared():
+    first, second = (Message.from_graph(json.loads(json.dumps(MESSAGE))) for _ in range(2))
+
+    assert first.from_.address is second.from_.address
+    assert first.categories[1] is second.categories[1]
+
+
+def test_constructor_takes_the_attribute_names():
+    folder = MailFolder(id="inbox", display_name="Inbox", total_item_count=3)
+
+    assert folder.to_graph() == {"id": "inbox", "displayName": "Inbox", "totalItemCount": 3}
+    assert MailFolder.from_graph(folder.to_graph()) == folder
+    assert repr(folder) == "MailFolder(id='inbox', display_name='Inbox', total_item_count=3)"
+    with pytest.raises(TypeError):
+        MailFolder(name="Inbox")
+
+
+def test_user_and_planner_task_round_trip():
+    user = {"id": "u1", "displayName": "Ann", "businessPhones": ["+1 555"], "userType": "Member", "accountEnabled": True}
+    task = {"id": "t1", "planId": "p1", "title": "Ship", "assignments": {"u1": {"orderHint": " !"}}}
+
+    assert User.from_graph(user).business_phones == ("+1 555",)
+    assert User.from_graph(user).to_graph() == user
+    assert PlannerTask.from_graph(task).to_graph() == task
+
+
+@pytest.mark.parametrize("orjson", [models.orjson, None])
+def test_decode_reads_pages_and_single_items(monkeypatch, orjson):
+    monkeypatch.setattr(models, "orjson", orjson)
+    page = json.dumps({"@odata.nextLink": "https://next", "value": [MESSAGE, MESSAGE]}).encode("utf-8")
+
+    assert decode(Message, page) == [Message.from_graph(MESSAGE)] * 2
+    assert decode(Message, json.dumps(MESSAGE)) == Message.from_graph(MESSAGE)
+
+
+def test_get_emails_as_messages_matches_the_dicts(server, make_graph):
+    graph = make_graph()
+    mailbox = server.data.mailboxes[0]
+
+    emails = graph.get_emails(mailbox, n_of_messages=50)
+    messages = graph.get_emails(mailbox, n_of_messages=50, format=Message)
+
+    assert all(isinstance(message, Message) for message in messages)
+    assert [message.id for message in messages] == [email["id"] for email in emails]
+    assert [message.sender.address for message in messages] == [email["sender"]["emailAddress"]["address"] for email in emails]
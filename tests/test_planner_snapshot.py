@@ -0,0 +1,103 @@
+import pandas as pd
+import pytest
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph
+from hermes_msgraph.exceptions import HermesMSGraphError
+from hermes_msgraph.planner_service import TASK_DETAILS_CHUNK_SIZE
+
+
+@pytest.fixture(scope="module")
+def planner_server():
+    with FakeGraphServer(mailboxes=1, messages_per_mailbox=1, plans=3, tasks_per_plan=120) as server:
+        yield server
+
+
+@pytest.fixture
+def graph(planner_server):
+    return HermesMSGraph(
+        "client", "secret", "tenant", base_url=planner_server.base_url, authority=planner_server.authority
+    )
+
+
+def _task_ids(data):
+    return sorted(task["id"] for tasks in data.tasks.values() for task in tasks)
+
+
+def test_snapshot_of_a_group_has_every_plan_bucket_task_and_detail(planner_server, graph):
+    data = planner_server.data
+
+    snapshot = graph.get_planner_snapshot(group_ids=[data.group_id], max_workers=4)
+
+    assert snapshot["errors"] == {}
+    assert sorted(plan["id"] for plan in snapshot["plans"]) == sorted(data.plans)
+    assert len(snapshot["buckets"]) == sum(len(buckets) for buckets in data.buckets.values())
+    assert sorted(task["id"] for task in snapshot["tasks"]) == _task_ids(data)
+    assert sorted(detail["id"] for detail in snapshot["task_details"]) == _task_ids(data)
+
+
+def test_missing_plans_and_groups_are_reported(planner_server, graph):
+    plan_id = next(iter(planner_server.data.plans))
+
+    snapshot = graph.get_planner_snapshot(
+        group_ids=["missing-group"], plan_ids=[plan_id, "missing-plan"], include_details=False
+    )
+
+    assert [plan["id"] for plan in snapshot["plans"]] == [plan_id]
+    assert snapshot["errors"]["missing-plan"] == "Plan not found."
+    assert "missing-group" in snapshot["errors"]
+    assert len(snapshot["tasks"]) == 120 and snapshot["task_details"] == []
+
+
+def test_failed_plan_lookup_reports_every_plan(graph, monkeypatch):
+    def failing_lookup(plan_ids):
+        raise HermesMSGraphError("batch failed")
+
+    monkeypatch.setattr(graph.planner_service, "get_plans_by_ids", failing_lookup)
+
+    snapshot = graph.get_planner_snapshot(plan_ids=["plan-a", "plan-b"])
+
+    assert snapshot["plans"] == []
+    assert snapshot["errors"] == {"plan-a": "batch failed", "plan-b": "batch failed"}
+
+
+def test_failed_detail_chunk_reports_its_tasks_only(planner_server, graph, monkeypatch):
+    get_task_details_by_ids = graph.planner_service.get_task_details_by_ids
+    failing_task = _task_ids(planner_server.data)[0]
+
+    def flaky_details(task_ids):
+        if failing_task in task_ids:
+            raise HermesMSGraphError("details failed")
+        return get_task_details_by_ids(task_ids)
+
+    monkeypatch.setattr(graph.planner_service, "get_task_details_by_ids", flaky_details)
+
+    snapshot = graph.get_planner_snapshot(group_ids=[planner_server.data.group_id])
+
+    failed = {task_id for task_id, error in snapshot["errors"].items() if error == "details failed"}
+    assert failing_task in failed and len(failed) <= TASK_DETAILS_CHUNK_SIZE
+    assert len(snapshot["task_details"]) == len(snapshot["tasks"]) - len(failed)
+    assert failed.isdisjoint(detail["id"] for detail in snapshot["task_details"])
+
+
+def test_snapshot_as_dataframes(planner_server, graph):
+    snapshot = graph.get_planner_snapshot(
+        group_ids=[planner_server.data.group_id], include_details=False, format=pd.DataFrame
+    )
+
+    assert isinstance(snapshot["tasks"], pd.DataFrame)
+    assert len(snapshot["tasks"]) == 360 and len(snapshot["plans"]) == 3
+
+
+def test_snapshot_recovers_from_throttling():
+    with FakeGraphServer(
+        mailboxes=1, messages_per_mailbox=1, plans=2, tasks_per_plan=150, throttle_rate=0.2, retry_after=0, seed=11
+    ) as server:
+        graph = HermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority)
+
+        snapshot = graph.get_planner_snapshot(group_ids=[server.data.group_id])
+
+    assert snapshot["errors"] == {}
+    assert len(snapshot["task_details"]) == 300
+    assert server.throttled > 0
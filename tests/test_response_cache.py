@@ -0,0 +1,102 @@
+import pytest
+import requests
+
+from hermes_msgraph.response_cache import DEFAULT_CACHE_TTLS, MemoryResponseCache, SQLiteResponseCache
+
+GRAPH = "https://graph.microsoft.com/v1.0"
+
+
+@pytest.mark.parametrize(
+    "path, ttl",
+    [
+        ("/users", 900),
+        ("/users?$select=id,mail", 900),
+        ("/users/4f3c", 900),
+        ("/subscribedSkus", 3600),
+        ("/sites", 3600),
+        ("/users/4f3c/messages", 0),
+        ("/users/4f3c/messages/AAMk", 0),
+        ("/users/4f3c/mailFolders", 0),
+        ("/users/4f3c/mailFolders/inbox/messages/delta", 0),
+        ("/users/delta", 0),
+        ("/users/4f3c/memberOf", 0),
+        ("/subscriptions", 0),
+        ("/groups/g1/planner/plans", 300),
+        ("/users/4f3c/planner/plans", 300),
+        ("/planner/plans/p1", 300),
+        ("/planner/plans/p1/tasks", 0),
+        ("/planner/plans/p1/buckets", 0),
+        ("/planner/tasks/t1/details", 0),
+    ],
+)
+def test_ttl_resolution(path, ttl):
+    assert MemoryResponseCache().ttl_for(GRAPH + path) == ttl
+
+
+def test_custom_rules_never_cache_mailbox_contents():
+    cache = MemoryResponseCache(default_ttl=60, ttl_rules={r"/users/.*": 300, **DEFAULT_CACHE_TTLS})
+    assert cache.ttl_for(f"{GRAPH}/users/4f3c/memberOf") == 300
+    assert cache.ttl_for(f"{GRAPH}/subscriptions") == 60
+    assert cache.ttl_for(f"{GRAPH}/users/4f3c/messages") == 0
+    assert not cache.is_cacheable(f"{GRAPH}/users/4f3c/mailFolders/inbox")
+
+
+def _response(content=b'{"value": []}'):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.headers["ETag"] = '"1"'
+    return response
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryResponseCache()
+    return SQLiteResponseCache(str(tmp_path / "cache.db"))
+
+
+def test_uncacheable_responses_are_not_stored(cache):
+    cache.store("k", f"{GRAPH}/users/4f3c/messages", _response())
+    assert cache.get("k") is None
+    assert cache.stats()["stores"] == 0
+
+
+def test_write_invalidates_the_collection(cache):
+    cache.store("list", f"{GRAPH}/users", _response())
+    cache.store("user", f"{GRAPH}/users/4f3c", _response())
+    cache.store("skus", f"{GRAPH}/subscribedSkus", _response())
+
+    cache.invalidate_write(f"{GRAPH}/users/4f3c")
+
+    assert cache.get("list") is None
+    assert cache.get("user") is None
+    assert cache.get("skus") is not None
+
+
+def test_batch_write_invalidates_the_collections_of_its_writes(cache):
+    cache.store("user", f"{GRAPH}/users/4f3c", _response())
+    cache.store("skus", f"{GRAPH}/subscribedSkus", _response())
+
+    cache.invalidate_write(f"{GRAPH}/$batch", {"requests": [{"id": "1", "method": "GET", "url": "/subscribedSkus"}]})
+    assert cache.get("user") is not None
+
+    cache.invalidate_write(f"{GRAPH}/$batch", {"requests": [{"id": "1", "method": "PATCH", "url": "/users/4f3c"}]})
+    assert cache.get("user") is None
+    assert cache.get("skus") is not None
+
+
+def test_http_client_serves_directory_reads_from_the_cache(server, make_graph):
+    graph = make_graph(cache=MemoryResponseCache())
+    user = server.data.users[0]
+    mailbox = server.data.mailboxes[0]
+
+    graph.http_client.get(f"{GRAPH}/users/{user['id']}")
+    before = server.requests
+    for _ in range(3):
+        assert graph.http_client.get(f"{GRAPH}/users/{user['id']}").json()["id"] == user["id"]
+    assert server.requests == before
+
+    for _ in range(3):
+        graph.http_client.get(f"{GRAPH}/users/{mailbox}/messages?$top=1")
+    assert server.requests == before + 3
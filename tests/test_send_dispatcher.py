@@ -0,0 +1,125 @@
+import threading
+import time
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph
+from hermes_msgraph.exceptions import HermesMSGraphError
+from hermes_msgraph.send_dispatcher import SendDispatcher, TokenBucket
+
+
+class _Response:
+    status_code = 202
+
+
+class RecordingEmailService:
+    """Stands in for EmailService, recording the sends in flight per sender."""
+
+    def __init__(self, failures=None, delay=0.02):
+        self.failures = failures or {}
+        self.delay = delay
+        self.calls = []
+        self.in_flight = {}
+        self.peak = {}
+        self.__lock = threading.Lock()
+
+    def send_email(self, sender_mail, subject, body, to_address, **options):
+        with self.__lock:
+            self.calls.append((sender_mail, subject, options.get("retry_policy")))
+            self.in_flight[sender_mail] = self.in_flight.get(sender_mail, 0) + 1
+            self.peak[sender_mail] = max(self.peak.get(sender_mail, 0), self.in_flight[sender_mail])
+            failure = self.failures.get(subject)
+            if isinstance(failure, list):
+                failure = failure.pop(0) if failure else None
+        try:
+            time.sleep(self.delay)
+            if failure is not None:
+                raise failure
+            return _Response()
+        finally:
+            with self.__lock:
+                self.in_flight[sender_mail] -= 1
+
+
+def test_every_message_is_sent_through_throttling():
+    with FakeGraphServer(throttle_rate=0.3, retry_after=0, seed=7, mailboxes=2, messages_per_mailbox=1) as server:
+        graph = HermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority)
+        messages = [
+            {"sender_mail": server.data.mailboxes[index % 2], "subject": f"Hello {index}", "body": "Hi", "to_address": "to@contoso.test"}
+            for index in range(30)
+        ]
+
+        report = graph.send_emails_bulk(messages, max_workers=8, messages_per_minute=1000, max_attempts=20)
+
+    assert [result["key"] for result in report["results"]] == list(range(30))
+    assert report["stats"]["sent"] == 30 and report["stats"]["failed"] == 0
+    assert report["stats"]["throttled"] > 0
+    assert server.router.sent_mail == 30
+
+
+def test_concurrent_sends_per_sender_are_capped():
+    service = RecordingEmailService()
+    dispatcher = SendDispatcher(service, max_workers=16, messages_per_minute=1000, max_concurrent_per_sender=2)
+    for index in range(20):
+        dispatcher.submit(f"sender{index % 2}@contoso.test", f"Message {index}", "Hi", "to@contoso.test")
+
+    report = dispatcher.run()
+
+    assert report["stats"]["sent"] == 20
+    assert max(service.peak.values()) <= 2
+    # The dispatcher requeues throttled messages itself, so sends never back off inside the worker.
+    assert all(retry_policy is not None and retry_policy.max_retries == 0 for _, _, retry_policy in service.calls)
+
+
+def test_throttled_message_is_requeued_after_retry_after():
+    throttled = HermesMSGraphError("Too many requests", error_code=429, retry_after=0.1)
+    service = RecordingEmailService(failures={"Busy": [throttled]})
+    dispatcher = SendDispatcher(service, messages_per_minute=1000)
+    dispatcher.submit("a@contoso.test", "Busy", "Hi", "to@contoso.test", key="busy")
+
+    started = time.monotonic()
+    report = dispatcher.run()
+
+    [result] = report["results"]
+    assert (result["key"], result["status"], result["attempts"]) == ("busy", "sent", 2)
+    assert report["stats"]["throttled"] == 1
+    assert time.monotonic() - started >= 0.1
+
+
+def test_failures_are_reported_without_stopping_the_run():
+    service = RecordingEmailService(failures={
+        "Rejected": HermesMSGraphError("Bad request", error_code=400),
+        "Broken": ValueError("unreadable attachment"),
+        "Always busy": HermesMSGraphError("Too many requests", error_code=429, retry_after=0),
+    })
+    dispatcher = SendDispatcher(service, messages_per_minute=1000, max_attempts=3)
+    for subject in ("Rejected", "Broken", "Always busy", "Fine"):
+        dispatcher.submit("a@contoso.test", subject, "Hi", "to@contoso.test", key=subject)
+
+    report = dispatcher.run()
+
+    results = {result["key"]: result for result in report["results"]}
+    assert (results["Rejected"]["status"], results["Rejected"]["status_code"]) == ("failed", 400)
+    assert results["Broken"]["status"] == "failed" and "ValueError" in results["Broken"]["error"]
+    assert (results["Always busy"]["status"], results["Always busy"]["attempts"]) == ("failed", 3)
+    assert results["Fine"]["status"] == "sent"
+    assert report["stats"] == dict(report["stats"], sent=1, failed=3, throttled=3)
+
+
+def test_message_over_the_daily_recipient_quota_is_not_sent():
+    service = RecordingEmailService()
+    dispatcher = SendDispatcher(service, recipients_per_day=2)
+    dispatcher.submit("a@contoso.test", "Too many", "Hi", ["to@contoso.test"] * 3)
+
+    [result] = dispatcher.run()["results"]
+
+    assert (result["status"], result["attempts"]) == ("failed", 0)
+    assert service.calls == []
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(capacity=2, refill_rate=1.0)
+    bucket.consume(2)
+
+    assert 0.9 < bucket.wait_time(1) <= 1.0
+    assert bucket.wait_time(3) > 2.9
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import AsyncHermesMSGraph, HermesMSGraph
+from hermes_msgraph.email_service import INLINE_ATTACHMENTS_MAX_SIZE
+from hermes_msgraph.exceptions import HermesMSGraphError
+
+
+@pytest.fixture
+def server():
+    with FakeGraphServer(mailboxes=1, messages_per_mailbox=5, folders_per_mailbox=4) as server:
+        yield server
+
+
+@pytest.fixture
+def attachments(tmp_path):
+    small = tmp_path / "small.txt"
+    small.write_bytes(b"small attachment")
+    large = tmp_path / "large.bin"
+    large.write_bytes(bytes(range(256)) * (INLINE_ATTACHMENTS_MAX_SIZE // 256 + 4096))
+    return [str(small), str(large)]
+
+
+def _graph(server):
+    return HermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority)
+
+
+def _async_graph(server):
+    return AsyncHermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority)
+
+
+def _drafts(server):
+    return [message for message in server.data.messages[server.data.mailboxes[0]] if message.get("isDraft")]
+
+
+def test_small_attachments_are_sent_inline(server, tmp_path):
+    path = tmp_path / "note.txt"
+    path.write_bytes(b"hello")
+
+    _graph(server).send_email(server.data.mailboxes[0], "Hi", "Body", "to@contoso.test", attachments=str(path))
+
+    assert server.router.sent_mail == 1
+    assert server.router.sent_drafts == [] and server.router.upload_sessions == {}
+
+
+def test_large_attachments_are_uploaded_to_a_draft(server, attachments):
+    _graph(server).send_email(server.data.mailboxes[0], "Report", "Body", "to@contoso.test", attachments=attachments)
+
+    [sent] = server.router.sent_drafts
+    assert sent["subject"] == "Report"
+    assert sorted((attachment["name"], attachment["size"]) for attachment in sent["attachments"]) == [
+        ("large.bin", len(open(attachments[1], "rb").read())),
+        ("small.txt", len(b"small attachment")),
+    ]
+    # The large file went through an upload session in several chunks.
+    [session] = server.router.upload_sessions.values()
+    assert session["received"] == session["size"] > INLINE_ATTACHMENTS_MAX_SIZE
+    assert _drafts(server) == []
+
+
+def test_async_large_attachments_are_uploaded_to_a_draft(server, attachments):
+    async def send():
+        async with _async_graph(server) as graph:
+            await graph.send_email(server.data.mailboxes[0], "Report", "Body", "to@contoso.test", attachments=attachments)
+
+    asyncio.run(send())
+
+    [sent] = server.router.sent_drafts
+    assert sorted(attachment["name"] for attachment in sent["attachments"]) == ["large.bin", "small.txt"]
+    assert _drafts(server) == []
+
+
+def test_failed_upload_deletes_the_draft(server, attachments):
+    graph = _graph(server)
+
+    def failing_upload(upload_url, file_path, **options):
+        raise HermesMSGraphError("upload failed")
+
+    graph.http_client.upload_file = failing_upload
+
+    with pytest.raises(HermesMSGraphError, match="upload failed"):
+        graph.send_email(server.data.mailboxes[0], "Report", "Body", "to@contoso.test", attachments=attachments)
+
+    assert server.router.sent_drafts == []
+    assert _drafts(server) == []
+
+
+def test_failed_cleanup_keeps_the_original_error(server, attachments):
+    graph = _graph(server)
+
+    def failing_upload(upload_url, file_path, **options):
+        raise HermesMSGraphError("upload failed")
+
+    def failing_delete(url, **options):
+        raise HermesMSGraphError("delete failed")
+
+    graph.http_client.upload_file = failing_upload
+    graph.http_client.delete = failing_delete
+
+    with pytest.raises(HermesMSGraphError, match="upload failed"):
+        graph.send_email(server.data.mailboxes[0], "Report", "Body", "to@contoso.test", attachments=attachments)
+
+    assert len(_drafts(server)) == 1
+
+
+def test_async_failed_cleanup_keeps_the_original_error(server, attachments):
+    async def send():
+        async with _async_graph(server) as graph:
+
+            async def failing_upload(upload_url, file_path, **options):
+                raise HermesMSGraphError("upload failed")
+
+            async def failing_delete(url, **options):
+                raise HermesMSGraphError("delete failed")
+
+            graph.http_client.upload_file = failing_upload
+            graph.http_client.delete = failing_delete
+            await graph.send_email(server.data.mailboxes[0], "Report", "Body", "to@contoso.test", attachments=attachments)
+
+    with pytest.raises(HermesMSGraphError, match="upload failed"):
+        asyncio.run(send())
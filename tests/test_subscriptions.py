@@ -0,0 +1,141 @@
+import queue
+import threading
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph, NotificationReceiver
+from hermes_msgraph.exceptions import HermesMSGraphError
+from hermes_msgraph.subscriptions import MAX_SUBSCRIPTION_MINUTES, SubscriptionRenewer, _parse_expiration
+
+
+@pytest.fixture
+def server():
+    # Tests create and delete subscriptions, so each gets its own server.
+    with FakeGraphServer(mailboxes=1, messages_per_mailbox=1) as server:
+        yield server
+
+
+@pytest.fixture
+def graph(server):
+    return HermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority)
+
+
+@pytest.fixture
+def receiver():
+    with NotificationReceiver(port=0, client_state="secret") as receiver:
+        yield receiver
+
+
+def _minutes_left(subscription):
+    return (_parse_expiration(subscription["expirationDateTime"]) - datetime.now(timezone.utc)) / timedelta(minutes=1)
+
+
+def test_subscription_is_validated_by_the_receiver_and_tracked(server, graph, receiver):
+    mailbox = server.data.mailboxes[0]
+
+    subscription = graph.subscribe_to_messages(mailbox, receiver.url, folder_id="inbox", client_state="secret")
+
+    assert subscription["resource"] == f"users/{mailbox}/mailFolders('inbox')/messages"
+    assert MAX_SUBSCRIPTION_MINUTES["messages"] - 1 < _minutes_left(subscription) <= MAX_SUBSCRIPTION_MINUTES["messages"]
+    assert graph.subscription_service.subscriptions[subscription["id"]]["clientState"] == "secret"
+    assert [item["id"] for item in graph.list_subscriptions()] == [subscription["id"]]
+
+
+def test_failed_validation_is_raised_and_not_tracked(server, graph, receiver):
+    with pytest.raises(HermesMSGraphError) as error:
+        graph.subscribe_to_users(receiver.url.replace("/notifications", "/elsewhere"))
+
+    assert error.value.error_code == 400
+    assert graph.subscription_service.subscriptions == {}
+    assert server.router.subscriptions == {}
+
+
+def test_renew_and_delete(server, graph, receiver):
+    subscription = graph.subscribe_to_users(receiver.url, expiration_minutes=30)
+    assert _minutes_left(subscription) <= 30
+
+    renewed = graph.renew_subscription(subscription["id"])
+
+    assert _minutes_left(renewed) > MAX_SUBSCRIPTION_MINUTES["users"] - 1
+    graph.delete_subscription(subscription["id"])
+    assert graph.subscription_service.subscriptions == {} and server.router.subscriptions == {}
+    # Deleting twice is not an error.
+    graph.delete_subscription(subscription["id"])
+
+
+def test_renewing_a_removed_subscription_stops_tracking_it(server, graph, receiver):
+    subscription = graph.subscribe_to_users(receiver.url)
+    server.router.subscriptions.clear()
+
+    with pytest.raises(HermesMSGraphError) as error:
+        graph.renew_subscription(subscription["id"])
+
+    assert error.value.error_code == 404
+    assert graph.subscription_service.subscriptions == {}
+
+
+def test_renewer_renews_only_the_subscriptions_due(graph, receiver):
+    due = graph.subscribe_to_users(receiver.url, expiration_minutes=30)
+    later = graph.subscribe_to_users(receiver.url)
+
+    renewed = SubscriptionRenewer(graph.subscription_service, renew_before=3600).renew_due()
+
+    assert [subscription["id"] for subscription in renewed] == [due["id"]]
+    tracked = graph.subscription_service.subscriptions
+    assert _minutes_left(tracked[due["id"]]) > 60
+    assert tracked[later["id"]]["expirationDateTime"] == later["expirationDateTime"]
+
+
+def test_renewer_thread_survives_any_error(graph, receiver, monkeypatch):
+    graph.subscribe_to_users(receiver.url, expiration_minutes=30)
+    attempts = threading.Semaphore(0)
+
+    def failing_renew(subscription_id, expiration_minutes=None):
+        attempts.release()
+        raise ValueError("unexpected payload")
+
+    monkeypatch.setattr(graph.subscription_service, "renew_subscription", failing_renew)
+
+    with SubscriptionRenewer(graph.subscription_service, check_interval=0.01) as renewer:
+        assert all(attempts.acquire(timeout=5) for _ in range(3))
+        assert renewer.renew_due() == []
+
+
+def _notify(receiver, *notifications):
+    return httpx.post(receiver.url, json={"value": list(notifications)})
+
+
+def test_receiver_queues_notifications_with_the_right_client_state(receiver):
+    response = _notify(
+        receiver,
+        {"subscriptionId": "s1", "clientState": "secret", "changeType": "created"},
+        {"subscriptionId": "s2", "clientState": "guess", "changeType": "created"},
+    )
+
+    assert response.status_code == 202
+    assert receiver.queue.get(timeout=5)["subscriptionId"] == "s1"
+    assert receiver.queue.empty()
+    assert receiver.stats() == dict(receiver.stats(), received=1, rejected=1)
+
+
+def test_receiver_dispatches_lifecycle_events_to_their_callback():
+    notifications = queue.Queue()
+    lifecycle_events = queue.Queue()
+    with NotificationReceiver(port=0, callback=notifications.put, lifecycle_callback=lifecycle_events.put) as receiver:
+        _notify(receiver, {"subscriptionId": "s1", "lifecycleEvent": "reauthorizationRequired"}, {"subscriptionId": "s1"})
+
+    assert lifecycle_events.get(timeout=5)["lifecycleEvent"] == "reauthorizationRequired"
+    assert "lifecycleEvent" not in notifications.get(timeout=5)
+    assert lifecycle_events.empty() and notifications.empty()
+
+
+def test_receiver_rejects_oversized_bodies():
+    with NotificationReceiver(port=0, max_body_bytes=64) as receiver:
+        response = _notify(receiver, {"subscriptionId": "s1", "resource": "x" * 100})
+
+    assert response.status_code == 413
+    assert receiver.queue.empty()
@@ -0,0 +1,91 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import fake_graph
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph
+
+
+@pytest.fixture
+def server():
+    # Every test changes the mailbox, so each gets its own server.
+    with FakeGraphServer(mailboxes=1, messages_per_mailbox=120, folders_per_mailbox=4, max_page_size=25) as server:
+        yield server
+
+
+@pytest.fixture
+def graph(server):
+    return HermesMSGraph("client", "secret", "tenant", base_url=server.base_url, authority=server.authority)
+
+
+def _ids(messages):
+    return sorted(message["id"] for message in messages)
+
+
+def _inbox(server):
+    mailbox = server.data.mailboxes[0]
+    return mailbox, server.data.folders[mailbox][0]["id"], server.data.messages[mailbox]
+
+
+def test_first_sync_reports_every_message_as_added(server, graph):
+    mailbox, inbox_id, messages = _inbox(server)
+
+    changes = graph.email_service.sync_messages(mailbox, "Inbox", max_page_size=25)
+
+    assert changes["full_sync"] is True
+    assert _ids(changes["added"]) == _ids(message for message in messages if message["parentFolderId"] == inbox_id)
+    assert changes["updated"] == [] and changes["removed"] == []
+    assert changes["delta_link"]
+
+
+def test_next_sync_returns_only_the_changes(server, graph):
+    mailbox, inbox_id, messages = _inbox(server)
+    graph.email_service.sync_messages(mailbox, "Inbox")
+
+    updated, removed = messages[0], messages[1]
+    updated["subject"] = "Changed subject"
+    messages.remove(removed)
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    added = dict(messages[2], id="AAMk-new", createdDateTime=now, receivedDateTime=now)
+    messages.append(added)
+
+    changes = graph.email_service.sync_messages(mailbox, "Inbox")
+
+    assert changes["full_sync"] is False
+    assert _ids(changes["added"]) == ["AAMk-new"]
+    assert _ids(changes["updated"]) == [updated["id"]]
+    assert _ids(changes["removed"]) == [removed["id"]]
+    assert graph.email_service.sync_messages(mailbox, "Inbox")["added"] == []
+
+
+def test_watermark_comes_from_the_server_clock(server, graph, monkeypatch):
+    mailbox, inbox_id, _ = _inbox(server)
+    # A server clock far from the local one.
+    monkeypatch.setattr(fake_graph._Handler, "date_time_string", lambda self, timestamp=None: "Mon, 01 Jan 2024 12:00:00 GMT")
+
+    graph.email_service.sync_messages(mailbox, "Inbox")
+
+    state = graph.email_service.state_store.get(f"messages:{mailbox}:{inbox_id}:")
+    assert state["synced_at"] == "2024-01-01T12:00:00Z"
+
+
+def test_select_always_includes_created_date_time(server, graph):
+    mailbox, _, _ = _inbox(server)
+
+    changes = graph.email_service.sync_messages(mailbox, "Inbox", select=["subject"])
+
+    assert changes["added"]
+    assert all(set(message) == {"id", "subject", "createdDateTime"} for message in changes["added"])
+
+
+def test_expired_delta_token_restarts_a_full_sync(server, graph):
+    mailbox, _, _ = _inbox(server)
+    graph.email_service.sync_messages(mailbox, "Inbox")
+    server.router.delta_snapshots.clear()
+
+    changes = graph.email_service.sync_messages(mailbox, "Inbox")
+
+    assert changes["full_sync"] is True
+    assert changes["added"]
@@ -0,0 +1,100 @@
+import pytest
+
+from fake_graph import FakeGraphServer
+
+from hermes_msgraph import HermesMSGraph
+from hermes_msgraph.exceptions import HermesMSGraphError
+from hermes_msgraph.models import User
+from hermes_msgraph.user_store import SQLiteUserStore
+
+
+@pytest.fixture
+def server():
+    # Tests change the directory, so each gets its own server.
+    with FakeGraphServer(mailboxes=1, messages_per_mailbox=1, users=250) as server:
+        yield server
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteUserStore(str(tmp_path / "users.db"))
+
+
+@pytest.fixture
+def graph(server, store):
+    return HermesMSGraph(
+        "client", "secret", "tenant", base_url=server.base_url, authority=server.authority, user_store=store
+    )
+
+
+def _ids(users):
+    return sorted(user["id"] for user in users)
+
+
+def test_first_sync_copies_the_directory(server, graph, store):
+    result = graph.sync_users(max_page_size=40)
+
+    assert result == {"upserted": 250, "removed": 0, "full_sync": True, "users": 250}
+    assert _ids(store.iter_users()) == _ids(server.data.users)
+    assert store.delta_link
+
+
+def test_next_sync_applies_only_the_changes(server, graph, store):
+    graph.sync_users()
+    users = server.data.users
+    users[3]["jobTitle"] = "Director"
+    removed = users.pop(10)
+    users.append({**users[0], "id": "user-new", "displayName": "New User"})
+
+    result = graph.sync_users()
+
+    assert result == {"upserted": 2, "removed": 1, "full_sync": False, "users": 250}
+    stored = {user["id"]: user for user in store.iter_users()}
+    assert stored[users[3]["id"]]["jobTitle"] == "Director"
+    assert removed["id"] not in stored and "user-new" in stored
+
+
+def test_partial_update_keeps_the_other_properties(store):
+    store.apply([{"id": "u1", "displayName": "Ann", "jobTitle": "Engineer"}])
+    store.apply([{"id": "u1", "jobTitle": "Manager"}])
+
+    assert list(store.iter_users()) == [{"id": "u1", "displayName": "Ann", "jobTitle": "Manager"}]
+
+
+def test_expired_delta_link_runs_a_full_sync_that_drops_missing_users(server, graph, store):
+    graph.sync_users()
+    server.router.delta_snapshots.clear()
+    removed = server.data.users.pop(0)
+
+    result = graph.sync_users()
+
+    assert result["full_sync"] is True
+    assert result["users"] == 249
+    assert removed["id"] not in {user["id"] for user in store.iter_users()}
+
+
+def test_interrupted_sync_keeps_the_previous_delta_link(server, graph, store, monkeypatch):
+    graph.sync_users()
+    delta_link = store.delta_link
+    server.data.users[0]["jobTitle"] = "Changed"
+    iter_pages = graph.http_client.iter_pages
+
+    def failing_iter_pages(url, **options):
+        yield next(iter_pages(url, **options))
+        raise HermesMSGraphError("connection lost")
+
+    monkeypatch.setattr(graph.http_client, "iter_pages", failing_iter_pages)
+    with pytest.raises(HermesMSGraphError):
+        graph.sync_users()
+
+    assert store.delta_link == delta_link
+
+
+def test_get_all_users_reads_members_from_the_store(server, graph):
+    server.data.users[5]["userType"] = "Guest"
+    users = graph.get_all_users(format=User)
+    requests_after_sync = server.requests
+
+    assert len(users) == 249 and all(isinstance(user, User) for user in users)
+    assert len(graph.get_all_users(data="simple", refresh=False)) == 249
+    assert server.requests == requests_after_sync